@@ -4,7 +4,7 @@ Main API router for v1 endpoints
 
 from fastapi import APIRouter
 
-from .endpoints import auth, users, courses, lessons, quizzes, progress
+from .endpoints import auth, users, courses, lessons, quizzes, progress, admin, uploads
 
 api_router = APIRouter()
 
@@ -14,4 +14,6 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(courses.router, prefix="/courses", tags=["courses"])
 api_router.include_router(lessons.router, prefix="/lessons", tags=["lessons"])
 api_router.include_router(quizzes.router, prefix="/quizzes", tags=["quizzes"])
-api_router.include_router(progress.router, prefix="/progress", tags=["progress"]) 
\ No newline at end of file
+api_router.include_router(progress.router, prefix="/progress", tags=["progress"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"]) 
\ No newline at end of file
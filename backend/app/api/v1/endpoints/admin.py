@@ -0,0 +1,92 @@
+"""
+Admin endpoints
+"""
+
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status
+import structlog
+
+from app.core.config import settings
+from app.core.profiling import (
+    PROFILE_HEADER,
+    create_profile_token,
+    profile_store,
+    profiling_registry,
+)
+from app.core.security import require_admin
+from app.schemas.admin import (
+    ProfilingRule,
+    ProfilingStatus,
+    ProfileTokenRequest,
+    ProfileTokenResponse,
+)
+
+logger = structlog.get_logger()
+# Every admin route requires the admin role, including ones added later
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+def _ensure_profiling_enabled():
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Profiling is disabled"
+        )
+
+
+@router.get("/profiling", response_model=ProfilingStatus)
+async def get_profiling_status(
+    current_user_id: str = Depends(require_admin)
+):
+    """Get profiling configuration and captured profiles for this worker."""
+    return {
+        "enabled": settings.PROFILING_ENABLED,
+        "route_rates": profiling_registry.route_rates,
+        "captures": profile_store.list(),
+    }
+
+
+@router.put("/profiling/routes", response_model=ProfilingStatus)
+async def set_profiling_route(
+    rule: ProfilingRule,
+    current_user_id: str = Depends(require_admin)
+):
+    """Profile a percentage of requests under a path prefix (0 disables)."""
+    _ensure_profiling_enabled()
+    profiling_registry.set_route_rate(rule.path_prefix, rule.sample_rate)
+    
+    logger.info(
+        "Profiling rule updated",
+        user_id=current_user_id,
+        path_prefix=rule.path_prefix,
+        sample_rate=rule.sample_rate,
+    )
+    return await get_profiling_status(current_user_id)
+
+
+@router.delete("/profiling/routes", response_model=ProfilingStatus)
+async def clear_profiling_routes(
+    current_user_id: str = Depends(require_admin)
+):
+    """Disable all sampled profiling rules."""
+    profiling_registry.clear()
+    logger.info("Profiling rules cleared", user_id=current_user_id)
+    return await get_profiling_status(current_user_id)
+
+
+@router.post("/profiling/token", response_model=ProfileTokenResponse)
+async def create_profiling_token(
+    token_request: ProfileTokenRequest,
+    current_user_id: str = Depends(require_admin)
+):
+    """Create a signed header value that profiles any request carrying it."""
+    _ensure_profiling_enabled()
+    token = create_profile_token(token_request.ttl_seconds)
+    expires = int(token.split(".", 1)[0])
+    
+    logger.info("Profiling token created", user_id=current_user_id, expires=expires)
+    return {
+        "header": PROFILE_HEADER,
+        "token": token,
+        "expires_at": datetime.utcfromtimestamp(expires),
+    }
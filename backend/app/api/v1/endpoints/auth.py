@@ -18,6 +18,13 @@ from app.core.security import (
     get_current_user_id
 )
 from app.core.config import settings
+from app.core.rate_limit import (
+    API_SUBJECT_RULE,
+    enforce_rate_limit,
+    limit_by_subject,
+    limit_login_by_account,
+    limit_login_by_ip,
+)
 from app.schemas.user import UserCreate, UserResponse, UserLogin, Token
 from app.services.user_service import UserService
 from app.core.exceptions import AuthenticationException
@@ -29,7 +36,8 @@ router = APIRouter()
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
-    db: AsyncSession = Depends(get_async_db)
+    db: AsyncSession = Depends(get_async_db),
+    _: None = Depends(limit_login_by_ip)
 ):
     """Register a new user."""
     try:
@@ -62,10 +70,14 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: AsyncSession = Depends(get_async_db)
+    db: AsyncSession = Depends(get_async_db),
+    _: None = Depends(limit_login_by_ip)
 ):
     """Authenticate user and return access tokens."""
     try:
+        # Reject before any DB lookup or bcrypt work
+        await limit_login_by_account(form_data.username)
+        
         user_service = UserService(db)
         
         # Verify user credentials
@@ -117,10 +129,14 @@ async def login(
 @router.post("/login/json", response_model=Token)
 async def login_json(
     user_credentials: UserLogin,
-    db: AsyncSession = Depends(get_async_db)
+    db: AsyncSession = Depends(get_async_db),
+    _: None = Depends(limit_login_by_ip)
 ):
     """Authenticate user with JSON payload and return access tokens."""
     try:
+        # Reject before any DB lookup or bcrypt work
+        await limit_login_by_account(user_credentials.email)
+        
         user_service = UserService(db)
         
         # Verify user credentials
@@ -190,6 +206,8 @@ async def refresh_token(
                 detail="Invalid refresh token"
             )
         
+        await enforce_rate_limit(API_SUBJECT_RULE, f"sub:{user_id}")
+        
         # Verify user still exists and is active
         user_service = UserService(db)
         user = await user_service.get_user_by_id(int(user_id))
@@ -252,7 +270,7 @@ async def logout(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
-    current_user_id: str = Depends(get_current_user_id),
+    current_user_id: str = Depends(limit_by_subject),
     db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user information."""
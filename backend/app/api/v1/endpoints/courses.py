@@ -0,0 +1,102 @@
+"""
+Course endpoints
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.database import get_async_db
+from app.core.rate_limit import limit_by_subject
+from app.schemas.course import CourseBatch, CourseBundleDocument, CourseRating, CourseStats
+from app.schemas.lesson import CourseConceptOrder
+from app.services.concept_graph import ConceptGraphService
+from app.services.batch_service import BatchFetchService, parse_ids
+from app.services.counter_service import counter_service
+from app.services.course_bundles import CourseBundleService, bundle_etag
+from app.services.course_stats_service import CourseStatsService
+from app.services.lesson_artifacts import choose_encoding, etag_matches
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+
+@router.get("/batch", response_model=CourseBatch)
+async def get_courses_batch(
+    ids: str = Query(..., description="Comma-separated course ids"),
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get published courses by id, in request order."""
+    batch_service = BatchFetchService(db)
+    return await batch_service.get_courses(parse_ids(ids))
+
+
+@router.post("/{course_id}/views", status_code=status.HTTP_202_ACCEPTED)
+async def record_course_view(
+    course_id: int,
+    current_user_id: str = Depends(limit_by_subject)
+):
+    """Count a course page view, once per user per window; applied in the next counter flush."""
+    counter_service.increment_course_view(course_id, viewer=int(current_user_id))
+    return {"status": "accepted"}
+
+
+@router.get("/{course_id}/stats", response_model=CourseStats)
+async def get_course_stats(
+    course_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get precomputed course analytics."""
+    stats_service = CourseStatsService(db)
+    return await stats_service.get_course_stats(course_id)
+
+
+@router.get("/{course_id}/concept-order", response_model=CourseConceptOrder)
+async def get_course_concept_order(
+    course_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Check the course's lesson order against concept prerequisites."""
+    concept_graph_service = ConceptGraphService(db)
+    return await concept_graph_service.get_course_order(course_id)
+
+
+@router.get("/{course_id}/bundle", response_class=Response, responses={200: {"model": CourseBundleDocument}, 304: {}})
+async def get_course_bundle(
+    course_id: int,
+    request: Request,
+    since: Optional[str] = Query(None, max_length=32, description="Bundle version the client already has"),
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the course as one compressed offline bundle, or the delta from a held version."""
+    bundle_service = CourseBundleService(db)
+    state = await bundle_service.get_state(course_id)
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    headers = {"Cache-Control": "private, no-cache", "Vary": "Accept-Encoding", "X-Bundle-Version": state.version}
+    if_none_match = request.headers.get("if-none-match")
+    for base_version in {since, None}:
+        if etag_matches(if_none_match, bundle_etag(state.version, base_version, encoding)):
+            headers["ETag"] = bundle_etag(state.version, base_version, encoding)
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    bundle = await bundle_service.get_bundle(state, since)
+    headers["ETag"] = bundle_etag(bundle.version, bundle.base_version, encoding)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=bundle.body(encoding), media_type="application/json", headers=headers)
+
+
+@router.put("/{course_id}/rating", status_code=status.HTTP_204_NO_CONTENT)
+async def rate_course(
+    course_id: int,
+    rating: CourseRating,
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Rate an enrolled course; analytics update asynchronously."""
+    stats_service = CourseStatsService(db)
+    await stats_service.rate_course(int(current_user_id), course_id, rating.rating)
@@ -0,0 +1,89 @@
+"""
+Lesson endpoints
+"""
+
+from typing import List
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.database import get_async_db
+from app.core.rate_limit import limit_by_subject
+from app.core.security import require_admin
+from app.schemas.lesson import LessonBatch, LessonPublishRequest, LessonPublishResponse, LessonRef
+from app.services.batch_service import BatchFetchService, parse_ids
+from app.services.concept_graph import ConceptGraphService
+from app.services.counter_service import counter_service
+from app.services.lesson_artifacts import LessonArtifactService, artifact_etag, choose_encoding, etag_matches
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+
+@router.get("/batch", response_model=LessonBatch)
+async def get_lessons_batch(
+    ids: str = Query(..., description="Comma-separated lesson ids"),
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get published lessons by id, in request order, without their content."""
+    batch_service = BatchFetchService(db)
+    return await batch_service.get_lessons(parse_ids(ids))
+
+
+@router.get("/unlocks", response_model=List[LessonRef])
+async def get_unlocked_lessons(
+    concept: str = Query(..., min_length=1, max_length=255),
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get lessons whose prerequisites are met once the concept is mastered."""
+    concept_graph_service = ConceptGraphService(db)
+    return await concept_graph_service.get_unlocked_lessons(int(current_user_id), concept)
+
+
+@router.post("/publish", response_model=LessonPublishResponse)
+async def publish_lessons(
+    publish_request: LessonPublishRequest,
+    current_user_id: str = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Render and publish lessons; unchanged content reuses its stored artifact."""
+    artifact_service = LessonArtifactService(db)
+    return await artifact_service.publish_lessons(publish_request.lesson_ids)
+
+
+@router.get("/{lesson_id}/content", response_class=Response, responses={200: {"content": {"text/html": {}}}, 304: {}})
+async def get_lesson_content(
+    lesson_id: int,
+    request: Request,
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a published lesson's rendered HTML, precompressed when the client accepts it."""
+    artifact_service = LessonArtifactService(db)
+    content_hash = await artifact_service.get_content_hash(lesson_id)
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": artifact_etag(content_hash, encoding),
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    artifact = await artifact_service.get_artifact(content_hash)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=artifact.body(encoding), media_type="text/html; charset=utf-8", headers=headers)
+
+
+@router.post("/{lesson_id}/views", status_code=status.HTTP_202_ACCEPTED)
+async def record_lesson_view(
+    lesson_id: int,
+    current_user_id: str = Depends(limit_by_subject)
+):
+    """Count a lesson view, once per user per window; applied in the next counter flush."""
+    counter_service.increment_lesson_view(lesson_id, viewer=int(current_user_id))
+    return {"status": "accepted"}
@@ -0,0 +1,117 @@
+"""
+Progress tracking endpoints
+"""
+
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.database import get_async_db
+from app.core.rate_limit import limit_by_subject
+from app.schemas.progress import (
+    DashboardResponse,
+    LearningAnalytics,
+    LessonCompletionResponse,
+    LessonTelemetry,
+    ProgressSyncRequest,
+    ProgressSyncResponse,
+    ReviewSubmission,
+    SpacedRepetitionSchedule,
+)
+from app.services.knowledge_tracing import KnowledgeTracingService
+from app.services.progress_engine import ProgressEngine
+from app.services.progress_service import ProgressService
+from app.services.review_scheduler import ReviewScheduler
+from app.services.sync_service import ProgressSyncService
+from app.services.telemetry_service import lesson_telemetry_buffer
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+
+@router.post("/lessons/{lesson_id}/telemetry", status_code=status.HTTP_202_ACCEPTED)
+async def record_lesson_telemetry(
+    lesson_id: int,
+    telemetry: LessonTelemetry,
+    current_user_id: str = Depends(limit_by_subject)
+):
+    """Buffer reading telemetry; it is written to the database in bulk."""
+    lesson_telemetry_buffer.record(
+        int(current_user_id),
+        lesson_id,
+        scroll_percentage=telemetry.scroll_percentage,
+        interactions=telemetry.interactions,
+        time_spent_seconds=telemetry.time_spent_seconds,
+    )
+    return {"status": "accepted"}
+
+
+@router.post("/lessons/{lesson_id}/complete", response_model=LessonCompletionResponse)
+async def complete_lesson(
+    lesson_id: int,
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Mark a lesson completed and advance course progress."""
+    progress_engine = ProgressEngine(db)
+    return await progress_engine.complete_lesson(int(current_user_id), lesson_id)
+
+
+@router.post("/sync", response_model=ProgressSyncResponse)
+async def sync_progress(
+    sync_request: ProgressSyncRequest,
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Apply a batch of offline progress changes in one transaction."""
+    sync_service = ProgressSyncService(db)
+    results = await sync_service.apply(int(current_user_id), sync_request.mutations)
+    return ProgressSyncResponse(results=results, server_time=datetime.now(timezone.utc))
+
+
+@router.get("/dashboard", response_model=DashboardResponse)
+async def get_dashboard(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the learner's enrolled courses, most recently active first."""
+    progress_service = ProgressService(db)
+    return await progress_service.get_dashboard(int(current_user_id), limit=limit, cursor=cursor)
+
+
+@router.get("/reviews/due", response_model=List[SpacedRepetitionSchedule])
+async def get_due_reviews(
+    limit: int = Query(20, ge=1, le=100),
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get lessons due for review, most overdue first."""
+    review_scheduler = ReviewScheduler(db)
+    return await review_scheduler.get_due_reviews(int(current_user_id), limit=limit)
+
+
+@router.post("/reviews", response_model=List[SpacedRepetitionSchedule])
+async def submit_reviews(
+    submission: ReviewSubmission,
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Grade a batch of reviews and reschedule them."""
+    review_scheduler = ReviewScheduler(db)
+    grades = {review.lesson_id: review.quality for review in submission.reviews}
+    return await review_scheduler.submit_reviews(int(current_user_id), grades)
+
+
+@router.get("/concepts", response_model=LearningAnalytics)
+async def get_concept_mastery(
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the learner's estimated mastery of each concept."""
+    tracing_service = KnowledgeTracingService(db)
+    return await tracing_service.get_learning_analytics(int(current_user_id))
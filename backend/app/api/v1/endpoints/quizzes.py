@@ -0,0 +1,90 @@
+"""
+Quiz endpoints
+"""
+
+from typing import List
+
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.database import get_async_db
+from app.core.rate_limit import limit_by_subject
+from app.core.security import require_admin
+from app.schemas.quiz import (
+    AdaptiveQuestionSet,
+    AnswerKeyUpdate,
+    QuizAttemptCreate,
+    QuizAttemptResponse,
+    QuestionStats,
+    QuizDelivery,
+    RegradeResponse,
+)
+from app.services.grading_service import QuizGradingService
+from app.services.item_stats_service import ItemStatsService
+from app.services.quiz_delivery import QuizDeliveryService
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+
+@router.post("/{quiz_id}/attempts", response_model=QuizAttemptResponse, status_code=status.HTTP_201_CREATED)
+async def submit_quiz_attempt(
+    quiz_id: int,
+    submission: QuizAttemptCreate,
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Grade and record a quiz attempt."""
+    grading_service = QuizGradingService(db)
+    return await grading_service.submit_attempt(int(current_user_id), quiz_id, submission)
+
+
+@router.put("/{quiz_id}/questions/{question_id}/answer-key", response_model=RegradeResponse)
+async def update_answer_key(
+    quiz_id: int,
+    question_id: int,
+    answer_key: AnswerKeyUpdate,
+    current_user_id: str = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Change a question's correct answers and regrade existing attempts."""
+    grading_service = QuizGradingService(db)
+    return await grading_service.set_correct_answers(quiz_id, question_id, answer_key.correct_answer_ids)
+
+
+@router.get("/{quiz_id}", response_class=Response, responses={200: {"model": QuizDelivery}})
+async def get_quiz(
+    quiz_id: int,
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a quiz for the learner's next attempt, without correct answers."""
+    delivery_service = QuizDeliveryService(db)
+    payload = await delivery_service.get_quiz_payload(int(current_user_id), quiz_id)
+    return Response(content=payload, media_type="application/json")
+
+
+@router.get("/{quiz_id}/adaptive", response_class=Response, responses={200: {"model": AdaptiveQuestionSet}})
+async def get_adaptive_questions(
+    quiz_id: int,
+    count: int = Query(10, ge=1, le=100),
+    target: float = Query(0.7, ge=0.0, le=1.0),
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get practice questions whose observed success rate is closest to the target."""
+    item_stats_service = ItemStatsService(db)
+    payload = await item_stats_service.get_adaptive_set(quiz_id, count, target)
+    return Response(content=payload, media_type="application/json")
+
+
+@router.get("/{quiz_id}/stats", response_model=List[QuestionStats])
+async def get_question_stats(
+    quiz_id: int,
+    current_user_id: str = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get item statistics for every question of a quiz."""
+    item_stats_service = ItemStatsService(db)
+    return await item_stats_service.get_question_stats(quiz_id)
@@ -0,0 +1,127 @@
+"""
+Upload endpoints
+
+Files are sent as the raw request body (not multipart) so they stream
+straight to disk.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Path, Query, Request, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.database import get_async_db
+from app.core.rate_limit import limit_by_subject
+from app.core.security import require_instructor
+from app.models.upload import UploadKind
+from app.schemas.upload import StoredFileResponse, UploadSessionCreate, UploadSessionResponse
+from app.schemas.user import UserUpdate
+from app.services.lesson_artifacts import etag_matches
+from app.services.upload_service import UploadService, object_path
+from app.services.user_service import UserService
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+_SHA256_PATTERN = "^[0-9a-f]{64}$"
+
+
+def _content_length(request: Request) -> Optional[int]:
+    value = request.headers.get("content-length")
+    return int(value) if value and value.isdigit() else None
+
+
+@router.put("/avatar", response_model=StoredFileResponse)
+async def upload_avatar(
+    request: Request,
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Upload an image and make it the current user's avatar."""
+    upload_service = UploadService(db)
+    stored = await upload_service.store_stream(
+        request.stream(), UploadKind.AVATAR, request.headers.get("content-type"), _content_length(request)
+    )
+    user_service = UserService(db)
+    await user_service.update_user(int(current_user_id), UserUpdate(avatar_url=stored.url))
+    return stored
+
+
+@router.put("/media", response_model=StoredFileResponse)
+async def upload_media(
+    request: Request,
+    kind: UploadKind = Query(UploadKind.LESSON_MEDIA),
+    current_user_id: str = Depends(require_instructor),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Upload a thumbnail or lesson media file up to MAX_FILE_SIZE in one request."""
+    upload_service = UploadService(db)
+    return await upload_service.store_stream(
+        request.stream(), kind, request.headers.get("content-type"), _content_length(request)
+    )
+
+
+@router.post("/sessions", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    session_data: UploadSessionCreate,
+    current_user_id: str = Depends(require_instructor),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Start a resumable upload of a declared size."""
+    upload_service = UploadService(db)
+    return await upload_service.create_session(int(current_user_id), session_data)
+
+
+@router.get("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    session_id: str,
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a resumable upload's offset, to resume after an interruption."""
+    upload_service = UploadService(db)
+    return await upload_service.get_session(int(current_user_id), session_id)
+
+
+@router.patch("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def append_upload_session(
+    session_id: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0, description="Bytes already received, from the last response"),
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Append the request body to a resumable upload; returns the file once complete."""
+    upload_service = UploadService(db)
+    return await upload_service.append(
+        int(current_user_id), session_id, upload_offset, request.stream(), _content_length(request)
+    )
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_upload_session(
+    session_id: str,
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Cancel a resumable upload and discard its bytes."""
+    upload_service = UploadService(db)
+    await upload_service.cancel_session(int(current_user_id), session_id)
+
+
+@router.get("/files/{sha256}", response_class=FileResponse, responses={304: {}})
+async def get_stored_file(
+    request: Request,
+    sha256: str = Path(..., pattern=_SHA256_PATTERN),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Serve a stored file; its URL names its content, so it can be cached forever."""
+    headers = {"ETag": f'"{sha256}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    upload_service = UploadService(db)
+    stored = await upload_service.get_stored_file(sha256)
+    return FileResponse(object_path(sha256), media_type=stored.content_type, headers=headers)
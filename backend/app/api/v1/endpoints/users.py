@@ -0,0 +1,37 @@
+"""
+User endpoints
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.database import get_async_db
+from app.core.rate_limit import limit_by_subject
+from app.schemas.user import UserProfileBatch, UserStats
+from app.services.batch_service import BatchFetchService, parse_ids
+from app.services.user_stats_service import UserStatsService
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+
+@router.get("/me/stats", response_model=UserStats)
+async def get_my_stats(
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the current user's learning stats."""
+    stats_service = UserStatsService(db)
+    return await stats_service.get_user_stats(int(current_user_id))
+
+
+@router.get("/batch", response_model=UserProfileBatch)
+async def get_user_profiles_batch(
+    ids: str = Query(..., description="Comma-separated user ids"),
+    current_user_id: str = Depends(limit_by_subject),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get public profiles by id, in request order."""
+    batch_service = BatchFetchService(db)
+    return await batch_service.get_user_profiles(parse_ids(ids))
@@ -0,0 +1,126 @@
+"""
+Per-process caches shared by the services
+
+``TTLCache`` keeps loaded values for a fixed time, ``VersionedCache`` keeps
+one value per key until the caller presents a newer version, and
+``SizedLRU`` holds immutable values within a byte budget. Each is named for
+its hit/miss metric and, where it loads on a miss, takes the loader.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import record_cache_lookup
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+Loader = Callable[[AsyncSession, K], Awaitable[V]]
+
+
+class TTLCache(Generic[K, V]):
+    """Values loaded on a miss and kept for ``ttl_seconds``.
+
+    Call ``invalidate`` after changing what a key loads; the TTL bounds
+    staleness for changes made by other processes.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, loader: Loader):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.loader = loader
+        self._entries: Dict[K, Tuple[float, V]] = {}
+
+    async def get(self, session: AsyncSession, key: K) -> V:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+            record_cache_lookup(self.name, True)
+            return entry[1]
+
+        record_cache_lookup(self.name, False)
+        value = await self.loader(session, key)
+        self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self, key: Optional[K] = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+class VersionedCache(Generic[K, V]):
+    """One value per key, replaced when the caller's version moves on.
+
+    Loaded values carry the ``version`` they were built from. The caller
+    reads the current version (one indexed lookup), so a change made by any
+    process is seen on the next request.
+    """
+
+    def __init__(self, name: str, loader: Loader):
+        self.name = name
+        self.loader = loader
+        self._entries: Dict[K, Any] = {}
+
+    async def get(self, session: AsyncSession, key: K, version: Any) -> V:
+        value = self._entries.get(key)
+        if value is not None and value.version == version:
+            record_cache_lookup(self.name, True)
+            return value
+
+        record_cache_lookup(self.name, False)
+        value = await self.loader(session, key)
+        self._entries[key] = value
+        return value
+
+    def invalidate(self, key: Optional[K] = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+class SizedLRU(Generic[K, V]):
+    """LRU of immutable values, bounded by the total of their ``size``.
+
+    Values must never go stale under their key (content hashes, versioned
+    keys). With a loader, ``load`` fills misses from the database.
+    """
+
+    def __init__(self, name: str, max_bytes: int, loader: Optional[Callable[[AsyncSession, K], Awaitable[Optional[V]]]] = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self._entries: "OrderedDict[K, Any]" = OrderedDict()
+        self._size = 0
+
+    def get(self, key: K) -> Optional[V]:
+        value = self._entries.get(key)
+        record_cache_lookup(self.name, value is not None)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    async def load(self, session: AsyncSession, key: K) -> Optional[V]:
+        value = self.get(key)
+        if value is None:
+            value = await self.loader(session, key)
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        if value.size > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = value
+        self._size += value.size
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+
+    def invalidate(self) -> None:
+        self._entries.clear()
+        self._size = 0
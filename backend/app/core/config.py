@@ -35,6 +35,7 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PASSWORD_HASH_WORKERS: int = 4  # Threads in the bcrypt hashing pool
     
     # CORS
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
@@ -48,9 +49,103 @@ class Settings(BaseSettings):
     # Monitoring
     SENTRY_DSN: Optional[str] = None
     
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_SAMPLE_RATE: float = 1.0  # Fraction of success-path log lines kept
+    LOG_QUEUE_SIZE: int = 10000  # Records buffered before new ones are dropped
+    
+    # Metrics
+    METRICS_ENABLED: bool = True
+    METRICS_POOL_SAMPLE_SECONDS: float = 5.0
+    
+    # Profiling
+    PROFILING_ENABLED: bool = False
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 50  # Oldest captures are evicted beyond this
+    PROFILE_INTERVAL_SECONDS: float = 0.001
+    
+    # Tracing
+    TRACING_ENABLED: bool = True
+    TRACE_EXPORTER: str = "file"  # file, memory or none
+    TRACE_EXPORT_PATH: str = "traces/spans.jsonl"
+    TRACE_SAMPLE_RATE: float = 0.01  # Fraction of fast, successful traces kept
+    TRACE_SLOW_THRESHOLD_MS: float = 500.0  # Traces slower than this are always kept
+    
+    # Load shedding (adaptive concurrency limits per route class)
+    LOAD_SHEDDING_ENABLED: bool = True
+    LOAD_SHED_MIN_LIMIT: int = 4
+    LOAD_SHED_INITIAL_LIMIT: int = 100
+    LOAD_SHED_MAX_LIMIT: int = 500
+    LOAD_SHED_TARGET_LATENCY_MS: float = 250.0
+    LOAD_SHED_AUTH_INITIAL_LIMIT: int = 20  # Login/register are bcrypt-bound
+    LOAD_SHED_AUTH_MAX_LIMIT: int = 100
+    LOAD_SHED_AUTH_TARGET_LATENCY_MS: float = 500.0
+    LOAD_SHED_TRANSFER_MAX_LIMIT: int = 64  # Uploads, bundles and sync; shrinks only on server errors
+    
+    # Rate limiting (token buckets: burst capacity and sustained rate)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per process) or redis (shared)
+    RATE_LIMIT_LOGIN_IP_BURST: int = 20
+    RATE_LIMIT_LOGIN_IP_PER_MINUTE: float = 30.0
+    RATE_LIMIT_LOGIN_ACCOUNT_BURST: int = 5
+    RATE_LIMIT_LOGIN_ACCOUNT_PER_MINUTE: float = 5.0
+    RATE_LIMIT_API_BURST: int = 60
+    RATE_LIMIT_API_PER_MINUTE: float = 300.0
+    TRUSTED_PROXIES: List[str] = []  # IPs or CIDRs of proxies whose X-Forwarded-For is believed
+    
+    # Write-behind buffers (max data lost on crash: one interval, max_pending rows)
+    TELEMETRY_FLUSH_SECONDS: float = 5.0
+    TELEMETRY_MAX_PENDING: int = 1000
+    COUNTER_FLUSH_SECONDS: float = 10.0
+    COUNTER_MAX_PENDING: int = 5000
+    VIEW_DEDUPE_SECONDS: float = 1800.0  # Repeat views by the same user within this count once
+    VIEW_DEDUPE_MAX_ENTRIES: int = 200000
+    
+    # Transactional outbox relay
+    OUTBOX_POLL_SECONDS: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETENTION_HOURS: int = 72
+    
+    # Batch fetch endpoints
+    BATCH_MAX_IDS: int = 100
+    BATCH_CACHE_SECONDS: float = 60.0
+    BATCH_CACHE_MAX_ENTRIES: int = 10000  # Per record type
+    
+    # MessagePack request bodies (decoded in memory before routing)
+    MSGPACK_MAX_BODY_BYTES: int = 1048576  # 1MB
+    
+    # Progress engine
+    LESSON_ORDER_CACHE_SECONDS: float = 300.0
+    CONCEPT_GRAPH_REFRESH_SECONDS: float = 60.0
+    CONCEPT_GRAPH_LOOKBACK_SECONDS: float = 600.0  # Longer than any transaction writing lessons
+    
+    # Analytics rollups
+    ROLLUP_RECONCILE_INTERVAL_HOURS: float = 24.0
+    
+    # Spaced-repetition scheduler
+    REVIEW_SCHEDULER_INTERVAL_HOURS: float = 24.0
+    REVIEW_BATCH_SIZE: int = 5000
+    
+    # Lesson artifacts (rendered at publish time)
+    ARTIFACT_RENDER_WORKERS: int = 2  # Processes for bulk publishes
+    ARTIFACT_POOL_MIN_LESSONS: int = 8  # Smaller publishes render in a thread
+    ARTIFACT_CACHE_MAX_BYTES: int = 67108864  # 64MB
+    
+    # Offline course bundles
+    BUNDLE_RETAIN_VERSIONS: int = 5  # Older versions can't be delta bases
+    BUNDLE_CACHE_MAX_BYTES: int = 67108864  # 64MB
+    
+    # Quiz grading
+    ITEM_STATS_CACHE_SECONDS: float = 60.0
+    
     # File Storage
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10485760  # 10MB
+    MAX_MEDIA_FILE_SIZE: int = 524288000  # 500MB; lesson media through resumable uploads
+    UPLOAD_WRITE_BUFFER_BYTES: int = 1048576  # Received bytes are written to disk in blocks this size
+    UPLOAD_SESSION_TTL_HOURS: float = 24.0  # Unfinished resumable uploads are discarded after this
+    UPLOAD_JANITOR_INTERVAL_HOURS: float = 1.0
     
     @validator("ASYNC_DATABASE_URL", pre=True)
     def build_async_db_url(cls, v: Optional[str], values: dict) -> str:
@@ -69,6 +164,13 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in v.split(",")]
         return v
     
+    @validator("TRUSTED_PROXIES", pre=True)
+    def parse_trusted_proxies(cls, v):
+        """Parse trusted proxy addresses from string or list."""
+        if isinstance(v, str):
+            return [proxy.strip() for proxy in v.split(",") if proxy.strip()]
+        return v
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
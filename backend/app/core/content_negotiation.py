@@ -0,0 +1,241 @@
+"""
+MessagePack content negotiation
+
+Clients that send ``Accept: application/msgpack`` get MessagePack instead of
+JSON from every API route. Responses built by FastAPI are rendered straight
+to MessagePack by ``NegotiatedJSONResponse`` (the app's default response
+class), which reads the negotiated format from a context variable the
+middleware sets per request. Routes that return pre-serialized JSON bytes
+are transcoded on the way out. Compressed bodies are passed through as they
+are, since a client that asked for MessagePack still accepts the JSON
+document.
+
+Request bodies sent as ``Content-Type: application/msgpack`` are decoded and
+handed to the app as JSON, so every route accepts either format without
+changes. Decoding holds the whole body in memory, so bodies over
+``MSGPACK_MAX_BODY_BYTES`` are refused with 413, and upload routes, which
+stream raw bytes to disk, are never decoded.
+"""
+
+from contextvars import ContextVar
+from typing import Any, Optional
+
+import msgpack
+import orjson
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = frozenset({MSGPACK, "application/x-msgpack", "application/vnd.msgpack"})
+
+# Routes whose bodies are raw file bytes, never a MessagePack document
+_RAW_BODY_PREFIX = f"{settings.API_V1_STR}/uploads/"
+
+# "msgpack" while handling a request that negotiated it
+response_format: ContextVar[str] = ContextVar("response_format", default="json")
+
+
+def _media_type(value: str) -> str:
+    return value.split(";", 1)[0].strip().lower()
+
+
+def prefers_msgpack(accept: Optional[str]) -> bool:
+    """Whether the Accept header ranks MessagePack at least as high as JSON.
+
+    Wildcards don't count toward either, so ``*/*`` keeps JSON.
+    """
+    if not accept:
+        return False
+    msgpack_q = json_q = 0.0
+    for item in accept.split(","):
+        media_type, _, params = item.partition(";")
+        media_type = media_type.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in _MSGPACK_TYPES:
+            msgpack_q = max(msgpack_q, quality)
+        elif media_type == "application/json":
+            json_q = max(json_q, quality)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def is_msgpack(content_type: Optional[str]) -> bool:
+    return content_type is not None and _media_type(content_type) in _MSGPACK_TYPES
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, use_bin_type=True)
+
+
+def unpackb(data: bytes) -> Any:
+    # Integer map keys are allowed; JSON clients send the same keys as strings
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+class NegotiatedJSONResponse(JSONResponse):
+    """JSON response that renders as MessagePack when the request negotiated it."""
+
+    def __init__(self, content: Any, status_code: int = 200, headers=None, media_type: Optional[str] = None, background=None):
+        if media_type is None and response_format.get() == "msgpack":
+            media_type = MSGPACK
+        super().__init__(content, status_code=status_code, headers=headers, media_type=media_type, background=background)
+
+    def render(self, content: Any) -> bytes:
+        if self.media_type == MSGPACK:
+            return packb(content)
+        return super().render(content)
+
+
+def negotiated_response(request: Request, status_code: int, content: Any, headers=None) -> JSONResponse:
+    """Response in the format the request asked for, decided from its headers.
+
+    For exception handlers, which may run after the middleware has finished.
+    """
+    media_type = MSGPACK if prefers_msgpack(request.headers.get("accept")) else None
+    return NegotiatedJSONResponse(content, status_code=status_code, headers=headers, media_type=media_type)
+
+
+class ContentNegotiationMiddleware:
+    """ASGI middleware that applies MessagePack negotiation to every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        wants_msgpack = prefers_msgpack(headers.get("accept"))
+
+        if is_msgpack(headers.get("content-type")) and not scope["path"].startswith(_RAW_BODY_PREFIX):
+            limit = settings.MSGPACK_MAX_BODY_BYTES
+            length = headers.get("content-length")
+            body = None
+            if not (length and length.isdigit() and int(length) > limit):
+                body = await _read_body(receive, limit)
+            if body is None:
+                message = f"MessagePack body exceeds {limit} bytes"
+                await _error(413, "PayloadTooLargeException", message, wants_msgpack)(scope, receive, send)
+                return
+            try:
+                data = orjson.dumps(unpackb(body), option=orjson.OPT_NON_STR_KEYS) if body else b""
+            except (ValueError, TypeError, msgpack.ExtraData, orjson.JSONEncodeError):
+                await _error(400, "ValidationError", "Malformed MessagePack body", wants_msgpack)(scope, receive, send)
+                return
+            scope = dict(scope)
+            scope["headers"] = [
+                (name, value) for name, value in scope["headers"] if name not in (b"content-type", b"content-length")
+            ] + [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())]
+            receive = _replay(data, receive)
+
+        if not wants_msgpack:
+            await self.app(scope, receive, _vary_send(send))
+            return
+
+        token = response_format.set("msgpack")
+        try:
+            await self.app(scope, receive, _transcoding_send(send))
+        finally:
+            response_format.reset(token)
+
+
+def _error(status_code: int, error_type: str, message: str, wants_msgpack: bool) -> NegotiatedJSONResponse:
+    content = {"error": {"type": error_type, "message": message}}
+    return NegotiatedJSONResponse(content, status_code=status_code, media_type=MSGPACK if wants_msgpack else None)
+
+
+async def _read_body(receive, limit: int) -> Optional[bytes]:
+    """The request body, or None as soon as it grows past ``limit`` bytes."""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay(data: bytes, receive):
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": data, "more_body": False}
+        # After the body, wait for disconnect like the server would
+        return await receive()
+
+    return replay
+
+
+def _negotiable(headers: MutableHeaders) -> bool:
+    return "content-encoding" not in headers and _media_type(headers.get("content-type", "")) in (
+        "application/json", MSGPACK,
+    )
+
+
+def _vary_send(send):
+    """Mark API responses as varying by Accept so caches keep the formats apart."""
+
+    async def wrapped(message):
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            if _negotiable(headers):
+                headers.add_vary_header("Accept")
+        await send(message)
+
+    return wrapped
+
+
+def _transcoding_send(send):
+    """Re-encode JSON bodies that bypassed ``NegotiatedJSONResponse`` as MessagePack."""
+    start = None
+    chunks = []
+
+    async def wrapped(message):
+        nonlocal start
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            if _negotiable(headers):
+                headers.add_vary_header("Accept")
+            if "content-encoding" in headers or _media_type(headers.get("content-type", "")) != "application/json":
+                await send(message)
+                return
+            start = message
+            return
+        if start is None or message["type"] != "http.response.body":
+            await send(message)
+            return
+
+        chunks.append(message.get("body", b""))
+        if message.get("more_body", False):
+            return
+        body = b"".join(chunks)
+        if body:
+            body = packb(orjson.loads(body))
+            headers = MutableHeaders(scope=start)
+            headers["content-type"] = MSGPACK
+            headers["content-length"] = str(len(body))
+        await send(start)
+        await send({"type": "http.response.body", "body": body, "more_body": False})
+
+    return wrapped
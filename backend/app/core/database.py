@@ -10,6 +10,7 @@ from typing import Generator, AsyncGenerator
 import structlog
 
 from .config import settings
+from .tracing import get_current_span, tracer
 
 logger = structlog.get_logger()
 
@@ -53,15 +54,24 @@ def get_db() -> Generator:
 
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """Get database session for async operations."""
+    # Span covers the session's lifetime; statements are recorded as siblings
+    span = None
+    if tracer.enabled:
+        span = tracer.start_span("dependency.get_async_db", parent=get_current_span())
+    
     async with AsyncSessionLocal() as session:
         try:
             yield session
         except Exception as e:
             logger.error("Async database session error", error=str(e))
+            if span is not None:
+                span.record_exception(e)
             await session.rollback()
             raise
         finally:
             await session.close()
+            if span is not None:
+                span.end()
 
 
 async def init_db():
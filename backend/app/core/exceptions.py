@@ -3,12 +3,13 @@ Custom exceptions and exception handlers
 """
 
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import structlog
 from typing import Any, Dict
 
+from app.core.content_negotiation import negotiated_response
+
 logger = structlog.get_logger()
 
 
@@ -62,6 +63,26 @@ class UserNotFoundException(CognitioFluxException):
     pass
 
 
+class QuizNotFoundException(CognitioFluxException):
+    """Quiz not found exception."""
+    pass
+
+
+class UploadNotFoundException(CognitioFluxException):
+    """Upload or stored file not found exception."""
+    pass
+
+
+class ConflictException(CognitioFluxException):
+    """Request conflicts with the resource's current state."""
+    pass
+
+
+class PayloadTooLargeException(CognitioFluxException):
+    """Request body exceeds the allowed size."""
+    pass
+
+
 async def cognitioflux_exception_handler(request: Request, exc: CognitioFluxException):
     """Handle CognitioFlux custom exceptions."""
     logger.error(
@@ -78,10 +99,18 @@ async def cognitioflux_exception_handler(request: Request, exc: CognitioFluxExce
         status_code = 401
     elif isinstance(exc, ValidationException):
         status_code = 400
-    elif isinstance(exc, (CourseNotFoundException, LessonNotFoundException, UserNotFoundException)):
+    elif isinstance(exc, (
+        CourseNotFoundException, LessonNotFoundException, UserNotFoundException, QuizNotFoundException,
+        UploadNotFoundException,
+    )):
         status_code = 404
+    elif isinstance(exc, ConflictException):
+        status_code = 409
+    elif isinstance(exc, PayloadTooLargeException):
+        status_code = 413
     
-    return JSONResponse(
+    return negotiated_response(
+        request,
         status_code=status_code,
         content={
             "error": {
@@ -103,7 +132,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         path=request.url.path,
     )
     
-    return JSONResponse(
+    return negotiated_response(
+        request,
         status_code=exc.status_code,
         content={
             "error": {
@@ -112,6 +142,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
                 "status_code": exc.status_code,
             }
         },
+        headers=getattr(exc, "headers", None),
     )
 
 
@@ -123,7 +154,8 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         path=request.url.path,
     )
     
-    return JSONResponse(
+    return negotiated_response(
+        request,
         status_code=422,
         content={
             "error": {
@@ -145,7 +177,8 @@ async def general_exception_handler(request: Request, exc: Exception):
         exc_info=True,
     )
     
-    return JSONResponse(
+    return negotiated_response(
+        request,
         status_code=500,
         content={
             "error": {
@@ -0,0 +1,228 @@
+"""
+Adaptive admission control
+
+Requests are classified by path into route classes, each with its own
+concurrency limit. Limits adapt with AIMD: they grow additively while
+latency stays under the class target and shrink multiplicatively when it
+does not. Bulk transfers (uploads, bundle downloads, offline sync) take as
+long as the client's connection does, so their class only backs off on
+server errors. Requests over the limit are rejected immediately with 503 and
+Retry-After, before any routing, dependency or database work happens.
+"""
+
+import math
+import re
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+
+import orjson
+from prometheus_client import Counter, Gauge
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger()
+
+SHED_REQUESTS = Counter(
+    "load_shed_requests_total",
+    "Requests rejected by admission control",
+    ["route_class"],
+)
+CONCURRENCY_LIMIT = Gauge(
+    "load_shed_concurrency_limit",
+    "Current adaptive concurrency limit",
+    ["route_class"],
+    multiprocess_mode="livesum",
+)
+
+# Priority class: never shed
+CRITICAL = "critical"
+
+# Sheds are logged as one summary per interval; the counter has every one
+SHED_LOG_INTERVAL_SECONDS = 10.0
+
+
+class AIMDLimiter:
+    """Concurrency limit adapted by additive increase, multiplicative decrease.
+
+    Without a ``target_latency_ms`` only failures shrink the limit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        target_latency_ms: Optional[float],
+        backoff_ratio: float = 0.9,
+    ):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency_ms / 1000 if target_latency_ms is not None else None
+        # Shortest interval between two decreases
+        self.decrease_window = self.target_latency or 1.0
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        CONCURRENCY_LIMIT.labels(name).set(self.limit)
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float, failed: bool = False) -> None:
+        self.in_flight -= 1
+
+        slow = self.target_latency is not None and latency > self.target_latency
+        if failed or slow:
+            # Decrease at most once per target-latency window, so one burst of
+            # slow completions does not collapse the limit
+            now = time.monotonic()
+            if now - self._last_decrease >= self.decrease_window:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                CONCURRENCY_LIMIT.labels(self.name).set(self.limit)
+        elif self.in_flight + 1 >= int(self.limit):
+            # Only grow while the limit is actually being used
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            CONCURRENCY_LIMIT.labels(self.name).set(self.limit)
+
+    def retry_after(self) -> int:
+        """Suggest a client back-off proportional to the target latency."""
+        return max(1, math.ceil(self.decrease_window * 2))
+
+
+def _prefixes(*prefixes: str) -> str:
+    return "|".join(re.escape(prefix) for prefix in prefixes)
+
+
+def _route_classes() -> List[Tuple[str, Pattern[str]]]:
+    """Ordered (route_class, path pattern) table; first match wins.
+
+    Patterns are matched at the start of the path.
+    """
+    api = re.escape(settings.API_V1_STR)
+    return [
+        (CRITICAL, re.compile(_prefixes("/health", "/metrics", f"{settings.API_V1_STR}/auth/refresh"))),
+        ("auth", re.compile(f"{api}/auth")),
+        ("transfer", re.compile(f"{api}/(?:uploads/|progress/sync$|courses/[0-9]+/bundle$)")),
+        ("default", re.compile("/")),
+    ]
+
+
+class LoadSheddingMiddleware:
+    """ASGI middleware enforcing per-route-class adaptive concurrency limits.
+
+    The ``critical`` class (health checks, metrics and token refresh) is
+    never shed so monitoring and session continuity survive a brownout.
+    Transfers get their own limit so slow clients don't drag down the
+    latency feedback of ordinary API calls.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.route_classes = _route_classes()
+        self.limiters: Dict[str, AIMDLimiter] = {
+            "auth": AIMDLimiter(
+                "auth",
+                initial_limit=settings.LOAD_SHED_AUTH_INITIAL_LIMIT,
+                min_limit=settings.LOAD_SHED_MIN_LIMIT,
+                max_limit=settings.LOAD_SHED_AUTH_MAX_LIMIT,
+                target_latency_ms=settings.LOAD_SHED_AUTH_TARGET_LATENCY_MS,
+            ),
+            "transfer": AIMDLimiter(
+                "transfer",
+                initial_limit=settings.LOAD_SHED_TRANSFER_MAX_LIMIT,
+                min_limit=settings.LOAD_SHED_MIN_LIMIT,
+                max_limit=settings.LOAD_SHED_TRANSFER_MAX_LIMIT,
+                target_latency_ms=None,
+            ),
+            "default": AIMDLimiter(
+                "default",
+                initial_limit=settings.LOAD_SHED_INITIAL_LIMIT,
+                min_limit=settings.LOAD_SHED_MIN_LIMIT,
+                max_limit=settings.LOAD_SHED_MAX_LIMIT,
+                target_latency_ms=settings.LOAD_SHED_TARGET_LATENCY_MS,
+            ),
+        }
+        self._shed_since_log: Dict[str, int] = {}
+        self._last_shed_log = 0.0
+
+    def _classify(self, path: str) -> str:
+        for route_class, pattern in self.route_classes:
+            if pattern.match(path):
+                return route_class
+        return "default"
+
+    def _log_shed(self, route_class: str) -> None:
+        """Count a shed request and log the counts at most once per interval.
+
+        Logging each one would flood the logs exactly when the service is
+        overloaded.
+        """
+        self._shed_since_log[route_class] = self._shed_since_log.get(route_class, 0) + 1
+        now = time.monotonic()
+        if now - self._last_shed_log < SHED_LOG_INTERVAL_SECONDS:
+            return
+        logger.warning(
+            "Requests shed",
+            shed=self._shed_since_log,
+            limits={name: int(limiter.limit) for name, limiter in self.limiters.items()},
+        )
+        self._shed_since_log = {}
+        self._last_shed_log = now
+
+    async def _reject(self, send, route_class: str, limiter: AIMDLimiter) -> None:
+        SHED_REQUESTS.labels(route_class).inc()
+        body = orjson.dumps({
+            "error": {
+                "type": "ServiceUnavailable",
+                "message": "Server is overloaded, please retry later",
+                "status_code": 503,
+            }
+        })
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(limiter.retry_after()).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self._classify(scope["path"])
+        limiter: Optional[AIMDLimiter] = self.limiters.get(route_class)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not limiter.try_acquire():
+            self._log_shed(route_class)
+            await self._reject(send, route_class, limiter)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release(time.perf_counter() - start_time, failed=status_code >= 500)
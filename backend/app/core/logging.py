@@ -0,0 +1,155 @@
+"""
+Structured logging configuration with a non-blocking queue pipeline
+"""
+
+import logging
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Optional
+
+import orjson
+import structlog
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+
+_sample_rate: float = 1.0
+_listener: Optional["LogQueueListener"] = None
+
+
+class QueueLogger:
+    """Wrapped logger that hands processed event dicts to a queue.
+
+    Only the cheap processors run on the calling thread; rendering and I/O
+    happen on the listener thread. When the queue is full, events are dropped
+    and counted instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        self._queue = log_queue
+        self.dropped = 0
+
+    def msg(self, **event: Any) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    log = debug = info = warn = warning = error = critical = exception = fatal = msg
+
+
+class LogQueueListener:
+    """Background thread that renders queued events as JSON lines."""
+
+    _SENTINEL = object()
+
+    def __init__(self, log_queue: queue.Queue, stream: BinaryIO):
+        self._queue = log_queue
+        self._stream = stream
+        self._thread = threading.Thread(target=self._run, name="log-listener", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Drain pending events and join the listener thread."""
+        self._queue.put(self._SENTINEL)
+        self._thread.join()
+
+    def _render(self, event: Dict[str, Any]) -> bytes:
+        timestamp = event.get("timestamp")
+        if isinstance(timestamp, float):
+            event["timestamp"] = datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+        return orjson.dumps(event, default=str, option=_ORJSON_OPTIONS)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Drain whatever else is ready so a burst costs one write
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            chunks = []
+            for event in batch:
+                if event is self._SENTINEL:
+                    stop = True
+                    continue
+                try:
+                    chunks.append(self._render(event))
+                except Exception:  # pragma: no cover - never let logging kill the thread
+                    chunks.append(orjson.dumps({"event": "Log rendering failed"}, option=_ORJSON_OPTIONS))
+
+            if chunks:
+                try:
+                    self._stream.write(b"".join(chunks))
+                    self._stream.flush()
+                except Exception:  # pragma: no cover
+                    pass
+            if stop:
+                return
+
+
+def should_sample() -> bool:
+    """Decide whether a success-path log line should be emitted.
+
+    Call sites gate their own success-path logging on this so that the event
+    dict is never built for dropped lines. Warnings and errors must not be
+    gated and are always kept.
+    """
+    return _sample_rate >= 1.0 or random.random() < _sample_rate
+
+
+def configure_logging(
+    level: str = "INFO",
+    sample_rate: float = 1.0,
+    queue_size: int = 10000,
+    stream: Optional[BinaryIO] = None,
+) -> None:
+    """Configure structlog to hand events to a background queue listener.
+
+    Level filtering, context merging, timestamping and exception formatting
+    run on the calling thread; JSON rendering (orjson) and the write happen on
+    the listener thread.
+    """
+    global _listener, _sample_rate
+
+    _sample_rate = max(0.0, min(1.0, sample_rate))
+
+    if _listener is not None:
+        _listener.stop()
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _listener = LogQueueListener(log_queue, stream or sys.stdout.buffer)
+    _listener.start()
+
+    queue_logger = QueueLogger(log_queue)
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt=None),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+        ],
+        context_class=dict,
+        logger_factory=lambda *args: queue_logger,
+        wrapper_class=structlog.make_filtering_bound_logger(
+            logging.getLevelName(level.upper())
+        ),
+        cache_logger_on_first_use=True,
+    )
+
+
+def shutdown_logging() -> None:
+    """Flush queued events and stop the listener thread."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
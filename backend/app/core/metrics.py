@@ -0,0 +1,180 @@
+"""
+Prometheus metrics collection and exposition
+
+When the app runs with several worker processes, set PROMETHEUS_MULTIPROC_DIR
+to a shared, empty directory before start-up; each worker then records into
+memory-mapped files and /metrics aggregates across all live workers.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Tuple
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+import structlog
+
+from .database import async_engine
+
+logger = structlog.get_logger()
+
+# Request metrics
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "Total HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being processed",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+# Database pool metrics (sampled per worker, summed across live workers)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Configured async connection pool size", multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out", multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_IN = Gauge(
+    "db_pool_checked_in", "Idle connections held in the pool", multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections opened beyond the pool size", multiprocess_mode="livesum"
+)
+
+# Cache metrics (hit ratio = hits / (hits + misses) per cache)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result",
+    ["cache", "result"],
+)
+
+# Password hashing pool metrics
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth",
+    "bcrypt hash/verify jobs queued or running in the hashing pool",
+    multiprocess_mode="livesum",
+)
+
+# Outbox relay metrics
+OUTBOX_DELIVERIES = Counter(
+    "outbox_deliveries_total",
+    "Outbox events handled by the relay, by event type and result",
+    ["event_type", "result"],
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+# Labelled children are cached so the hot path skips label validation
+_request_children: Dict[Tuple[str, str, int], Tuple[Counter, Histogram]] = {}
+
+
+def _route_template(scope: dict) -> str:
+    """Return the templated route path (e.g. /api/v1/courses/{course_id})."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def observe_request(method: str, route: str, status_code: int, duration: float) -> None:
+    """Record a finished request."""
+    key = (method, route, status_code)
+    children = _request_children.get(key)
+    if children is None:
+        children = (
+            REQUEST_COUNT.labels(method, route, str(status_code)),
+            REQUEST_LATENCY.labels(method, route),
+        )
+        _request_children[key] = children
+    children[0].inc()
+    children[1].observe(duration)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Record a cache hit or miss."""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def sample_db_pool() -> None:
+    """Copy the async engine's pool statistics into gauges."""
+    pool = async_engine.pool
+    try:
+        DB_POOL_SIZE.set(pool.size())
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_CHECKED_IN.set(pool.checkedin())
+        DB_POOL_OVERFLOW.set(pool.overflow())
+    except AttributeError:
+        # Pools without queue semantics (e.g. NullPool) expose no stats
+        pass
+
+
+async def run_db_pool_sampler(interval_seconds: float) -> None:
+    """Periodically sample pool statistics so every worker reports its own."""
+    while True:
+        sample_db_pool()
+        await asyncio.sleep(interval_seconds)
+
+
+def metrics_response() -> Response:
+    """Render all metrics in the Prometheus text exposition format."""
+    sample_db_pool()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        data = generate_latest(registry)
+    else:
+        data = generate_latest()
+    return Response(content=data, media_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request counts and latency.
+
+    Routes are labelled by their template rather than the raw URL so label
+    cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            observe_request(
+                method, _route_template(scope), status_code, time.perf_counter() - start_time
+            )
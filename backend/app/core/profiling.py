@@ -0,0 +1,171 @@
+"""
+On-demand request profiling
+
+A request is profiled when it carries a valid signed ``X-Profile-Token``
+header, or when an admin has set a sampling rate for its path prefix. Captures
+are written as speedscope JSON (https://www.speedscope.app) into a bounded
+on-disk ring. The middleware is only installed when PROFILING_ENABLED is set.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import itertools
+import os
+import random
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from pyinstrument import Profiler
+from pyinstrument.renderers import SpeedscopeRenderer
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger()
+
+PROFILE_HEADER = "X-Profile-Token"
+_PROFILE_HEADER_KEY = PROFILE_HEADER.lower().encode("latin-1")
+
+
+def create_profile_token(ttl_seconds: int = 300) -> str:
+    """Create a signed token that enables profiling until it expires."""
+    expires = int(time.time()) + ttl_seconds
+    signature = hmac.new(
+        settings.SECRET_KEY.encode(), f"profile:{expires}".encode(), hashlib.sha256
+    ).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_token(token: str) -> bool:
+    """Check a profile token's signature and expiry."""
+    try:
+        expires_str, signature = token.split(".", 1)
+        expires = int(expires_str)
+    except ValueError:
+        return False
+
+    if expires < time.time():
+        return False
+
+    expected = hmac.new(
+        settings.SECRET_KEY.encode(), f"profile:{expires}".encode(), hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+class ProfileStore:
+    """Bounded on-disk ring of captured profiles."""
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+        self._sequence = itertools.count()
+
+    def _write(self, name: str, data: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as f:
+            f.write(data)
+
+        # Evict the oldest captures beyond the ring size
+        captures = self.list()
+        for old in captures[: max(0, len(captures) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass
+        return path
+
+    async def save(self, method: str, path: str, data: str) -> str:
+        """Write a capture without blocking the event loop."""
+        slug = path.strip("/").replace("/", "_") or "root"
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        name = f"{stamp}-{os.getpid()}-{next(self._sequence):06d}-{method}-{slug[:80]}.speedscope.json"
+        return await asyncio.to_thread(self._write, name, data)
+
+    def list(self) -> List[str]:
+        """Return capture file names, oldest first."""
+        try:
+            return sorted(n for n in os.listdir(self.directory) if n.endswith(".speedscope.json"))
+        except FileNotFoundError:
+            return []
+
+
+class ProfilingRegistry:
+    """Per-process profiling switches managed from the admin API."""
+
+    def __init__(self):
+        self.route_rates: Dict[str, float] = {}
+
+    def set_route_rate(self, path_prefix: str, sample_rate: float) -> None:
+        if sample_rate <= 0:
+            self.route_rates.pop(path_prefix, None)
+        else:
+            self.route_rates[path_prefix] = min(sample_rate, 1.0)
+
+    def clear(self) -> None:
+        self.route_rates.clear()
+
+    def should_sample(self, path: str) -> bool:
+        """Return True if the path matches a prefix and wins the sampling draw."""
+        for prefix, rate in self.route_rates.items():
+            if path.startswith(prefix):
+                return random.random() < rate
+        return False
+
+
+profiling_registry = ProfilingRegistry()
+profile_store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_FILES)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles selected requests with pyinstrument.
+
+    Profiling uses pyinstrument's async mode, so only the awaiting request's
+    task is attributed. CPU time is process CPU time over the request and may
+    include other requests interleaved on the same event loop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _requested(self, scope) -> bool:
+        for key, value in scope["headers"]:
+            if key == _PROFILE_HEADER_KEY:
+                return verify_profile_token(value.decode("latin-1"))
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (
+            self._requested(scope)
+            or (profiling_registry.route_rates and profiling_registry.should_sample(scope["path"]))
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = Profiler(interval=settings.PROFILE_INTERVAL_SECONDS, async_mode="enabled")
+        cpu_start = time.process_time()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session = profiler.stop()
+            cpu_time = time.process_time() - cpu_start
+            await self._save(scope, profiler, session.duration, cpu_time)
+
+    async def _save(self, scope, profiler: Profiler, wall_time: float, cpu_time: float) -> None:
+        try:
+            data = profiler.output(renderer=SpeedscopeRenderer())
+            path = await profile_store.save(scope["method"], scope["path"], data)
+            logger.info(
+                "Request profile captured",
+                method=scope["method"],
+                path=scope["path"],
+                wall_ms=round(wall_time * 1000, 2),
+                cpu_ms=round(cpu_time * 1000, 2),
+                file=path,
+            )
+        except Exception as e:
+            logger.error("Failed to save request profile", path=scope["path"], error=str(e))
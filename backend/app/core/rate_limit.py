@@ -0,0 +1,247 @@
+"""
+Token-bucket rate limiting with an in-process fast path and a Redis shared mode
+
+Every limiter consults a per-process bucket first. Because a worker only sees
+a subset of the global traffic for a key, a local rejection implies the
+shared bucket is exhausted too, so floods are turned away without a Redis
+round trip. Allowed requests are then checked against the shared bucket in
+Redis, updated atomically by a Lua script.
+"""
+
+import ipaddress
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+
+from fastapi import Depends, HTTPException, Request, status
+import structlog
+
+from .config import settings
+from .security import get_current_user_id
+
+logger = structlog.get_logger()
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """Token bucket holding ``capacity`` tokens, refilled at ``refill_per_second``."""
+    name: str
+    capacity: int
+    refill_per_second: float
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of consuming from a bucket."""
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+class MemoryRateLimitBackend:
+    """In-process token buckets; the local fast path and the test fake.
+
+    Beyond ``max_keys`` the least recently updated buckets are dropped, so
+    rotating through many keys only forgets the idlest ones and never
+    resets the limits of active clients.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # Ordered by last update, oldest first
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def consume_now(self, key: str, rule: RateLimitRule, cost: int = 1) -> RateLimitResult:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(rule.capacity), now))
+        tokens = min(rule.capacity, tokens + (now - updated) * rule.refill_per_second)
+
+        if tokens >= cost:
+            tokens -= cost
+            allowed = True
+            retry_after = 0.0
+        else:
+            allowed = False
+            retry_after = (cost - tokens) / rule.refill_per_second
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return RateLimitResult(allowed, int(tokens), retry_after)
+
+    async def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> RateLimitResult:
+        return self.consume_now(key, rule, cost)
+
+    def reset(self) -> None:
+        self._buckets.clear()
+
+
+# KEYS[1] bucket key; ARGV: capacity, refill per second, cost, now (ms)
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) / 1000 * refill)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / refill
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / refill * 1000) + 1000)
+return {allowed, math.floor(tokens), tostring(retry_after)}
+"""
+
+
+class RedisRateLimitBackend:
+    """Shared token buckets in Redis, updated atomically by a Lua script."""
+
+    def __init__(self, redis, prefix: str = "ratelimit"):
+        self.redis = redis
+        self.prefix = prefix
+        self._script = redis.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> RateLimitResult:
+        # Redis server time keeps buckets consistent across hosts with clock skew
+        seconds, microseconds = await self.redis.time()
+        now_ms = seconds * 1000 + microseconds // 1000
+        allowed, remaining, retry_after = await self._script(
+            keys=[f"{self.prefix}:{rule.name}:{key}"],
+            args=[rule.capacity, rule.refill_per_second, cost, now_ms],
+        )
+        return RateLimitResult(bool(allowed), int(remaining), float(retry_after))
+
+
+class RateLimiter:
+    """Checks the local bucket first, then the shared backend if configured."""
+
+    def __init__(self, shared=None, local: Optional[MemoryRateLimitBackend] = None):
+        self.shared = shared
+        self.local = local or MemoryRateLimitBackend()
+
+    async def hit(self, key: str, rule: RateLimitRule, cost: int = 1) -> RateLimitResult:
+        result = self.local.consume_now(key, rule, cost)
+        if not result.allowed or self.shared is None:
+            return result
+
+        try:
+            return await self.shared.consume(key, rule, cost)
+        except Exception as e:
+            # Fail open to the local decision rather than rejecting everyone
+            logger.warning("Shared rate limiter unavailable", rule=rule.name, error=str(e))
+            return result
+
+
+def _build_rate_limiter() -> RateLimiter:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        import redis.asyncio as aioredis
+
+        return RateLimiter(shared=RedisRateLimitBackend(aioredis.from_url(settings.REDIS_URL)))
+    return RateLimiter()
+
+
+rate_limiter = _build_rate_limiter()
+
+# Rules
+LOGIN_IP_RULE = RateLimitRule(
+    "login_ip", settings.RATE_LIMIT_LOGIN_IP_BURST, settings.RATE_LIMIT_LOGIN_IP_PER_MINUTE / 60
+)
+LOGIN_ACCOUNT_RULE = RateLimitRule(
+    "login_account",
+    settings.RATE_LIMIT_LOGIN_ACCOUNT_BURST,
+    settings.RATE_LIMIT_LOGIN_ACCOUNT_PER_MINUTE / 60,
+)
+API_SUBJECT_RULE = RateLimitRule(
+    "api_subject", settings.RATE_LIMIT_API_BURST, settings.RATE_LIMIT_API_PER_MINUTE / 60
+)
+
+
+async def enforce_rate_limit(rule: RateLimitRule, key: str) -> None:
+    """Consume one token for ``key`` or raise 429 with Retry-After."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    result = await rate_limiter.hit(key, rule)
+    if not result.allowed:
+        logger.warning("Rate limit exceeded", rule=rule.name, key=key)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(max(1, int(result.retry_after + 0.999)))},
+        )
+
+
+@lru_cache(maxsize=4)
+def _trusted_networks(proxies: Tuple[str, ...]) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    return [ipaddress.ip_network(proxy, strict=False) for proxy in proxies]
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_networks(tuple(settings.TRUSTED_PROXIES)))
+
+
+def client_ip(request: Request) -> str:
+    """Return the client address used for IP-keyed limits.
+
+    Behind a proxy in ``TRUSTED_PROXIES`` the client is taken from
+    X-Forwarded-For, walking it from the right past trusted hops; the first
+    untrusted address is the client. Entries left of it are client-supplied
+    and ignored, so a spoofed header can't pick another bucket.
+    """
+    host = request.client.host if request.client else None
+    if host is None:
+        return "unknown"
+    if not _is_trusted_proxy(host):
+        return host
+    forwarded = ",".join(request.headers.getlist("x-forwarded-for"))
+    for hop in reversed([hop.strip() for hop in forwarded.split(",") if hop.strip()]):
+        host = hop
+        if not _is_trusted_proxy(hop):
+            break
+    return host
+
+
+async def limit_login_by_ip(request: Request) -> None:
+    """Dependency limiting login attempts per client IP."""
+    await enforce_rate_limit(LOGIN_IP_RULE, f"ip:{client_ip(request)}")
+
+
+async def limit_login_by_account(email: str) -> None:
+    """Limit login attempts per account, before any lookup or hashing."""
+    await enforce_rate_limit(LOGIN_ACCOUNT_RULE, f"account:{email.strip().lower()}")
+
+
+class RateLimit:
+    """Dependency limiting authenticated requests per token subject."""
+
+    def __init__(self, rule: RateLimitRule = API_SUBJECT_RULE):
+        self.rule = rule
+
+    async def __call__(self, current_user_id: str = Depends(get_current_user_id)) -> str:
+        await enforce_rate_limit(self.rule, f"sub:{current_user_id}")
+        return current_user_id
+
+
+limit_by_subject = RateLimit()
@@ -2,21 +2,35 @@
 Security utilities for authentication and authorization
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Any
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import structlog
 
 from .config import settings
+from .database import get_async_db
+from .logging import should_sample
+from .metrics import PASSWORD_HASH_QUEUE_DEPTH
+from .tracing import start_span
+from app.models.user import User
 
 logger = structlog.get_logger()
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt runs in a dedicated pool so hashing never blocks the event loop
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
 # JWT token scheme
 security = HTTPBearer()
 
@@ -31,6 +45,26 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_in_password_pool(func, *args):
+    """Run a hashing function in the password pool, tracking queue depth."""
+    PASSWORD_HASH_QUEUE_DEPTH.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        PASSWORD_HASH_QUEUE_DEPTH.dec()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop."""
+    return await _run_in_password_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate password hash without blocking the event loop."""
+    return await _run_in_password_pool(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
     to_encode = data.copy()
@@ -43,7 +77,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     
-    logger.info("Access token created", user_id=data.get("sub"), expires=expire)
+    if should_sample():
+        logger.info("Access token created", user_id=data.get("sub"), expires=expire)
     return encoded_jwt
 
 
@@ -72,20 +107,21 @@ async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depend
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = verify_token(credentials.credentials)
-        if payload is None:
-            raise credentials_exception
+    with start_span("dependency.get_current_user_id"):
+        try:
+            payload = verify_token(credentials.credentials)
+            if payload is None:
+                raise credentials_exception
+                
+            user_id: str = payload.get("sub")
+            if user_id is None:
+                raise credentials_exception
+                
+            return user_id
             
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        except Exception as e:
+            logger.error("Authentication error", error=str(e))
             raise credentials_exception
-            
-        return user_id
-        
-    except Exception as e:
-        logger.error("Authentication error", error=str(e))
-        raise credentials_exception
 
 
 def create_refresh_token(data: dict) -> str:
@@ -95,7 +131,8 @@ def create_refresh_token(data: dict) -> str:
     to_encode.update({"exp": expire, "type": "refresh"})
     
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    logger.info("Refresh token created", user_id=data.get("sub"), expires=expire)
+    if should_sample():
+        logger.info("Refresh token created", user_id=data.get("sub"), expires=expire)
     return encoded_jwt
 
 
@@ -128,14 +165,24 @@ class RoleChecker:
         self.required_roles = required_roles or []
         self.required_permissions = required_permissions or []
     
-    def __call__(self, current_user_id: str = Depends(get_current_user_id)):
-        # This would typically fetch user from database and check roles/permissions
-        # For now, we'll implement basic role checking structure
-        
-        # TODO: Implement actual role/permission checking with database
-        # user = get_user_from_db(current_user_id)
-        # if not has_required_roles(user, self.required_roles):
-        #     raise HTTPException(status_code=403, detail="Insufficient permissions")
+    async def __call__(
+        self,
+        current_user_id: str = Depends(get_current_user_id),
+        db: AsyncSession = Depends(get_async_db),
+    ) -> str:
+        forbidden = HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+        try:
+            user_id = int(current_user_id)
+        except ValueError:
+            raise forbidden
+
+        result = await db.execute(select(User.role, User.is_active).where(User.id == user_id))
+        user = result.one_or_none()
+        if user is None or not user.is_active:
+            raise forbidden
+        if self.required_roles and user.role.value not in self.required_roles:
+            logger.warning("Role check failed", user_id=user_id, role=user.role.value, required=self.required_roles)
+            raise forbidden
         
         return current_user_id
 
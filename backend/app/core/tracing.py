@@ -0,0 +1,489 @@
+"""
+Lightweight request tracing with tail-based sampling
+
+Spans are buffered per trace until the local root span ends. The whole trace
+is then kept if any span errored, if the root took longer than
+TRACE_SLOW_THRESHOLD_MS, or with probability TRACE_SAMPLE_RATE, and kept
+traces are exported in the OTLP/JSON encoding.
+"""
+
+import functools
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+import orjson
+import structlog
+
+from .config import settings
+
+logger = structlog.get_logger()
+
+
+class SpanKind:
+    """OTLP span kinds."""
+    INTERNAL = 1
+    SERVER = 2
+    CLIENT = 3
+
+
+class StatusCode:
+    """OTLP status codes."""
+    UNSET = 0
+    OK = 1
+    ERROR = 2
+
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_REQUEST_ID_KEY = REQUEST_ID_HEADER.lower().encode("latin-1")
+_TRACEPARENT_KEY = b"traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+MAX_SPANS_PER_TRACE = 512
+MAX_STATEMENT_LENGTH = 1000
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = (
+        "tracer", "trace_id", "span_id", "parent_span_id", "name", "kind",
+        "attributes", "start_time_ns", "end_time_ns", "status_code",
+        "status_message", "root",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_span_id: Optional[str],
+        kind: int,
+        attributes: Optional[Dict[str, Any]],
+        root: Optional["Span"],
+    ):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns: Optional[int] = None
+        self.status_code = StatusCode.UNSET
+        self.status_message: Optional[str] = None
+        # The local root this span's trace is buffered under (itself for a root)
+        self.root = root or self
+
+    @property
+    def is_local_root(self) -> bool:
+        return self.root is self
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_time_ns or time.time_ns()
+        return (end - self.start_time_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: Optional[str] = None) -> None:
+        self.status_code = StatusCode.ERROR
+        self.status_message = message
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.attributes["exception.type"] = type(exc).__name__
+        self.attributes["exception.message"] = str(exc)
+        # Expected client errors (a 401 for a missing token, a 404) aren't
+        # failures, and would otherwise keep every such trace
+        if getattr(exc, "status_code", 500) < 500:
+            return
+        self.set_error(str(exc))
+
+    def end(self) -> None:
+        if self.end_time_ns is None:
+            self.end_time_ns = time.time_ns()
+            self.tracer._on_end(self)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    data = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_time_ns),
+        "endTimeUnixNano": str(span.end_time_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()
+        ],
+        "status": {"code": span.status_code},
+    }
+    if span.parent_span_id:
+        data["parentSpanId"] = span.parent_span_id
+    if span.status_message:
+        data["status"]["message"] = span.status_message
+    return data
+
+
+def to_otlp_json(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """Encode spans as an OTLP/JSON ExportTraceServiceRequest."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": service_name}},
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [_otlp_span(span) for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class SpanExporter:
+    """Base exporter; receives each kept trace as a list of finished spans."""
+
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class NoopSpanExporter(SpanExporter):
+    """Exporter that discards everything."""
+
+    def export(self, spans: List[Span]) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Exporter that keeps OTLP payloads in memory, for tests and debugging."""
+
+    def __init__(self, service_name: str = "test"):
+        self.service_name = service_name
+        self.payloads: List[Dict[str, Any]] = []
+
+    def export(self, spans: List[Span]) -> None:
+        self.payloads.append(to_otlp_json(spans, self.service_name))
+
+    @property
+    def spans(self) -> List[Dict[str, Any]]:
+        return [
+            span
+            for payload in self.payloads
+            for resource in payload["resourceSpans"]
+            for scope in resource["scopeSpans"]
+            for span in scope["spans"]
+        ]
+
+    def clear(self) -> None:
+        self.payloads.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """Exporter appending one OTLP/JSON payload per line from a background thread.
+
+    Each line can be replayed to an OTLP/HTTP collector's /v1/traces endpoint.
+    """
+
+    _SENTINEL = object()
+
+    def __init__(self, path: str, service_name: str, max_queue: int = 1000):
+        self.path = path
+        self.service_name = service_name
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(to_otlp_json(spans, self.service_name))
+        except queue.Full:
+            logger.warning("Span export queue full, dropping trace", trace_id=spans[0].trace_id)
+
+    def _run(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "ab") as f:
+            while True:
+                payload = self._queue.get()
+                if payload is self._SENTINEL:
+                    return
+                f.write(orjson.dumps(payload, default=str, option=orjson.OPT_APPEND_NEWLINE))
+                f.flush()
+
+    def shutdown(self) -> None:
+        self._queue.put(self._SENTINEL)
+        self._thread.join()
+
+
+class Tracer:
+    """Creates spans and applies tail-based sampling per trace."""
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        sample_rate: float = 0.0,
+        slow_threshold_ms: float = 500.0,
+        enabled: bool = True,
+    ):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+        self.enabled = enabled
+        self._traces: Dict[str, List[Span]] = {}  # Local root span ID -> finished spans
+
+    def start_span(
+        self,
+        name: str,
+        kind: int = SpanKind.INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[Span] = None,
+        trace_id: Optional[str] = None,
+        parent_span_id: Optional[str] = None,
+    ) -> Span:
+        """Start a span under ``parent`` or, without one, a new local root."""
+        if parent is not None:
+            return Span(self, name, parent.trace_id, parent.span_id, kind, attributes, parent.root)
+
+        span = Span(
+            self, name, trace_id or os.urandom(16).hex(), parent_span_id, kind, attributes, None
+        )
+        # Keyed by the root span: requests continuing one upstream trace
+        # share a trace ID but are buffered and sampled separately
+        self._traces[span.span_id] = []
+        return span
+
+    def _keep(self, root: Span, spans: List[Span]) -> bool:
+        if root.duration_ms >= self.slow_threshold_ms:
+            return True
+        if any(span.status_code == StatusCode.ERROR for span in spans):
+            return True
+        return random.random() < self.sample_rate
+
+    def _on_end(self, span: Span) -> None:
+        spans = self._traces.get(span.root.span_id)
+        if spans is None:
+            # Trace already finished (e.g. a span outliving its request)
+            return
+
+        if len(spans) < MAX_SPANS_PER_TRACE:
+            spans.append(span)
+
+        if span.is_local_root:
+            del self._traces[span.span_id]
+            if self._keep(span, spans):
+                try:
+                    self.exporter.export(spans)
+                except Exception as e:
+                    logger.error("Span export failed", error=str(e))
+
+    def shutdown(self) -> None:
+        self.exporter.shutdown()
+        self.exporter = NoopSpanExporter()
+
+
+def _build_exporter() -> SpanExporter:
+    if settings.TRACE_EXPORTER == "file":
+        return FileSpanExporter(settings.TRACE_EXPORT_PATH, settings.APP_NAME)
+    if settings.TRACE_EXPORTER == "memory":
+        return InMemorySpanExporter(settings.APP_NAME)
+    return NoopSpanExporter()
+
+
+# Exports nothing until start_tracing(), so importing the app (scripts,
+# benchmarks, render pool workers) starts no thread and creates no files
+tracer = Tracer(
+    exporter=NoopSpanExporter(),
+    sample_rate=settings.TRACE_SAMPLE_RATE,
+    slow_threshold_ms=settings.TRACE_SLOW_THRESHOLD_MS,
+    enabled=settings.TRACING_ENABLED,
+)
+
+
+def start_tracing() -> None:
+    """Attach the configured exporter to the tracer; called at app startup."""
+    if settings.TRACING_ENABLED:
+        tracer.exporter = _build_exporter()
+
+
+def get_current_span() -> Optional[Span]:
+    """Return the active span, if any."""
+    return _current_span.get()
+
+
+@contextmanager
+def start_span(name: str, kind: int = SpanKind.INTERNAL, **attributes: Any):
+    """Run a block inside a child of the active span (or a new trace)."""
+    if not tracer.enabled:
+        yield None
+        return
+
+    span = tracer.start_span(name, kind, attributes, parent=_current_span.get())
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def traced(name: str, kind: int = SpanKind.INTERNAL):
+    """Decorate an async function so each call runs in its own span."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with start_span(name, kind):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_sqlalchemy(engine) -> None:
+    """Record a client span for every SQL statement executed on ``engine``."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is None or not tracer.enabled:
+            return
+        context._trace_span = tracer.start_span(
+            "db.query",
+            SpanKind.CLIENT,
+            {
+                "db.system": sync_engine.dialect.name,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+                "db.executemany": executemany,
+            },
+            parent=parent,
+        )
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            span.end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        context = exception_context.execution_context
+        span = getattr(context, "_trace_span", None) if context is not None else None
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.end()
+
+
+def _parse_traceparent(value: str):
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if match is None:
+        return None, None
+    return match.group(1), match.group(2)
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span and binding the request ID.
+
+    An incoming W3C ``traceparent`` header continues the caller's trace. The
+    request ID (from ``X-Request-ID`` or generated) is bound into structlog's
+    contextvars so every log line in the request carries it, and echoed on
+    the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        trace_id = parent_span_id = None
+        for key, value in scope["headers"]:
+            if key == _REQUEST_ID_KEY:
+                request_id = value.decode("latin-1")[:128]
+            elif key == _TRACEPARENT_KEY:
+                trace_id, parent_span_id = _parse_traceparent(value.decode("latin-1"))
+        request_id = request_id or uuid.uuid4().hex
+
+        span = None
+        token = None
+        if tracer.enabled:
+            span = tracer.start_span(
+                f"{scope['method']} {scope['path']}",
+                SpanKind.SERVER,
+                {
+                    "http.method": scope["method"],
+                    "http.target": scope["path"],
+                    "request.id": request_id,
+                },
+                trace_id=trace_id,
+                parent_span_id=parent_span_id,
+            )
+            token = _current_span.set(span)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((_REQUEST_ID_KEY, request_id.encode("latin-1")))
+                message["headers"] = headers
+                if span is not None:
+                    status_code = message["status"]
+                    span.set_attribute("http.status_code", status_code)
+                    if status_code >= 500:
+                        span.set_error(f"HTTP {status_code}")
+            await send(message)
+
+        with structlog.contextvars.bound_contextvars(
+            request_id=request_id, trace_id=span.trace_id if span is not None else None
+        ):
+            try:
+                await self.app(scope, receive, send_wrapper)
+            except BaseException as e:
+                if span is not None:
+                    span.record_exception(e)
+                raise
+            finally:
+                if span is not None:
+                    route = scope.get("route")
+                    route_path = getattr(route, "path", None)
+                    if route_path:
+                        span.name = f"{scope['method']} {route_path}"
+                        span.set_attribute("http.route", route_path)
+                    _current_span.reset(token)
+                    span.end()
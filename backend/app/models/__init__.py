@@ -3,19 +3,33 @@ Database models package
 """
 
 from .user import User
-from .course import Course
-from .lesson import Lesson
+from .course import Course, CourseBundle
+from .lesson import Lesson, LessonArtifact
 from .quiz import Quiz, QuizQuestion, QuizAnswer
-from .progress import UserProgress, LessonProgress, QuizAttempt
+from .progress import UserProgress, LessonProgress, QuizAttempt, UserConceptState
+from .outbox import OutboxEvent, ConsumedEvent
+from .upload import StoredFile, UploadSession
+from .stats import CourseStatsRollup, LessonStatsRollup, UserStatsRollup, QuestionStatsRollup
 
 __all__ = [
     "User",
     "Course", 
+    "CourseBundle",
     "Lesson",
+    "LessonArtifact",
     "Quiz",
     "QuizQuestion",
     "QuizAnswer",
     "UserProgress",
     "LessonProgress", 
     "QuizAttempt",
+    "UserConceptState",
+    "OutboxEvent",
+    "ConsumedEvent",
+    "CourseStatsRollup",
+    "LessonStatsRollup",
+    "UserStatsRollup",
+    "QuestionStatsRollup",
+    "StoredFile",
+    "UploadSession",
 ] 
\ No newline at end of file
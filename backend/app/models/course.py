@@ -2,7 +2,7 @@
 Course model for organizing lessons
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, Float, ForeignKey, LargeBinary
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -78,4 +78,31 @@ class Course(Base):
         if self.total_lessons == 0:
             return 0.0
         published_lessons = sum(1 for lesson in self.lessons if lesson.is_published)
-        return (published_lessons / self.total_lessons) * 100 
\ No newline at end of file
+        return (published_lessons / self.total_lessons) * 100
+
+
+class CourseBundle(Base):
+    """A built offline bundle of a course at one content version.
+
+    Recent versions are kept so clients holding one can be sent a delta.
+    """
+    
+    __tablename__ = "course_bundles"
+    
+    # Primary key
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(String(32), primary_key=True)  # Digest of everything in the bundle
+    
+    # What the bundle contains: lesson id -> [content hash, entry digest], quiz id -> version
+    manifest = Column(JSON, nullable=False)
+    
+    # Representations of the JSON document
+    size_bytes = Column(Integer, nullable=False)  # Uncompressed
+    gzip = Column(LargeBinary, nullable=False)
+    brotli = Column(LargeBinary, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<CourseBundle(course_id={self.course_id}, version={self.version}, size={self.size_bytes})>"
@@ -2,7 +2,7 @@
 Lesson model for micro-lessons
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey, LargeBinary
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -46,6 +46,9 @@ class Lesson(Base):
     is_published = Column(Boolean, default=False, nullable=False)
     is_preview = Column(Boolean, default=False, nullable=False)  # Can be viewed without enrollment
     
+    # Rendered artifact of the published content (see LessonArtifact)
+    content_hash = Column(String(64), ForeignKey("lesson_artifacts.content_hash"), nullable=True)
+    
     # SEO
     slug = Column(String(255), index=True, nullable=False)
     
@@ -83,4 +86,28 @@ class Lesson(Base):
     @property
     def has_quiz(self) -> bool:
         """Check if lesson has an associated quiz."""
-        return self.quiz is not None and len(self.quiz.questions) > 0 
\ No newline at end of file
+        return self.quiz is not None and len(self.quiz.questions) > 0
+
+
+class LessonArtifact(Base):
+    """Rendered lesson HTML with precompressed variants.
+
+    Keyed by a hash of the rendering inputs, so lessons with identical
+    content share one artifact and an artifact never changes once written.
+    """
+    
+    __tablename__ = "lesson_artifacts"
+    
+    # Primary key: SHA-256 of renderer version, content and sources
+    content_hash = Column(String(64), primary_key=True)
+    
+    # Representations
+    html = Column(LargeBinary, nullable=False)  # UTF-8 HTML fragment
+    gzip = Column(LargeBinary, nullable=False)
+    brotli = Column(LargeBinary, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<LessonArtifact(content_hash={self.content_hash}, size={len(self.html or b'')})>"
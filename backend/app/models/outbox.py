@@ -0,0 +1,63 @@
+"""
+Transactional outbox models for deferred event processing
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class OutboxEvent(Base):
+    """Domain event written in the same transaction as the change it describes."""
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # The relay only ever scans undelivered events
+        Index(
+            "ix_outbox_events_pending",
+            "available_at",
+            postgresql_where="processed_at IS NULL AND failed_at IS NULL",
+        ),
+    )
+
+    # Primary key
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Event information
+    event_type = Column(String(100), nullable=False, index=True)  # e.g. lesson.completed
+    aggregate_type = Column(String(50), nullable=False)  # lesson, course, user
+    aggregate_id = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=False)
+
+    # Delivery state
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Retry backoff
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    failed_at = Column(DateTime(timezone=True), nullable=True)  # Gave up after max attempts
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, event_type='{self.event_type}')>"
+
+
+class ConsumedEvent(Base):
+    """Marker recording that a consumer has handled an event.
+
+    Written in the consumer's transaction so redelivered events are skipped.
+    """
+
+    __tablename__ = "outbox_consumed_events"
+
+    # Composite primary key
+    event_id = Column(Integer, ForeignKey("outbox_events.id", ondelete="CASCADE"), primary_key=True)
+    consumer = Column(String(100), primary_key=True)
+
+    # Timestamps
+    consumed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<ConsumedEvent(event_id={self.event_id}, consumer='{self.consumer}')>"
@@ -2,7 +2,7 @@
 Progress tracking models for learning analytics and spaced repetition
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, ForeignKey, Float, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, ForeignKey, Float, Text, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -14,6 +14,10 @@ class UserProgress(Base):
     """User progress tracking for courses."""
     
     __tablename__ = "user_progress"
+    __table_args__ = (
+        # One row per learner and course; target of sync upserts
+        UniqueConstraint("user_id", "course_id", name="uq_user_progress_user_course"),
+    )
     
     # Primary keys
     id = Column(Integer, primary_key=True, index=True)
@@ -37,6 +41,7 @@ class UserProgress(Base):
     is_enrolled = Column(Boolean, default=True, nullable=False)
     is_completed = Column(Boolean, default=False, nullable=False)
     is_favorited = Column(Boolean, default=False, nullable=False)
+    rating = Column(Integer, nullable=True)  # 1-5 stars, set by the learner
     
     # Spaced repetition
     concepts_to_review = Column(JSON, nullable=True)  # Concepts that need review
@@ -47,6 +52,7 @@ class UserProgress(Base):
     enrolled_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    client_updated_at = Column(DateTime(timezone=True), nullable=True)  # Last offline-sync write (last-writer-wins)
     
     # Relationships
     user = relationship("User", back_populates="progress")
@@ -60,6 +66,12 @@ class LessonProgress(Base):
     """Individual lesson progress tracking."""
     
     __tablename__ = "lesson_progress"
+    __table_args__ = (
+        # One row per learner and lesson; target of telemetry upserts
+        UniqueConstraint("user_id", "lesson_id", name="uq_lesson_progress_user_lesson"),
+        # Backs the per-user "due now" review queue
+        Index("ix_lesson_progress_user_next_review", "user_id", "next_review_date"),
+    )
     
     # Primary keys
     id = Column(Integer, primary_key=True, index=True)
@@ -88,10 +100,14 @@ class LessonProgress(Base):
     mastery_level = Column(Float, default=0.0, nullable=False)  # 0.0 to 1.0
     next_review_date = Column(DateTime(timezone=True), nullable=True)
     review_count = Column(Integer, default=0, nullable=False)
+    ease_factor = Column(Float, default=2.5, nullable=False)  # SM-2 ease, >= 1.3
+    interval_days = Column(Float, default=0.0, nullable=False)  # Current review interval
+    repetitions = Column(Integer, default=0, nullable=False)  # Consecutive successful reviews
     
     # Timestamps
     first_accessed = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     last_accessed = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    client_updated_at = Column(DateTime(timezone=True), nullable=True)  # Last offline-sync write (last-writer-wins)
     
     # Relationships
     user = relationship("User", back_populates="lesson_progress")
@@ -105,6 +121,10 @@ class QuizAttempt(Base):
     """Quiz attempt tracking and results."""
     
     __tablename__ = "quiz_attempts"
+    __table_args__ = (
+        # Concurrent submissions cannot share an attempt number, which keeps max_attempts exact
+        UniqueConstraint("user_id", "quiz_id", "attempt_number", name="uq_quiz_attempts_user_quiz_number"),
+    )
     
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
@@ -127,6 +147,7 @@ class QuizAttempt(Base):
     # Results
     is_passed = Column(Boolean, nullable=False)
     answers = Column(JSON, nullable=False)  # User's answers for each question
+    question_order = Column(JSON, nullable=True)  # Question ids as presented, when randomized
     
     # Analytics
     questions_correct = Column(Integer, nullable=False)
@@ -150,4 +171,21 @@ class QuizAttempt(Base):
     @property
     def percentage_score(self) -> float:
         """Get score as percentage."""
-        return self.score * 100 
\ No newline at end of file
+        return self.score * 100 
+
+class UserConceptState(Base):
+    """Knowledge-tracing state per learner, one row holding every concept."""
+    
+    __tablename__ = "user_concept_states"
+    
+    # Primary key
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    
+    # Concept tag -> [probability mastered, observations]
+    concepts = Column(JSON, nullable=False, default=dict)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<UserConceptState(user_id={self.user_id}, concepts={len(self.concepts or {})})>"
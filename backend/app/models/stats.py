@@ -0,0 +1,109 @@
+"""
+Precomputed analytics rollups maintained from outbox events
+"""
+
+from sqlalchemy import Column, Integer, Date, DateTime, Float, ForeignKey, LargeBinary
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class CourseStatsRollup(Base):
+    """Running per-course aggregates; one row per course."""
+    
+    __tablename__ = "course_stats"
+    
+    # Primary key
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+    
+    # Counters
+    enrollments = Column(Integer, default=0, nullable=False)  # Currently enrolled learners
+    completions = Column(Integer, default=0, nullable=False)  # Learners who completed the course
+    lesson_completions = Column(Integer, default=0, nullable=False)  # Sum over all lessons
+    rating_sum = Column(Integer, default=0, nullable=False)
+    rating_count = Column(Integer, default=0, nullable=False)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<CourseStatsRollup(course_id={self.course_id}, enrollments={self.enrollments})>"
+
+
+class LessonStatsRollup(Base):
+    """Running per-lesson completion counts."""
+    
+    __tablename__ = "lesson_stats"
+    
+    # Primary key
+    lesson_id = Column(Integer, ForeignKey("lessons.id", ondelete="CASCADE"), primary_key=True)
+    
+    # Foreign key
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Counters
+    completions = Column(Integer, default=0, nullable=False)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<LessonStatsRollup(lesson_id={self.lesson_id}, completions={self.completions})>"
+
+
+class UserStatsRollup(Base):
+    """Running per-user learning aggregates; one row per user."""
+    
+    __tablename__ = "user_stats"
+    
+    # Primary key
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    
+    # Counters
+    courses_enrolled = Column(Integer, default=0, nullable=False)
+    courses_completed = Column(Integer, default=0, nullable=False)
+    lessons_completed = Column(Integer, default=0, nullable=False)
+    time_spent_minutes = Column(Integer, default=0, nullable=False)
+    longest_streak_days = Column(Integer, default=0, nullable=False)
+    
+    # Daily activity: bit i set means active on activity_anchor_date minus i days (UTC)
+    activity_bitmap = Column(LargeBinary, default=b"", nullable=False)
+    activity_anchor_date = Column(Date, nullable=True)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<UserStatsRollup(user_id={self.user_id}, lessons_completed={self.lessons_completed})>"
+
+
+class QuestionStatsRollup(Base):
+    """Running item-analysis sums per quiz question.
+
+    Difficulty (p-value), discrimination (point-biserial correlation with
+    the attempt score) and average answer time are derived from these sums.
+    """
+    
+    __tablename__ = "question_stats"
+    
+    # Primary key
+    question_id = Column(Integer, ForeignKey("quiz_questions.id", ondelete="CASCADE"), primary_key=True)
+    
+    # Foreign key
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Sums over answered attempts; x is 1 when correct, y is the attempt score
+    responses = Column(Integer, default=0, nullable=False)
+    correct = Column(Integer, default=0, nullable=False)  # Sum of x
+    score_sum = Column(Float, default=0.0, nullable=False)  # Sum of y
+    score_sq_sum = Column(Float, default=0.0, nullable=False)  # Sum of y^2
+    correct_score_sum = Column(Float, default=0.0, nullable=False)  # Sum of x*y
+    time_sum_seconds = Column(Float, default=0.0, nullable=False)
+    timed_responses = Column(Integer, default=0, nullable=False)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<QuestionStatsRollup(question_id={self.question_id}, responses={self.responses})>"
@@ -0,0 +1,63 @@
+"""
+Upload models for content-addressed file storage
+"""
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Enum
+from sqlalchemy.sql import func
+import enum
+
+from app.core.database import Base
+
+
+class UploadKind(str, enum.Enum):
+    """What an uploaded file is for; decides allowed types and sizes."""
+    AVATAR = "avatar"
+    THUMBNAIL = "thumbnail"
+    LESSON_MEDIA = "lesson_media"
+
+
+class StoredFile(Base):
+    """A file in the content-addressed store, one row per distinct content."""
+    
+    __tablename__ = "stored_files"
+    
+    # Primary key: SHA-256 of the file, which is also its path in the store
+    sha256 = Column(String(64), primary_key=True)
+    
+    # File information
+    size_bytes = Column(BigInteger, nullable=False)
+    content_type = Column(String(100), nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<StoredFile(sha256={self.sha256}, size={self.size_bytes}, type={self.content_type})>"
+
+
+class UploadSession(Base):
+    """A resumable upload in progress.
+
+    Bytes received so far live in a partial file; its length is the
+    authoritative offset, so appending a chunk doesn't touch this row.
+    """
+    
+    __tablename__ = "upload_sessions"
+    
+    # Primary key
+    id = Column(String(32), primary_key=True)  # Random hex token
+    
+    # Foreign key
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Declared upload
+    kind = Column(Enum(UploadKind), nullable=False)
+    content_type = Column(String(100), nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<UploadSession(id={self.id}, user_id={self.user_id}, kind={self.kind}, size={self.size_bytes})>"
@@ -47,6 +47,13 @@ from .progress import (
     SpacedRepetitionSchedule,
 )
 
+from .admin import (
+    ProfilingRule,
+    ProfilingStatus,
+    ProfileTokenRequest,
+    ProfileTokenResponse,
+)
+
 __all__ = [
     # User schemas
     "UserCreate",
@@ -87,4 +94,10 @@ __all__ = [
     "LessonProgressResponse",
     "LearningAnalytics",
     "SpacedRepetitionSchedule",
+    
+    # Admin schemas
+    "ProfilingRule",
+    "ProfilingStatus",
+    "ProfileTokenRequest",
+    "ProfileTokenResponse",
 ] 
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Admin-related Pydantic schemas
+"""
+
+from typing import Dict, List
+from datetime import datetime
+from pydantic import BaseModel, validator
+
+
+class ProfilingRule(BaseModel):
+    """Schema for enabling sampled profiling on a path prefix."""
+    path_prefix: str
+    sample_rate: float
+    
+    @validator('path_prefix')
+    def validate_path_prefix(cls, v):
+        if not v.startswith('/'):
+            raise ValueError('Path prefix must start with "/"')
+        return v
+    
+    @validator('sample_rate')
+    def validate_sample_rate(cls, v):
+        if v < 0 or v > 1:
+            raise ValueError('Sample rate must be between 0 and 1')
+        return v
+
+
+class ProfilingStatus(BaseModel):
+    """Schema for current profiling configuration and captures."""
+    enabled: bool
+    route_rates: Dict[str, float]
+    captures: List[str]
+
+
+class ProfileTokenRequest(BaseModel):
+    """Schema for requesting a signed profiling header."""
+    ttl_seconds: int = 300
+    
+    @validator('ttl_seconds')
+    def validate_ttl(cls, v):
+        if v < 1 or v > 3600:
+            raise ValueError('Token TTL must be between 1 and 3600 seconds')
+        return v
+
+
+class ProfileTokenResponse(BaseModel):
+    """Schema for a signed profiling header."""
+    header: str
+    token: str
+    expires_at: datetime
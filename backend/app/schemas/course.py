@@ -6,6 +6,8 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from pydantic import BaseModel, validator
 
+from app.schemas.quiz import QuizResponse
+
 
 class CourseBase(BaseModel):
     """Base course schema with common fields."""
@@ -141,6 +143,17 @@ class CourseStats(BaseModel):
         from_attributes = True
 
 
+class CourseRating(BaseModel):
+    """Schema for a learner's course rating."""
+    rating: int
+    
+    @validator('rating')
+    def validate_rating(cls, v):
+        if v < 1 or v > 5:
+            raise ValueError('Rating must be between 1 and 5')
+        return v
+
+
 class CourseEnrollment(BaseModel):
     """Schema for course enrollment."""
     course_id: int
@@ -169,4 +182,48 @@ class CourseSearchResults(BaseModel):
     page: int
     page_size: int
     total_pages: int
-    filters_applied: CourseSearchFilters 
\ No newline at end of file
+    filters_applied: CourseSearchFilters
+
+
+class BundleLesson(BaseModel):
+    """A lesson in an offline bundle."""
+    id: int
+    title: str
+    subtitle: Optional[str] = None
+    summary: Optional[str] = None
+    order_index: int
+    duration_minutes: int
+    content_type: str
+    learning_objectives: Optional[List[str]] = None
+    key_concepts: Optional[List[str]] = None
+    media_urls: Optional[List[str]] = None
+    sources: Optional[List[Dict[str, Any]]] = None
+    content_hash: str
+    quiz_id: Optional[int] = None
+    html: Optional[str] = None  # Left out of deltas when the client already has this content_hash
+
+
+class BundleMedia(BaseModel):
+    """A media file to prefetch with a bundle."""
+    url: str
+    lesson_id: Optional[int] = None  # None for course-level media
+
+
+class CourseBundleDocument(BaseModel):
+    """Offline bundle of a published course; a delta when base_version is set."""
+    format: int
+    course_id: int
+    version: str
+    base_version: Optional[str] = None
+    course: Dict[str, Any]
+    lessons: List[BundleLesson]
+    quizzes: List[QuizResponse]  # Without correct answers or explanations
+    media: List[BundleMedia]
+    removed_lesson_ids: List[int] = []
+    removed_quiz_ids: List[int] = []
+
+
+class CourseBatch(BaseModel):
+    """Courses in request order; null where an id was not found."""
+    items: List[Optional[CourseList]]
+    not_found: List[int]
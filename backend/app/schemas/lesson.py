@@ -0,0 +1,133 @@
+"""
+Lesson-related Pydantic schemas
+"""
+
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+from pydantic import BaseModel, validator
+
+
+class LessonBase(BaseModel):
+    """Base lesson schema with common fields."""
+    title: str
+    subtitle: Optional[str] = None
+    summary: Optional[str] = None
+    order_index: int
+    duration_minutes: int = 3
+    content_type: str = "text"
+    learning_objectives: Optional[List[str]] = None
+    key_concepts: Optional[List[str]] = None
+    prerequisite_concepts: Optional[List[str]] = None
+    next_review_topics: Optional[List[str]] = None
+
+
+class LessonCreate(LessonBase):
+    """Schema for creating a new lesson."""
+    course_id: int
+    content: str
+    media_urls: Optional[List[str]] = None
+    sources: Optional[List[Dict[str, Any]]] = None
+    citations: Optional[List[Dict[str, Any]]] = None
+
+    @validator('content_type')
+    def validate_content_type(cls, v):
+        allowed_types = ['text', 'video', 'interactive']
+        if v not in allowed_types:
+            raise ValueError(f'Content type must be one of: {allowed_types}')
+        return v
+
+
+class LessonUpdate(BaseModel):
+    """Schema for updating lesson information."""
+    title: Optional[str] = None
+    subtitle: Optional[str] = None
+    summary: Optional[str] = None
+    content: Optional[str] = None
+    order_index: Optional[int] = None
+    duration_minutes: Optional[int] = None
+    key_concepts: Optional[List[str]] = None
+    prerequisite_concepts: Optional[List[str]] = None
+    is_published: Optional[bool] = None
+
+
+class LessonResponse(LessonBase):
+    """Schema for lesson response data."""
+    id: int
+    course_id: int
+    slug: str
+    is_published: bool
+    is_preview: bool
+    view_count: int
+    created_at: datetime
+    updated_at: datetime
+    published_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class LessonList(BaseModel):
+    """Schema for a list of lessons in a course."""
+    lessons: List[LessonResponse]
+    total: int
+
+
+class LessonContent(BaseModel):
+    """Schema for lesson body content."""
+    id: int
+    title: str
+    content: str
+    media_urls: Optional[List[str]] = None
+    sources: Optional[List[Dict[str, Any]]] = None
+    citations: Optional[List[Dict[str, Any]]] = None
+
+    class Config:
+        from_attributes = True
+
+
+class LessonRef(BaseModel):
+    """A lesson in concept-graph results."""
+    lesson_id: int
+    course_id: int
+    title: str
+
+
+class PrerequisiteViolation(BaseModel):
+    """A lesson that comes before every lesson introducing a concept it needs."""
+    lesson_id: int
+    concept: str
+    introduced_by: List[int]
+
+
+class CourseConceptOrder(BaseModel):
+    """Prerequisite analysis of a course's lesson order."""
+    course_id: int
+    topological_order: List[int]  # Lesson ids; empty when the prerequisites contain a cycle
+    violations: List[PrerequisiteViolation]
+    cycle: Optional[List[int]] = None  # Lesson ids forming a prerequisite cycle
+
+
+class LessonPublishRequest(BaseModel):
+    """Lessons to render and publish."""
+    lesson_ids: List[int]
+
+    @validator('lesson_ids')
+    def validate_lesson_ids(cls, v):
+        if not v:
+            raise ValueError('At least one lesson id is required')
+        if len(v) > 1000:
+            raise ValueError('At most 1000 lessons can be published at once')
+        return v
+
+
+class LessonPublishResponse(BaseModel):
+    """Outcome of a publish: artifacts rendered versus reused by content hash."""
+    published: int
+    rendered: int
+    reused: int
+
+
+class LessonBatch(BaseModel):
+    """Lessons in request order; null where an id was not found."""
+    items: List[Optional[LessonResponse]]
+    not_found: List[int]
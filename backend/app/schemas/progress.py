@@ -0,0 +1,250 @@
+"""
+Progress-related Pydantic schemas
+"""
+
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+from pydantic import BaseModel, validator
+
+
+class UserProgressResponse(BaseModel):
+    """Schema for course progress response data."""
+    id: int
+    user_id: int
+    course_id: int
+    completion_percentage: float
+    lessons_completed: int
+    total_time_spent_minutes: int
+    current_lesson_id: Optional[int] = None
+    next_lesson_id: Optional[int] = None
+    streak_days: int
+    last_activity_date: Optional[datetime] = None
+    is_enrolled: bool
+    is_completed: bool
+    is_favorited: bool
+    concepts_to_review: Optional[List[str]] = None
+    next_review_date: Optional[datetime] = None
+    enrolled_at: datetime
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class LessonProgressResponse(BaseModel):
+    """Schema for lesson progress response data."""
+    id: int
+    user_id: int
+    lesson_id: int
+    is_completed: bool
+    is_bookmarked: bool
+    completion_percentage: float
+    time_spent_minutes: int
+    completion_time: Optional[datetime] = None
+    scroll_percentage: float
+    interaction_count: int
+    user_notes: Optional[str] = None
+    highlighted_text: Optional[List[Dict[str, Any]]] = None
+    mastery_level: float
+    next_review_date: Optional[datetime] = None
+    review_count: int
+    first_accessed: datetime
+    last_accessed: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class LessonTelemetry(BaseModel):
+    """Schema for a reading telemetry event sent while a lesson is open."""
+    scroll_percentage: float = 0.0
+    interactions: int = 0
+    time_spent_seconds: float = 0.0
+    
+    @validator('scroll_percentage')
+    def validate_scroll(cls, v):
+        if v < 0 or v > 100:
+            raise ValueError('Scroll percentage must be between 0 and 100')
+        return v
+    
+    @validator('interactions')
+    def validate_interactions(cls, v):
+        if v < 0 or v > 1000:
+            raise ValueError('Interactions must be between 0 and 1000')
+        return v
+    
+    @validator('time_spent_seconds')
+    def validate_time_spent(cls, v):
+        # Clients report every few seconds; cap to reject runaway timers
+        if v < 0 or v > 600:
+            raise ValueError('Time spent must be between 0 and 600 seconds')
+        return v
+
+
+class LessonProgressMutation(BaseModel):
+    """Changes to one lesson's progress; omitted or null fields are left untouched."""
+    lesson_id: int
+    is_completed: Optional[bool] = None
+    is_bookmarked: Optional[bool] = None
+    completion_percentage: Optional[float] = None
+    time_spent_minutes: Optional[int] = None
+    scroll_percentage: Optional[float] = None
+    user_notes: Optional[str] = None
+    highlighted_text: Optional[List[Dict[str, Any]]] = None
+    
+    @validator('completion_percentage', 'scroll_percentage')
+    def validate_percentage(cls, v):
+        if v is not None and (v < 0 or v > 100):
+            raise ValueError('Percentage must be between 0 and 100')
+        return v
+    
+    @validator('time_spent_minutes')
+    def validate_time_spent(cls, v):
+        if v is not None and v < 0:
+            raise ValueError('Time spent cannot be negative')
+        return v
+
+
+class UserProgressMutation(BaseModel):
+    """Changes to one course's progress; omitted or null fields are left untouched."""
+    course_id: int
+    is_enrolled: Optional[bool] = None
+    is_favorited: Optional[bool] = None
+    current_lesson_id: Optional[int] = None
+
+
+class ProgressSyncMutation(BaseModel):
+    """One offline change, stamped with the client's clock."""
+    client_mutation_id: str
+    client_timestamp: datetime
+    lesson_progress: Optional[LessonProgressMutation] = None
+    user_progress: Optional[UserProgressMutation] = None
+    
+    @validator('client_mutation_id')
+    def validate_mutation_id(cls, v):
+        if not v or len(v) > 64:
+            raise ValueError('Mutation ID must be between 1 and 64 characters')
+        return v
+    
+    @validator('user_progress', always=True)
+    def validate_single_target(cls, v, values):
+        if (v is None) == (values.get('lesson_progress') is None):
+            raise ValueError('Exactly one of lesson_progress or user_progress is required')
+        return v
+
+
+class ProgressSyncRequest(BaseModel):
+    """Ordered batch of offline progress changes."""
+    mutations: List[ProgressSyncMutation]
+    
+    @validator('mutations')
+    def validate_batch_size(cls, v):
+        if len(v) > 500:
+            raise ValueError('A sync batch may contain at most 500 mutations')
+        return v
+
+
+class ProgressSyncResult(BaseModel):
+    """Outcome of one mutation.
+    
+    ``applied`` mutations were written, ``stale`` ones lost to a newer write
+    already stored, and ``rejected`` ones were invalid and skipped.
+    """
+    client_mutation_id: str
+    status: str
+    detail: Optional[str] = None
+
+
+class ProgressSyncResponse(BaseModel):
+    """Per-mutation results, in request order."""
+    results: List[ProgressSyncResult]
+    server_time: datetime
+
+
+class DashboardCourse(BaseModel):
+    """One enrolled course on the learner dashboard."""
+    course_id: int
+    title: str
+    thumbnail_url: Optional[str] = None
+    completion_percentage: float
+    lessons_completed: int
+    total_lessons: int
+    current_lesson_id: Optional[int] = None
+    current_lesson_title: Optional[str] = None
+    next_lesson_id: Optional[int] = None
+    next_lesson_title: Optional[str] = None
+    due_reviews: int
+    is_completed: bool
+    is_favorited: bool
+    last_activity_date: Optional[datetime] = None
+
+
+class DashboardResponse(BaseModel):
+    """A page of dashboard courses, most recently active first."""
+    courses: List[DashboardCourse]
+    next_cursor: Optional[str] = None
+
+
+class LessonCompletionResponse(BaseModel):
+    """Course progress after completing a lesson."""
+    lesson_id: int
+    course_id: int
+    newly_completed: bool
+    lessons_completed: int
+    completion_percentage: float
+    current_lesson_id: Optional[int] = None
+    next_lesson_id: Optional[int] = None
+    course_completed: bool
+
+
+class SpacedRepetitionSchedule(BaseModel):
+    """Review schedule for one lesson."""
+    lesson_id: int
+    lesson_title: Optional[str] = None
+    course_id: Optional[int] = None
+    next_review_date: Optional[datetime] = None
+    interval_days: float
+    ease_factor: float
+    mastery_level: float
+    review_count: int
+
+
+class ReviewGrade(BaseModel):
+    """Self-graded recall of a lesson, 0 (blackout) to 5 (perfect)."""
+    lesson_id: int
+    quality: int
+    
+    @validator('quality')
+    def validate_quality(cls, v):
+        if not 0 <= v <= 5:
+            raise ValueError('Quality must be between 0 and 5')
+        return v
+
+
+class ReviewSubmission(BaseModel):
+    """A batch of review grades."""
+    reviews: List[ReviewGrade]
+    
+    @validator('reviews')
+    def validate_batch_size(cls, v):
+        if not v:
+            raise ValueError('At least one review is required')
+        if len(v) > 500:
+            raise ValueError('A review batch may contain at most 500 reviews')
+        return v
+
+
+class ConceptMastery(BaseModel):
+    """Estimated mastery of one concept."""
+    concept: str
+    mastery: float  # Probability the concept is known, 0.0 to 1.0
+    observations: int
+
+
+class LearningAnalytics(BaseModel):
+    """Per-concept knowledge estimates for a learner."""
+    user_id: int
+    concepts: List[ConceptMastery]
+    concepts_mastered: List[str]
+    concepts_to_review: List[str]
+    updated_at: Optional[datetime] = None
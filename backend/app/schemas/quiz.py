@@ -0,0 +1,194 @@
+"""
+Quiz-related Pydantic schemas
+"""
+
+from typing import Optional, List, Dict
+from datetime import datetime
+from pydantic import BaseModel, validator
+
+
+class AnswerBase(BaseModel):
+    """Base answer option schema."""
+    answer_text: str
+    order_index: int
+
+
+class AnswerCreate(AnswerBase):
+    """Schema for creating an answer option."""
+    is_correct: bool = False
+    explanation: Optional[str] = None
+
+
+class AnswerResponse(AnswerBase):
+    """Answer option as shown to learners; correctness is not exposed."""
+    id: int
+    question_id: int
+
+    class Config:
+        from_attributes = True
+
+
+class QuestionBase(BaseModel):
+    """Base question schema."""
+    question_text: str
+    question_type: str = "multiple_choice"
+    order_index: int
+    points: int = 1
+    hint: Optional[str] = None
+    concept_tags: Optional[List[str]] = None
+    difficulty_level: str = "medium"
+
+
+class QuestionCreate(QuestionBase):
+    """Schema for creating a question with its answer options."""
+    explanation: Optional[str] = None
+    answers: List[AnswerCreate]
+
+    @validator('question_type')
+    def validate_question_type(cls, v):
+        allowed_types = ['multiple_choice', 'true_false', 'short_answer']
+        if v not in allowed_types:
+            raise ValueError(f'Question type must be one of: {allowed_types}')
+        return v
+
+    @validator('points')
+    def validate_points(cls, v):
+        if v < 0:
+            raise ValueError('Points cannot be negative')
+        return v
+
+
+class QuestionResponse(QuestionBase):
+    """Schema for question response data."""
+    id: int
+    quiz_id: int
+    answers: List[AnswerResponse] = []
+
+    class Config:
+        from_attributes = True
+
+
+class QuizBase(BaseModel):
+    """Base quiz schema."""
+    title: str
+    instructions: Optional[str] = None
+    time_limit_minutes: Optional[int] = None
+    max_attempts: int = 3
+    passing_score: float = 0.7
+    randomize_questions: bool = False
+    show_correct_answers: bool = True
+    show_explanations: bool = True
+
+
+class QuizCreate(QuizBase):
+    """Schema for creating a quiz for a lesson."""
+    lesson_id: int
+    questions: List[QuestionCreate] = []
+
+    @validator('passing_score')
+    def validate_passing_score(cls, v):
+        if not 0.0 <= v <= 1.0:
+            raise ValueError('Passing score must be between 0.0 and 1.0')
+        return v
+
+
+class QuizUpdate(BaseModel):
+    """Schema for updating quiz settings."""
+    title: Optional[str] = None
+    instructions: Optional[str] = None
+    time_limit_minutes: Optional[int] = None
+    max_attempts: Optional[int] = None
+    passing_score: Optional[float] = None
+    randomize_questions: Optional[bool] = None
+    show_correct_answers: Optional[bool] = None
+    show_explanations: Optional[bool] = None
+
+
+class QuizResponse(QuizBase):
+    """Schema for quiz response data."""
+    id: int
+    lesson_id: int
+    questions: List[QuestionResponse] = []
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class QuizDelivery(QuizResponse):
+    """A quiz as served for an attempt, questions in presentation order."""
+    attempt_number: int
+
+
+class SubmittedAnswer(BaseModel):
+    """A learner's answer to one question: chosen options, or text for short answers."""
+    answer_ids: List[int] = []
+    text: Optional[str] = None
+    time_seconds: Optional[float] = None  # Time spent on the question, if the client measures it
+
+
+class QuizAttemptCreate(BaseModel):
+    """Schema for submitting a quiz attempt."""
+    answers: Dict[int, SubmittedAnswer]
+    started_at: Optional[datetime] = None
+
+
+class QuestionResult(BaseModel):
+    """Grading outcome for one question."""
+    question_id: int
+    correct: bool
+    points_earned: int
+    correct_answer_ids: Optional[List[int]] = None
+    explanation: Optional[str] = None
+
+
+class QuizAttemptResponse(BaseModel):
+    """Schema for a graded quiz attempt."""
+    id: int
+    quiz_id: int
+    attempt_number: int
+    attempts_remaining: int
+    score: float
+    points_earned: int
+    total_points: int
+    is_passed: bool
+    questions_correct: int
+    questions_incorrect: int
+    questions_skipped: int
+    completed_at: datetime
+    results: List[QuestionResult] = []
+
+
+class AnswerKeyUpdate(BaseModel):
+    """New set of correct options for a question."""
+    correct_answer_ids: List[int]
+
+    @validator('correct_answer_ids')
+    def validate_not_empty(cls, v):
+        if not v:
+            raise ValueError('At least one correct answer is required')
+        return v
+
+
+class RegradeResponse(BaseModel):
+    """Outcome of regrading a quiz after an answer key change."""
+    quiz_id: int
+    attempts_regraded: int
+    attempts_changed: int
+
+
+class QuestionStats(BaseModel):
+    """Item analysis for one question."""
+    question_id: int
+    responses: int
+    p_value: float  # Share answering correctly, shrunk toward the declared difficulty
+    discrimination: float  # Point-biserial correlation with attempt score
+    avg_time_seconds: Optional[float] = None
+
+
+class AdaptiveQuestionSet(BaseModel):
+    """Questions selected to match a target difficulty, best match first."""
+    quiz_id: int
+    target: float
+    questions: List[QuestionResponse]
@@ -0,0 +1,42 @@
+"""
+Upload-related Pydantic schemas
+"""
+
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, validator
+
+from app.models.upload import UploadKind
+
+
+class StoredFileResponse(BaseModel):
+    """A file in the content-addressed store."""
+    sha256: str
+    size_bytes: int
+    content_type: str
+    url: str
+    deduplicated: bool = False  # The content was already stored; nothing new was written
+
+
+class UploadSessionCreate(BaseModel):
+    """Schema for starting a resumable upload."""
+    kind: UploadKind
+    content_type: str
+    size_bytes: int
+
+    @validator('size_bytes')
+    def validate_size(cls, v):
+        if v <= 0:
+            raise ValueError('Upload size must be positive')
+        return v
+
+
+class UploadSessionResponse(BaseModel):
+    """State of a resumable upload; ``file`` is set once all bytes are in."""
+    id: str
+    kind: UploadKind
+    content_type: str
+    size_bytes: int
+    offset: int
+    expires_at: datetime
+    file: Optional[StoredFileResponse] = None
@@ -2,7 +2,7 @@
 User-related Pydantic schemas
 """
 
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, validator
 from app.models.user import UserRole
@@ -89,6 +89,12 @@ class UserProfile(BaseModel):
         from_attributes = True
 
 
+class UserProfileBatch(BaseModel):
+    """Public profiles in request order; null where an id was not found."""
+    items: List[Optional[UserProfile]]
+    not_found: List[int]
+
+
 class UserLogin(BaseModel):
     """Schema for user login."""
     email: EmailStr
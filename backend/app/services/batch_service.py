@@ -0,0 +1,156 @@
+"""
+Batch fetches of courses, lessons and public profiles
+
+List screens (recommendations, bookmarks, leaderboards) need many records by
+id at once. Each batch is answered from a per-process TTL cache of
+serialized records first; the misses are read with a single
+``WHERE id IN (...)`` selecting only the columns the response schema needs.
+Results come back in request order with ``null`` for ids that don't exist or
+aren't public.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Generic, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.config import settings
+from app.core.exceptions import DatabaseException, ValidationException
+from app.core.metrics import record_cache_lookup
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.user import User
+from app.schemas.course import CourseBatch, CourseList
+from app.schemas.lesson import LessonBatch, LessonResponse
+from app.schemas.user import UserProfile, UserProfileBatch
+
+logger = structlog.get_logger()
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def parse_ids(raw: str) -> List[int]:
+    """Parse a comma-separated ``ids`` parameter, keeping order and duplicates."""
+    try:
+        ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise ValidationException("ids must be comma-separated integers", error_code="INVALID_IDS")
+    if not ids:
+        raise ValidationException("At least one id is required", error_code="INVALID_IDS")
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise ValidationException(
+            f"At most {settings.BATCH_MAX_IDS} ids can be fetched at once", error_code="TOO_MANY_IDS"
+        )
+    return ids
+
+
+class RecordCache(Generic[T]):
+    """Per-process TTL cache of serialized records by id.
+
+    Call ``invalidate`` after changing a record; the TTL bounds staleness for
+    changes made by other processes. Only records that exist are cached, so
+    a newly created record is visible immediately.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[float, T]]" = OrderedDict()
+
+    def get_many(self, ids: Iterable[int]) -> Tuple[Dict[int, T], List[int]]:
+        """Cached records, and the ids that must be fetched."""
+        now = time.monotonic()
+        found: Dict[int, T] = {}
+        missing: List[int] = []
+        for record_id in dict.fromkeys(ids):
+            entry = self._entries.get(record_id)
+            hit = entry is not None and now - entry[0] < self.ttl_seconds
+            record_cache_lookup(self.name, hit)
+            if hit:
+                found[record_id] = entry[1]
+            else:
+                missing.append(record_id)
+        return found, missing
+
+    def put_many(self, records: Dict[int, T]) -> None:
+        now = time.monotonic()
+        for record_id, record in records.items():
+            self._entries.pop(record_id, None)
+            self._entries[record_id] = (now, record)
+        # Oldest writes go first; expired entries are among them
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, ids: Optional[Iterable[int]] = None) -> None:
+        if ids is None:
+            self._entries.clear()
+            return
+        for record_id in ids:
+            self._entries.pop(record_id, None)
+
+
+course_cache: RecordCache[CourseList] = RecordCache(
+    "course_batch", settings.BATCH_CACHE_SECONDS, settings.BATCH_CACHE_MAX_ENTRIES
+)
+lesson_cache: RecordCache[LessonResponse] = RecordCache(
+    "lesson_batch", settings.BATCH_CACHE_SECONDS, settings.BATCH_CACHE_MAX_ENTRIES
+)
+profile_cache: RecordCache[UserProfile] = RecordCache(
+    "profile_batch", settings.BATCH_CACHE_SECONDS, settings.BATCH_CACHE_MAX_ENTRIES
+)
+
+
+def _columns(model, schema: Type[BaseModel]) -> list:
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+class BatchFetchService:
+    """Service class for fetching records by id in bulk."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _resolve(
+        self,
+        ids: Sequence[int],
+        cache: RecordCache[T],
+        model,
+        schema: Type[T],
+        *visible,
+    ) -> Tuple[List[Optional[T]], List[int]]:
+        found, missing = cache.get_many(ids)
+        if missing:
+            try:
+                result = await self.db.execute(
+                    select(*_columns(model, schema)).where(model.id.in_(missing), *visible)
+                )
+                fetched = {row.id: schema.model_validate(row) for row in result.all()}
+            except Exception as e:
+                logger.error("Failed to batch fetch records", cache=cache.name, id_count=len(missing), error=str(e))
+                raise DatabaseException("Failed to retrieve records", error_code="BATCH_FETCH_ERROR")
+            cache.put_many(fetched)
+            found.update(fetched)
+
+        items = [found.get(record_id) for record_id in ids]
+        not_found = [record_id for record_id in dict.fromkeys(ids) if record_id not in found]
+        return items, not_found
+
+    async def get_courses(self, ids: Sequence[int]) -> CourseBatch:
+        """Published courses by id."""
+        items, not_found = await self._resolve(ids, course_cache, Course, CourseList, Course.is_published.is_(True))
+        return CourseBatch(items=items, not_found=not_found)
+
+    async def get_lessons(self, ids: Sequence[int]) -> LessonBatch:
+        """Published lessons by id, without their content."""
+        items, not_found = await self._resolve(ids, lesson_cache, Lesson, LessonResponse, Lesson.is_published.is_(True))
+        return LessonBatch(items=items, not_found=not_found)
+
+    async def get_user_profiles(self, ids: Sequence[int]) -> UserProfileBatch:
+        """Public profiles of active users by id."""
+        items, not_found = await self._resolve(ids, profile_cache, User, UserProfile, User.is_active.is_(True))
+        return UserProfileBatch(items=items, not_found=not_found)
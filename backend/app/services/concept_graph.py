@@ -0,0 +1,375 @@
+"""
+Prerequisite concept graph over lessons
+
+Each lesson introduces its ``key_concepts`` and requires its
+``prerequisite_concepts``. The graph keeps both directions in memory
+(concept → introducing lessons, concept → requiring lessons) so questions like
+"which lessons open up once X is mastered" are answered with set lookups
+instead of a scan of every lesson's JSON. A lesson's prerequisite lessons are
+the introducers of the concepts it requires, preferring introducers in its
+own course.
+
+The index is per process and refreshed incrementally: lessons whose
+``updated_at`` reaches the watermark are reloaded, and deletions are picked up
+by comparing lesson counts. Per-course topological orders are computed on
+demand and kept until a lesson of that course changes.
+"""
+
+import heapq
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import AbstractSet, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.config import settings
+from app.core.exceptions import CourseNotFoundException, DatabaseException
+from app.core.metrics import record_cache_lookup
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.progress import UserConceptState
+from app.schemas.lesson import CourseConceptOrder, LessonRef, PrerequisiteViolation
+from app.services.knowledge_tracing import MASTERY_THRESHOLD
+
+logger = structlog.get_logger()
+
+_LESSON_COLUMNS = (
+    Lesson.id,
+    Lesson.course_id,
+    Lesson.order_index,
+    Lesson.title,
+    Lesson.is_published,
+    Lesson.key_concepts,
+    Lesson.prerequisite_concepts,
+    Lesson.updated_at,
+)
+
+
+def normalize_concept(concept: str) -> str:
+    """Concepts are matched case-insensitively, ignoring surrounding whitespace."""
+    return " ".join(concept.split()).casefold()
+
+
+def _concept_set(concepts: Optional[Iterable[str]]) -> FrozenSet[str]:
+    return frozenset(normalize_concept(c) for c in concepts or () if isinstance(c, str) and c.strip())
+
+
+@dataclass(frozen=True)
+class LessonNode:
+    """The parts of a lesson the concept graph needs."""
+    id: int
+    course_id: int
+    order_index: int
+    title: str
+    is_published: bool
+    introduces: FrozenSet[str]
+    requires: FrozenSet[str]
+
+    @classmethod
+    def from_row(cls, row) -> "LessonNode":
+        return cls(
+            id=row.id,
+            course_id=row.course_id,
+            order_index=row.order_index,
+            title=row.title,
+            is_published=row.is_published,
+            introduces=_concept_set(row.key_concepts),
+            requires=_concept_set(row.prerequisite_concepts),
+        )
+
+
+@dataclass(frozen=True)
+class CourseOrder:
+    """Prerequisite analysis of one course."""
+    topological_order: Tuple[int, ...]  # Empty when ``cycle`` is set
+    violations: Tuple[Tuple[int, str, Tuple[int, ...]], ...]  # (lesson, concept, introducers)
+    cycle: Optional[Tuple[int, ...]]
+
+
+class ConceptGraph:
+    """In-memory concept DAG over lessons with incremental updates."""
+
+    def __init__(self):
+        self._lessons: Dict[int, LessonNode] = {}
+        self._introduced_by: Dict[str, Set[int]] = {}
+        self._required_by: Dict[str, Set[int]] = {}
+        self._course_lessons: Dict[int, Set[int]] = {}
+        self._orders: Dict[int, CourseOrder] = {}
+
+    def __len__(self) -> int:
+        return len(self._lessons)
+
+    def __contains__(self, lesson_id: int) -> bool:
+        return lesson_id in self._lessons
+
+    def lesson(self, lesson_id: int) -> Optional[LessonNode]:
+        return self._lessons.get(lesson_id)
+
+    def lesson_ids(self) -> Set[int]:
+        return set(self._lessons)
+
+    def upsert(self, node: LessonNode) -> None:
+        """Add a lesson or replace its previous version."""
+        old = self._lessons.get(node.id)
+        if old == node:
+            return
+        if old is not None:
+            self._unlink(old)
+        self._lessons[node.id] = node
+        for concept in node.introduces:
+            self._introduced_by.setdefault(concept, set()).add(node.id)
+        for concept in node.requires:
+            self._required_by.setdefault(concept, set()).add(node.id)
+        self._course_lessons.setdefault(node.course_id, set()).add(node.id)
+        self._orders.pop(node.course_id, None)
+
+    def remove(self, lesson_id: int) -> None:
+        node = self._lessons.pop(lesson_id, None)
+        if node is not None:
+            self._unlink(node)
+
+    def _unlink(self, node: LessonNode) -> None:
+        for index, concepts in ((self._introduced_by, node.introduces), (self._required_by, node.requires)):
+            for concept in concepts:
+                lessons = index[concept]
+                lessons.discard(node.id)
+                if not lessons:
+                    del index[concept]
+        course = self._course_lessons[node.course_id]
+        course.discard(node.id)
+        if not course:
+            del self._course_lessons[node.course_id]
+        self._orders.pop(node.course_id, None)
+
+    def introduced_by(self, concept: str) -> FrozenSet[int]:
+        """Lessons that list ``concept`` among their key concepts."""
+        return frozenset(self._introduced_by.get(normalize_concept(concept), ()))
+
+    def prerequisites(self, lesson_id: int) -> Set[int]:
+        """Lessons that introduce the concepts ``lesson_id`` requires.
+
+        For each required concept, introducers in the lesson's own course are
+        used when there are any; otherwise introducers from every course.
+        """
+        node = self._lessons.get(lesson_id)
+        if node is None:
+            return set()
+        course = self._course_lessons[node.course_id]
+        result: Set[int] = set()
+        for concept in node.requires:
+            introducers = self._introduced_by.get(concept, set())
+            result |= (introducers & course) or introducers
+        result.discard(lesson_id)
+        return result
+
+    def unlocked_by(self, concept: str, mastered: AbstractSet[str] = frozenset()) -> List[LessonNode]:
+        """Published lessons requiring ``concept`` whose other prerequisites are all mastered.
+
+        ``mastered`` holds normalized concepts (see ``normalize_concept``).
+        """
+        concept = normalize_concept(concept)
+        unlocked = []
+        for lesson_id in self._required_by.get(concept, ()):
+            node = self._lessons[lesson_id]
+            if node.is_published and all(c == concept or c in mastered for c in node.requires):
+                unlocked.append(node)
+        unlocked.sort(key=lambda node: (node.course_id, node.order_index, node.id))
+        return unlocked
+
+    def course_order(self, course_id: int) -> CourseOrder:
+        """Topological order, ordering violations and any cycle for a course."""
+        order = self._orders.get(course_id)
+        if order is None:
+            order = self._analyze_course(course_id)
+            self._orders[course_id] = order
+        return order
+
+    def _analyze_course(self, course_id: int) -> CourseOrder:
+        lesson_ids = self._course_lessons.get(course_id, set())
+        nodes = {lesson_id: self._lessons[lesson_id] for lesson_id in lesson_ids}
+        # Only same-course introducers constrain the order; concepts introduced
+        # solely by other courses are external prerequisites.
+        edges: Dict[int, Set[int]] = {lesson_id: set() for lesson_id in nodes}
+        in_degree = dict.fromkeys(nodes, 0)
+        violations = []
+        for node in nodes.values():
+            for concept in sorted(node.requires):
+                introducers = (self._introduced_by.get(concept, set()) & lesson_ids) - {node.id}
+                if not introducers:
+                    continue
+                for introducer in introducers:
+                    if node.id not in edges[introducer]:
+                        edges[introducer].add(node.id)
+                        in_degree[node.id] += 1
+                sort_key = (node.order_index, node.id)
+                if all((nodes[i].order_index, nodes[i].id) > sort_key for i in introducers):
+                    violations.append((node.id, concept, tuple(sorted(introducers))))
+
+        # Kahn's algorithm; ties keep the authored order
+        heap = [(nodes[i].order_index, i) for i, degree in in_degree.items() if degree == 0]
+        heapq.heapify(heap)
+        ordered = []
+        while heap:
+            _, lesson_id = heapq.heappop(heap)
+            ordered.append(lesson_id)
+            for successor in edges[lesson_id]:
+                in_degree[successor] -= 1
+                if in_degree[successor] == 0:
+                    heapq.heappush(heap, (nodes[successor].order_index, successor))
+
+        violations.sort(key=lambda v: (nodes[v[0]].order_index, v[0], v[1]))
+        if len(ordered) < len(nodes):
+            remaining = {i for i, degree in in_degree.items() if degree > 0}
+            return CourseOrder((), tuple(violations), _find_cycle(remaining, edges))
+        return CourseOrder(tuple(ordered), tuple(violations), None)
+
+
+def _find_cycle(remaining: Set[int], edges: Dict[int, Set[int]]) -> Tuple[int, ...]:
+    """One cycle among the lessons Kahn's algorithm could not order.
+
+    Every such lesson has a predecessor that is also left over, so walking
+    predecessors from any of them must revisit a lesson.
+    """
+    predecessors: Dict[int, int] = {}
+    for lesson_id in sorted(remaining):
+        for successor in edges[lesson_id]:
+            if successor in remaining:
+                predecessors.setdefault(successor, lesson_id)
+    seen: Dict[int, int] = {}
+    path = []
+    current = min(remaining)
+    while current not in seen:
+        seen[current] = len(path)
+        path.append(current)
+        current = predecessors[current]
+    cycle = path[seen[current]:]
+    cycle.reverse()
+    return tuple(cycle)
+
+
+class ConceptGraphIndex:
+    """Per-process concept graph, refreshed from the lessons table.
+
+    At most once per TTL a refresh compares the lesson count and latest
+    ``updated_at`` with what the graph has seen and reloads lessons updated
+    since the watermark. ``updated_at`` is the writing transaction's start
+    time, so a write can commit after a refresh with a timestamp below its
+    watermark; reloads therefore reach back ``lookback_seconds``, which must
+    exceed the longest transaction writing lessons. Call ``invalidate`` to
+    force a full rebuild.
+    """
+
+    def __init__(self, ttl_seconds: float, lookback_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.lookback = timedelta(seconds=lookback_seconds)
+        self.graph = ConceptGraph()
+        self._checked_at: Optional[float] = None
+        self._watermark: Optional[datetime] = None
+
+    async def get(self, session: AsyncSession) -> ConceptGraph:
+        if self._checked_at is not None and time.monotonic() - self._checked_at < self.ttl_seconds:
+            record_cache_lookup("concept_graph", True)
+            return self.graph
+
+        record_cache_lookup("concept_graph", False)
+        await self.refresh(session)
+        return self.graph
+
+    async def refresh(self, session: AsyncSession) -> None:
+        checked_at = time.monotonic()
+        count, latest = (await session.execute(
+            select(func.count(Lesson.id), func.max(Lesson.updated_at))
+        )).one()
+
+        if self._watermark is None:
+            rows = (await session.execute(select(*_LESSON_COLUMNS))).all()
+            graph = ConceptGraph()
+            for row in rows:
+                graph.upsert(LessonNode.from_row(row))
+            self.graph = graph
+        elif latest is not None:
+            # Late commits land below the watermark; upserts are idempotent
+            rows = (await session.execute(
+                select(*_LESSON_COLUMNS).where(Lesson.updated_at >= self._watermark - self.lookback)
+            )).all()
+            for row in rows:
+                self.graph.upsert(LessonNode.from_row(row))
+
+        if len(self.graph) != count:
+            existing = set((await session.execute(select(Lesson.id))).scalars())
+            for lesson_id in self.graph.lesson_ids() - existing:
+                self.graph.remove(lesson_id)
+            # Rows missed by the watermark (e.g. inserted with an older timestamp)
+            missing = existing - self.graph.lesson_ids()
+            if missing:
+                rows = (await session.execute(
+                    select(*_LESSON_COLUMNS).where(Lesson.id.in_(missing))
+                )).all()
+                for row in rows:
+                    self.graph.upsert(LessonNode.from_row(row))
+
+        if latest is not None:
+            self._watermark = latest
+        self._checked_at = checked_at
+
+    def invalidate(self) -> None:
+        self.graph = ConceptGraph()
+        self._checked_at = None
+        self._watermark = None
+
+
+concept_graph_index = ConceptGraphIndex(
+    settings.CONCEPT_GRAPH_REFRESH_SECONDS, settings.CONCEPT_GRAPH_LOOKBACK_SECONDS
+)
+
+
+def _lesson_ref(node: LessonNode) -> LessonRef:
+    return LessonRef(lesson_id=node.id, course_id=node.course_id, title=node.title)
+
+
+class ConceptGraphService:
+    """Service class for concept graph queries."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_unlocked_lessons(self, user_id: int, concept: str) -> List[LessonRef]:
+        """Lessons that mastering ``concept`` opens up, given the learner's other mastered concepts."""
+        try:
+            graph = await concept_graph_index.get(self.db)
+            concepts = await self.db.scalar(
+                select(UserConceptState.concepts).where(UserConceptState.user_id == user_id)
+            )
+        except Exception as e:
+            logger.error("Failed to get unlocked lessons", user_id=user_id, concept=concept, error=str(e))
+            raise DatabaseException("Failed to retrieve unlocked lessons", error_code="CONCEPT_GRAPH_ERROR")
+
+        mastered = {
+            normalize_concept(tag) for tag, (p_known, _) in (concepts or {}).items() if p_known >= MASTERY_THRESHOLD
+        }
+        return [_lesson_ref(node) for node in graph.unlocked_by(concept, mastered)]
+
+    async def get_course_order(self, course_id: int) -> CourseConceptOrder:
+        """Check a course's lesson order against its concept prerequisites."""
+        try:
+            graph = await concept_graph_index.get(self.db)
+            exists = await self.db.scalar(select(Course.id).where(Course.id == course_id))
+        except Exception as e:
+            logger.error("Failed to get course concept order", course_id=course_id, error=str(e))
+            raise DatabaseException("Failed to analyze course prerequisites", error_code="CONCEPT_GRAPH_ERROR")
+        if exists is None:
+            raise CourseNotFoundException("Course not found", error_code="COURSE_NOT_FOUND")
+
+        order = graph.course_order(course_id)
+        return CourseConceptOrder(
+            course_id=course_id,
+            topological_order=list(order.topological_order),
+            violations=[
+                PrerequisiteViolation(lesson_id=lesson_id, concept=concept, introduced_by=list(introducers))
+                for lesson_id, concept, introducers in order.violations
+            ],
+            cycle=list(order.cycle) if order.cycle else None,
+        )
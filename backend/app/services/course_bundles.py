@@ -0,0 +1,351 @@
+"""
+Offline course bundles
+
+A bundle is one compressed JSON document with everything a client needs to
+take a published course offline: the course outline, every published lesson
+with its rendered HTML, the quizzes without correct answers, and a manifest
+of media to prefetch. Its version is a digest of the bundle's inputs, which
+are read with two small queries (no lesson bodies), so checking for a new
+version is cheap.
+
+Full bundles are built once per version and stored in ``course_bundles``
+with their manifest (lesson → content hash and entry digest, quiz →
+version). A client holding an older version asks for a delta: lessons and
+quizzes that changed since, ids that went away, and HTML only where the
+lesson's content hash changed. Deltas are assembled on demand and cached per
+process with full bundles.
+"""
+
+import asyncio
+import gzip
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import brotli
+import orjson
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.cache import SizedLRU
+from app.core.config import settings
+from app.core.exceptions import CourseNotFoundException, DatabaseException
+from app.models.course import Course, CourseBundle
+from app.models.lesson import Lesson, LessonArtifact
+from app.models.quiz import Quiz
+from app.services.quiz_delivery import quiz_payload_cache
+
+logger = structlog.get_logger()
+
+# Bump when the document layout changes so every course gets a new version
+BUNDLE_FORMAT = 1
+
+# Deltas are compressed per request on a cache miss, so not at maximum quality
+BROTLI_QUALITY = 9
+
+_OUTLINE_COLUMNS = (
+    Course.id,
+    Course.title,
+    Course.description,
+    Course.topic,
+    Course.difficulty_level,
+    Course.estimated_duration_minutes,
+    Course.syllabus,
+    Course.learning_objectives,
+    Course.prerequisites,
+    Course.sources,
+    Course.tags,
+    Course.thumbnail_url,
+)
+
+_LESSON_COLUMNS = (
+    Lesson.id,
+    Lesson.title,
+    Lesson.subtitle,
+    Lesson.summary,
+    Lesson.order_index,
+    Lesson.duration_minutes,
+    Lesson.content_type,
+    Lesson.learning_objectives,
+    Lesson.key_concepts,
+    Lesson.media_urls,
+    Lesson.sources,
+    Lesson.content_hash,
+    Quiz.id.label("quiz_id"),
+)
+
+
+def _dumps(value) -> bytes:
+    return orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class BundleState:
+    """What a course's bundle currently contains, minus lesson bodies and quizzes."""
+    course_id: int
+    version: str
+    outline: dict
+    lessons: Tuple[dict, ...]  # Bundle lesson entries without HTML, in course order
+    quiz_versions: Dict[int, datetime]
+    manifest: dict  # {"lessons": {id: [content_hash, entry_digest]}, "quizzes": {id: version}}
+
+
+def bundle_state(course_id: int, outline: dict, lesson_rows: Sequence[dict], quiz_versions: Dict[int, datetime]) -> BundleState:
+    lessons = tuple(lesson_rows)
+    manifest = {
+        "lessons": {
+            str(entry["id"]): [entry["content_hash"], _digest(_dumps(entry))]
+            for entry in lessons
+        },
+        "quizzes": {str(quiz_id): version.isoformat() for quiz_id, version in quiz_versions.items()},
+    }
+    version = _digest(_dumps([BUNDLE_FORMAT, outline, manifest]))
+    return BundleState(course_id, version, outline, lessons, dict(quiz_versions), manifest)
+
+
+def media_manifest(state: BundleState) -> List[dict]:
+    """Media URLs to prefetch, each listed once."""
+    media, seen = [], set()
+    if state.outline.get("thumbnail_url"):
+        media.append({"url": state.outline["thumbnail_url"], "lesson_id": None})
+        seen.add(state.outline["thumbnail_url"])
+    for entry in state.lessons:
+        for url in entry.get("media_urls") or ():
+            if url not in seen:
+                seen.add(url)
+                media.append({"url": url, "lesson_id": entry["id"]})
+    return media
+
+
+@dataclass(frozen=True)
+class BundlePlan:
+    """The lessons and quizzes a bundle (full or delta) carries."""
+    lessons: Tuple[dict, ...]
+    html_hashes: Set[str]  # Content hashes whose HTML is included
+    quiz_ids: Tuple[int, ...]
+    removed_lesson_ids: Tuple[int, ...]
+    removed_quiz_ids: Tuple[int, ...]
+
+
+def plan_bundle(state: BundleState, base: Optional[dict] = None) -> BundlePlan:
+    """Select what to send to a client holding the ``base`` manifest (None for everything)."""
+    current_lessons = state.manifest["lessons"]
+    current_quizzes = state.manifest["quizzes"]
+    if base is None:
+        return BundlePlan(
+            lessons=state.lessons,
+            html_hashes={entry["content_hash"] for entry in state.lessons},
+            quiz_ids=tuple(sorted(state.quiz_versions)),
+            removed_lesson_ids=(),
+            removed_quiz_ids=(),
+        )
+
+    base_lessons = base["lessons"]
+    base_quizzes = base["quizzes"]
+    lessons = tuple(entry for entry in state.lessons if base_lessons.get(str(entry["id"])) != current_lessons[str(entry["id"])])
+    return BundlePlan(
+        lessons=lessons,
+        html_hashes={
+            entry["content_hash"] for entry in lessons
+            if (base_lessons.get(str(entry["id"])) or [None])[0] != entry["content_hash"]
+        },
+        quiz_ids=tuple(sorted(int(q) for q, version in current_quizzes.items() if base_quizzes.get(q) != version)),
+        removed_lesson_ids=tuple(sorted(int(i) for i in base_lessons if i not in current_lessons)),
+        removed_quiz_ids=tuple(sorted(int(q) for q in base_quizzes if q not in current_quizzes)),
+    )
+
+
+def encode_bundle(
+    state: BundleState,
+    plan: BundlePlan,
+    html: Dict[str, bytes],
+    quizzes: Dict[int, bytes],
+    base_version: Optional[str] = None,
+) -> bytes:
+    """Splice the bundle document together from pre-serialized parts.
+
+    Lesson HTML and quiz documents are embedded without being parsed again.
+    """
+    head = _dumps({
+        "format": BUNDLE_FORMAT,
+        "course_id": state.course_id,
+        "version": state.version,
+        "base_version": base_version,
+        "course": state.outline,
+        "media": media_manifest(state),
+        "removed_lesson_ids": list(plan.removed_lesson_ids),
+        "removed_quiz_ids": list(plan.removed_quiz_ids),
+    })
+    lessons = []
+    for entry in plan.lessons:
+        fragment = _dumps(entry)
+        if entry["content_hash"] in plan.html_hashes:
+            fragment = b"".join((fragment[:-1], b',"html":', orjson.dumps(html[entry["content_hash"]].decode()), b"}"))
+        lessons.append(fragment)
+    return b"".join((
+        head[:-1],
+        b',"lessons":[', b",".join(lessons),
+        b'],"quizzes":[', b",".join(quizzes[quiz_id] for quiz_id in plan.quiz_ids), b"]}",
+    ))
+
+
+def _compress(document: bytes) -> Tuple[bytes, bytes]:
+    return (
+        gzip.compress(document, compresslevel=9, mtime=0),
+        brotli.compress(document, mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY),
+    )
+
+
+@dataclass(frozen=True)
+class EncodedBundle:
+    """A bundle document in its stored encodings."""
+    version: str
+    base_version: Optional[str]  # None for a full bundle
+    size_bytes: int
+    gzip: bytes
+    brotli: bytes
+
+    @property
+    def size(self) -> int:
+        return len(self.gzip) + len(self.brotli)
+
+    def body(self, encoding: Optional[str]) -> bytes:
+        if encoding == "br":
+            return self.brotli
+        if encoding == "gzip":
+            return self.gzip
+        return gzip.decompress(self.gzip)  # Rare; not worth storing uncompressed
+
+
+def bundle_etag(version: str, base_version: Optional[str], encoding: Optional[str]) -> str:
+    """Strong ETag for a bundle representation."""
+    suffix = {"br": "-br", "gzip": "-gz"}.get(encoding, "")
+    key = f"{base_version}..{version}" if base_version else version
+    return f'"{key}{suffix}"'
+
+
+# Keyed by (course, base version, version), so entries never go stale
+bundle_cache: SizedLRU[Tuple[int, Optional[str], str], EncodedBundle] = SizedLRU(
+    "course_bundle", settings.BUNDLE_CACHE_MAX_BYTES
+)
+
+
+class CourseBundleService:
+    """Service class for offline course bundles."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_state(self, course_id: int) -> BundleState:
+        """Current bundle version of a published course."""
+        try:
+            outline = (await self.db.execute(
+                select(*_OUTLINE_COLUMNS).where(Course.id == course_id, Course.is_published.is_(True))
+            )).mappings().one_or_none()
+            rows = []
+            if outline is not None:
+                rows = (await self.db.execute(
+                    select(*_LESSON_COLUMNS, Quiz.updated_at.label("quiz_version"))
+                    .outerjoin(Quiz, Quiz.lesson_id == Lesson.id)
+                    .where(
+                        Lesson.course_id == course_id,
+                        Lesson.is_published.is_(True),
+                        Lesson.content_hash.is_not(None),
+                    )
+                    .order_by(Lesson.order_index, Lesson.id)
+                )).mappings().all()
+        except Exception as e:
+            logger.error("Failed to get course bundle state", course_id=course_id, error=str(e))
+            raise DatabaseException("Failed to retrieve course bundle", error_code="COURSE_BUNDLE_ERROR")
+        if outline is None:
+            raise CourseNotFoundException("Course not found", error_code="COURSE_NOT_FOUND")
+
+        lessons = [{key: row[key] for key in row.keys() if key != "quiz_version"} for row in rows]
+        quiz_versions = {row["quiz_id"]: row["quiz_version"] for row in rows if row["quiz_id"] is not None}
+        return bundle_state(course_id, dict(outline), lessons, quiz_versions)
+
+    async def get_bundle(self, state: BundleState, since: Optional[str] = None) -> EncodedBundle:
+        """Full bundle, or a delta from ``since`` when that version is still retained."""
+        base_version = since if since else None
+        bundle = bundle_cache.get((state.course_id, base_version, state.version))
+        if bundle is not None:
+            return bundle
+
+        try:
+            base = None
+            if base_version is not None:
+                base = await self.db.scalar(
+                    select(CourseBundle.manifest)
+                    .where(CourseBundle.course_id == state.course_id, CourseBundle.version == base_version)
+                )
+            if base is None:
+                bundle = await self._full_bundle(state)
+                bundle_cache.put((state.course_id, None, bundle.version), bundle)
+            else:
+                bundle = await self._build(state, base, base_version)
+            bundle_cache.put((state.course_id, base_version, bundle.version), bundle)
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to build course bundle", course_id=state.course_id, since=since, error=str(e))
+            raise DatabaseException("Failed to build course bundle", error_code="COURSE_BUNDLE_ERROR")
+        return bundle
+
+    async def _full_bundle(self, state: BundleState) -> EncodedBundle:
+        row = (await self.db.execute(
+            select(CourseBundle.size_bytes, CourseBundle.gzip, CourseBundle.brotli)
+            .where(CourseBundle.course_id == state.course_id, CourseBundle.version == state.version)
+        )).one_or_none()
+        if row is not None:
+            return EncodedBundle(state.version, None, row.size_bytes, row.gzip, row.brotli)
+
+        bundle = await self._build(state)
+        await self.db.execute(
+            pg_insert(CourseBundle)
+            .values(
+                course_id=state.course_id,
+                version=state.version,
+                manifest=state.manifest,
+                size_bytes=bundle.size_bytes,
+                gzip=bundle.gzip,
+                brotli=bundle.brotli,
+            )
+            .on_conflict_do_nothing(index_elements=[CourseBundle.course_id, CourseBundle.version])
+        )
+        retained = (
+            select(CourseBundle.version)
+            .where(CourseBundle.course_id == state.course_id)
+            .order_by(CourseBundle.created_at.desc())
+            .limit(settings.BUNDLE_RETAIN_VERSIONS)
+        )
+        await self.db.execute(
+            delete(CourseBundle)
+            .where(CourseBundle.course_id == state.course_id, CourseBundle.version.not_in(retained))
+        )
+        await self.db.commit()
+        logger.info("Course bundle built", course_id=state.course_id, version=state.version, size=bundle.size_bytes)
+        return bundle
+
+    async def _build(self, state: BundleState, base: Optional[dict] = None, base_version: Optional[str] = None) -> EncodedBundle:
+        plan = plan_bundle(state, base)
+        html: Dict[str, bytes] = {}
+        if plan.html_hashes:
+            result = await self.db.execute(
+                select(LessonArtifact.content_hash, LessonArtifact.html)
+                .where(LessonArtifact.content_hash.in_(plan.html_hashes))
+            )
+            html = {content_hash: body for content_hash, body in result.all()}
+        quizzes = {}
+        for quiz_id in plan.quiz_ids:
+            payload = await quiz_payload_cache.get(self.db, quiz_id, state.quiz_versions[quiz_id])
+            quizzes[quiz_id] = payload.document()
+
+        document = encode_bundle(state, plan, html, quizzes, base_version)
+        gzip_body, brotli_body = await asyncio.to_thread(_compress, document)
+        return EncodedBundle(state.version, base_version, len(document), gzip_body, brotli_body)
@@ -0,0 +1,373 @@
+"""
+Incrementally maintained course analytics
+
+Outbox consumers apply enrollment, completion and rating events as counter
+deltas to ``course_stats`` and ``lesson_stats`` and refresh the derived
+``Course.completion_rate`` and ``Course.average_rating``. Reads are a
+primary-key lookup. A periodic reconciliation recomputes everything from
+``user_progress`` and ``lesson_progress`` and reports drift.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import case, func, insert, literal, select, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import CourseNotFoundException, DatabaseException
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.outbox import ConsumedEvent, OutboxEvent
+from app.models.progress import LessonProgress, UserProgress
+from app.models.stats import CourseStatsRollup, LessonStatsRollup
+from app.schemas.course import CourseStats
+from app.services.outbox import (
+    COURSE_COMPLETED,
+    COURSE_ENROLLED,
+    COURSE_RATED,
+    COURSE_UNCOMPLETED,
+    COURSE_UNENROLLED,
+    LESSON_COMPLETED,
+    LESSON_UNCOMPLETED,
+    add_outbox_event,
+    outbox_relay,
+)
+
+logger = structlog.get_logger()
+
+CONSUMER = "course_rollups"
+ROLLUP_EVENTS = (
+    COURSE_ENROLLED,
+    COURSE_UNENROLLED,
+    COURSE_COMPLETED,
+    COURSE_UNCOMPLETED,
+    COURSE_RATED,
+    LESSON_COMPLETED,
+    LESSON_UNCOMPLETED,
+)
+
+# Arbitrary key for pg_try_advisory_xact_lock; one reconciliation at a time
+RECONCILE_LOCK_ID = 703_600_001
+
+_COURSE_COUNTERS = ("enrollments", "completions", "lesson_completions", "rating_sum", "rating_count")
+
+
+def _completion_rate(completions: int, enrollments: int) -> float:
+    if enrollments <= 0:
+        return 0.0
+    return min(100.0, completions * 100.0 / enrollments)
+
+
+def _average_rating(rating_sum: int, rating_count: int) -> Optional[float]:
+    return rating_sum / rating_count if rating_count else None
+
+
+async def _apply_course_deltas(session: AsyncSession, course_id: int, **deltas: int) -> None:
+    """Add counter deltas to a course rollup and refresh the course's derived columns."""
+    row = {name: deltas.get(name, 0) for name in _COURSE_COUNTERS}
+    stmt = pg_insert(CourseStatsRollup).values(course_id=course_id, **row)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CourseStatsRollup.course_id],
+        set_={
+            **{name: getattr(CourseStatsRollup, name) + stmt.excluded[name] for name in _COURSE_COUNTERS},
+            "updated_at": func.now(),
+        },
+    ).returning(
+        CourseStatsRollup.enrollments,
+        CourseStatsRollup.completions,
+        CourseStatsRollup.rating_sum,
+        CourseStatsRollup.rating_count,
+    )
+    enrollments, completions, rating_sum, rating_count = (await session.execute(stmt)).one()
+
+    await session.execute(
+        update(Course)
+        .where(Course.id == course_id)
+        .values(
+            completion_rate=_completion_rate(completions, enrollments),
+            average_rating=_average_rating(rating_sum, rating_count),
+            # Analytics refreshes are not content edits
+            updated_at=Course.updated_at,
+        )
+    )
+
+
+async def _apply_lesson_delta(session: AsyncSession, lesson_id: int, course_id: int, delta: int) -> None:
+    stmt = pg_insert(LessonStatsRollup).values(lesson_id=lesson_id, course_id=course_id, completions=delta)
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=[LessonStatsRollup.lesson_id],
+        set_={
+            "completions": LessonStatsRollup.completions + stmt.excluded.completions,
+            "updated_at": func.now(),
+        },
+    ))
+
+
+@outbox_relay.register(COURSE_ENROLLED, CONSUMER)
+async def _on_enrolled(session: AsyncSession, event: OutboxEvent) -> None:
+    await _apply_course_deltas(session, event.payload["course_id"], enrollments=1)
+
+
+@outbox_relay.register(COURSE_UNENROLLED, CONSUMER)
+async def _on_unenrolled(session: AsyncSession, event: OutboxEvent) -> None:
+    await _apply_course_deltas(session, event.payload["course_id"], enrollments=-1)
+
+
+@outbox_relay.register(COURSE_COMPLETED, CONSUMER)
+async def _on_course_completed(session: AsyncSession, event: OutboxEvent) -> None:
+    await _apply_course_deltas(session, event.payload["course_id"], completions=1)
+
+
+@outbox_relay.register(COURSE_UNCOMPLETED, CONSUMER)
+async def _on_course_uncompleted(session: AsyncSession, event: OutboxEvent) -> None:
+    await _apply_course_deltas(session, event.payload["course_id"], completions=-1)
+
+
+@outbox_relay.register(COURSE_RATED, CONSUMER)
+async def _on_rated(session: AsyncSession, event: OutboxEvent) -> None:
+    previous = event.payload.get("previous_rating")
+    await _apply_course_deltas(
+        session,
+        event.payload["course_id"],
+        rating_sum=event.payload["rating"] - (previous or 0),
+        rating_count=0 if previous is not None else 1,
+    )
+
+
+@outbox_relay.register(LESSON_COMPLETED, CONSUMER)
+async def _on_lesson_completed(session: AsyncSession, event: OutboxEvent) -> None:
+    payload = event.payload
+    await _apply_lesson_delta(session, payload["lesson_id"], payload["course_id"], 1)
+    await _apply_course_deltas(session, payload["course_id"], lesson_completions=1)
+
+
+@outbox_relay.register(LESSON_UNCOMPLETED, CONSUMER)
+async def _on_lesson_uncompleted(session: AsyncSession, event: OutboxEvent) -> None:
+    payload = event.payload
+    await _apply_lesson_delta(session, payload["lesson_id"], payload["course_id"], -1)
+    await _apply_course_deltas(session, payload["course_id"], lesson_completions=-1)
+
+
+class CourseStatsService:
+    """Service class for course analytics reads and ratings."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_course_stats(self, course_id: int) -> CourseStats:
+        """Read precomputed stats for a course."""
+        try:
+            result = await self.db.execute(
+                select(Course.view_count, CourseStatsRollup)
+                .outerjoin(CourseStatsRollup, CourseStatsRollup.course_id == Course.id)
+                .where(Course.id == course_id)
+            )
+            row = result.one_or_none()
+            lessons = (await self.db.execute(
+                select(Lesson.id, Lesson.title, LessonStatsRollup.completions)
+                .outerjoin(LessonStatsRollup, LessonStatsRollup.lesson_id == Lesson.id)
+                .where(Lesson.course_id == course_id)
+                .order_by(Lesson.order_index)
+            )).all() if row is not None else []
+        except Exception as e:
+            logger.error("Failed to get course stats", course_id=course_id, error=str(e))
+            raise DatabaseException("Failed to retrieve course stats", error_code="COURSE_STATS_FETCH_ERROR")
+
+        if row is None:
+            raise CourseNotFoundException("Course not found", error_code="COURSE_NOT_FOUND")
+
+        view_count, rollup = row
+        counters = {name: getattr(rollup, name) if rollup else 0 for name in _COURSE_COUNTERS}
+        enrollments = counters["enrollments"]
+        return CourseStats(
+            total_enrollments=enrollments,
+            active_learners=max(0, enrollments - counters["completions"]),
+            completion_rate=_completion_rate(counters["completions"], enrollments),
+            average_rating=_average_rating(counters["rating_sum"], counters["rating_count"]) or 0.0,
+            total_reviews=counters["rating_count"],
+            lesson_completion_rates=[
+                {
+                    "lesson_id": lesson_id,
+                    "title": title,
+                    "completions": completions or 0,
+                    "completion_rate": _completion_rate(completions or 0, enrollments),
+                }
+                for lesson_id, title, completions in lessons
+            ],
+            engagement_metrics={
+                "view_count": view_count,
+                "lesson_completions": counters["lesson_completions"],
+                "updated_at": rollup.updated_at if rollup else None,
+            },
+        )
+
+    async def rate_course(self, user_id: int, course_id: int, rating: int) -> None:
+        """Record a learner's rating of a course they are enrolled in."""
+        try:
+            result = await self.db.execute(
+                select(UserProgress)
+                .where(UserProgress.user_id == user_id, UserProgress.course_id == course_id)
+                .with_for_update()
+            )
+            progress = result.scalar_one_or_none()
+            if progress is None:
+                raise CourseNotFoundException("Not enrolled in course", error_code="COURSE_NOT_ENROLLED")
+
+            previous = progress.rating
+            if previous == rating:
+                return
+            progress.rating = rating
+            add_outbox_event(self.db, COURSE_RATED, "course", course_id, {
+                "user_id": user_id,
+                "course_id": course_id,
+                "rating": rating,
+                "previous_rating": previous,
+            })
+            await self.db.commit()
+            logger.info("Course rated", user_id=user_id, course_id=course_id, rating=rating)
+        except CourseNotFoundException:
+            raise
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to rate course", user_id=user_id, course_id=course_id, error=str(e))
+            raise DatabaseException("Failed to rate course", error_code="COURSE_RATING_ERROR")
+
+
+async def _recompute(session: AsyncSession) -> Tuple[Dict[int, Dict[str, int]], Dict[int, Tuple[int, int]]]:
+    """Full-scan recompute of every course and lesson rollup."""
+    courses: Dict[int, Dict[str, int]] = {}
+    result = await session.execute(
+        select(
+            UserProgress.course_id,
+            func.count().filter(UserProgress.is_enrolled),
+            func.count().filter(UserProgress.is_completed),
+            func.coalesce(func.sum(UserProgress.rating), 0),
+            func.count(UserProgress.rating),
+        ).group_by(UserProgress.course_id)
+    )
+    for course_id, enrollments, completions, rating_sum, rating_count in result:
+        courses[course_id] = {
+            "enrollments": enrollments,
+            "completions": completions,
+            "lesson_completions": 0,
+            "rating_sum": int(rating_sum),
+            "rating_count": rating_count,
+        }
+
+    lessons: Dict[int, Tuple[int, int]] = {}
+    result = await session.execute(
+        select(Lesson.id, Lesson.course_id, func.count())
+        .join(LessonProgress, LessonProgress.lesson_id == Lesson.id)
+        .where(LessonProgress.is_completed.is_(True))
+        .group_by(Lesson.id, Lesson.course_id)
+    )
+    for lesson_id, course_id, completions in result:
+        lessons[lesson_id] = (course_id, completions)
+        course = courses.setdefault(course_id, dict.fromkeys(_COURSE_COUNTERS, 0))
+        course["lesson_completions"] += completions
+    return courses, lessons
+
+
+async def reconcile_course_stats() -> int:
+    """Rebuild course and lesson rollups from source tables; returns drifted courses.
+
+    Runs in one REPEATABLE READ transaction. Rollup events still pending in the
+    outbox describe changes already visible in the snapshot, so they are
+    marked consumed instead of being applied twice; concurrent relay updates
+    to the same rows surface as serialization failures and are retried on
+    the next run.
+    """
+    async with AsyncSessionLocal() as session:
+        await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        if not await session.scalar(select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK_ID))):
+            return 0
+
+        courses, lessons = await _recompute(session)
+        stored = {
+            rollup.course_id: {name: getattr(rollup, name) for name in _COURSE_COUNTERS}
+            for rollup in (await session.execute(select(CourseStatsRollup))).scalars()
+        }
+
+        drifted = 0
+        for course_id in set(courses) | set(stored):
+            expected = courses.get(course_id, dict.fromkeys(_COURSE_COUNTERS, 0))
+            actual = stored.get(course_id, dict.fromkeys(_COURSE_COUNTERS, 0))
+            if expected != actual:
+                drifted += 1
+                logger.warning("Course rollup drift", course_id=course_id, expected=expected, actual=actual)
+            courses[course_id] = expected
+
+        now = datetime.now(timezone.utc)
+        if courses:
+            stmt = pg_insert(CourseStatsRollup).values([
+                {"course_id": course_id, **counters, "updated_at": now, "reconciled_at": now}
+                for course_id, counters in sorted(courses.items())
+            ])
+            await session.execute(stmt.on_conflict_do_update(
+                index_elements=[CourseStatsRollup.course_id],
+                set_={name: stmt.excluded[name] for name in (*_COURSE_COUNTERS, "updated_at", "reconciled_at")},
+            ))
+            await session.execute(
+                update(Course)
+                .where(Course.id == CourseStatsRollup.course_id)
+                .values(
+                    completion_rate=case(
+                        (CourseStatsRollup.enrollments > 0, func.least(
+                            100.0, CourseStatsRollup.completions * 100.0 / CourseStatsRollup.enrollments
+                        )),
+                        else_=0.0,
+                    ),
+                    average_rating=CourseStatsRollup.rating_sum * 1.0 / func.nullif(CourseStatsRollup.rating_count, 0),
+                    updated_at=Course.updated_at,
+                )
+            )
+
+        stale_lessons = LessonStatsRollup.lesson_id.not_in(list(lessons)) if lessons else true()
+        await session.execute(
+            update(LessonStatsRollup)
+            .where(stale_lessons, LessonStatsRollup.completions != 0)
+            .values(completions=0, updated_at=now)
+        )
+        if lessons:
+            stmt = pg_insert(LessonStatsRollup).values([
+                {"lesson_id": lesson_id, "course_id": course_id, "completions": completions, "updated_at": now}
+                for lesson_id, (course_id, completions) in sorted(lessons.items())
+            ])
+            await session.execute(stmt.on_conflict_do_update(
+                index_elements=[LessonStatsRollup.lesson_id],
+                set_={"completions": stmt.excluded.completions, "updated_at": now},
+            ))
+
+        # Pending events are already reflected in the recomputed snapshot
+        await session.execute(
+            insert(ConsumedEvent).from_select(
+                ["event_id", "consumer"],
+                select(OutboxEvent.id, literal(CONSUMER))
+                .where(
+                    OutboxEvent.processed_at.is_(None),
+                    OutboxEvent.failed_at.is_(None),
+                    OutboxEvent.event_type.in_(ROLLUP_EVENTS),
+                    OutboxEvent.id.not_in(
+                        select(ConsumedEvent.event_id).where(ConsumedEvent.consumer == CONSUMER)
+                    ),
+                ),
+            )
+        )
+        await session.commit()
+
+    logger.info("Course rollups reconciled", courses=len(courses), lessons=len(lessons), drifted=drifted)
+    return drifted
+
+
+async def run_rollup_reconciler(interval_hours: float) -> None:
+    """Reconcile rollups every ``interval_hours`` until cancelled."""
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            await reconcile_course_stats()
+        except Exception as e:
+            logger.error("Course rollup reconciliation failed", error=str(e))
@@ -0,0 +1,553 @@
+"""
+Quiz grading against cached, precompiled answer keys
+
+Each quiz is compiled once into an ``AnswerKey``: per question, the correct
+option ids (or accepted texts for short answers), points and concept tags.
+Keys are cached per process by quiz version (``Quiz.updated_at``), so
+grading a submission reads one quiz column and a change made by any process
+applies to the next submission. Attempt numbers are
+unique per learner and quiz, which makes ``max_attempts`` hold under
+concurrent submissions. Changing a question's correct options regrades all
+stored attempts for the quiz with NumPy.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import JSON, Boolean, Float, Integer, case, column, func, select, update, values
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.cache import VersionedCache
+from app.core.exceptions import DatabaseException, QuizNotFoundException, ValidationException
+from app.models.progress import QuizAttempt
+from app.models.quiz import Quiz, QuizAnswer, QuizQuestion
+from app.schemas.quiz import (
+    QuestionResult,
+    QuizAttemptCreate,
+    QuizAttemptResponse,
+    RegradeResponse,
+    SubmittedAnswer,
+)
+from app.services.item_stats_service import rebuild_question_stats
+from app.services.knowledge_tracing import rebuild_concept_states
+from app.services.outbox import QUIZ_ATTEMPTED, add_outbox_event
+from app.services.quiz_delivery import question_order
+
+logger = structlog.get_logger()
+
+# Rows per regrade write; 8 binds per row stays under asyncpg's 32767 limit
+REGRADE_CHUNK_SIZE = 4000
+
+ATTEMPT_NUMBER_CONSTRAINT = "uq_quiz_attempts_user_quiz_number"
+
+
+@dataclass(frozen=True)
+class CompiledQuestion:
+    """Everything needed to grade one question."""
+    question_id: int
+    question_type: str
+    points: int
+    correct_ids: FrozenSet[int]
+    accepted_texts: FrozenSet[str]
+    concept_tags: Tuple[str, ...]
+    explanation: Optional[str]
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """A quiz compiled for grading, questions in quiz order."""
+    quiz_id: int
+    version: datetime  # Quiz.updated_at the key was compiled from
+    lesson_id: int
+    max_attempts: int
+    passing_score: float
+    show_correct_answers: bool
+    show_explanations: bool
+    randomize_questions: bool
+    questions: Tuple[CompiledQuestion, ...]
+
+    @property
+    def total_points(self) -> int:
+        return sum(question.points for question in self.questions)
+
+
+@dataclass
+class GradedAttempt:
+    """Result of grading one submission."""
+    points_earned: int
+    total_points: int
+    score: float
+    is_passed: bool
+    questions_correct: int
+    questions_incorrect: int
+    questions_skipped: int
+    answers: Dict[str, Dict]
+    results: List[QuestionResult]
+    observations: List[Tuple[str, bool]]
+    responses: List[Tuple[int, bool, Optional[float]]]  # (question id, correct, seconds) per answered question
+
+
+def _normalize(text: Optional[str]) -> str:
+    return " ".join((text or "").split()).casefold()
+
+
+def is_correct(question: CompiledQuestion, answer: SubmittedAnswer) -> bool:
+    if question.question_type == "short_answer":
+        return _normalize(answer.text) in question.accepted_texts
+    return frozenset(answer.answer_ids) == question.correct_ids
+
+
+def grade(key: AnswerKey, answers: Dict[int, SubmittedAnswer]) -> GradedAttempt:
+    """Grade a submission against a compiled key; pure, no I/O."""
+    earned = correct = skipped = 0
+    stored, results, observations, responses = {}, [], [], []
+    for question in key.questions:
+        answer = answers.get(question.question_id)
+        if answer is None or (not answer.answer_ids and not (answer.text or "").strip()):
+            skipped += 1
+            results.append(QuestionResult(question_id=question.question_id, correct=False, points_earned=0))
+            continue
+
+        right = is_correct(question, answer)
+        points = question.points if right else 0
+        earned += points
+        correct += right
+        stored[str(question.question_id)] = {
+            "answer_ids": sorted(answer.answer_ids),
+            "text": answer.text,
+            "correct": right,
+            "points": points,
+            "time_seconds": answer.time_seconds,
+        }
+        observations.extend((tag, right) for tag in question.concept_tags)
+        responses.append((question.question_id, right, answer.time_seconds))
+        results.append(QuestionResult(
+            question_id=question.question_id,
+            correct=right,
+            points_earned=points,
+            correct_answer_ids=sorted(question.correct_ids) if key.show_correct_answers else None,
+            explanation=question.explanation if key.show_explanations else None,
+        ))
+
+    total = key.total_points
+    score = earned / total if total else 0.0
+    return GradedAttempt(
+        points_earned=earned,
+        total_points=total,
+        score=score,
+        is_passed=score >= key.passing_score,
+        questions_correct=correct,
+        questions_incorrect=len(key.questions) - correct - skipped,
+        questions_skipped=skipped,
+        answers=stored,
+        results=results,
+        observations=observations,
+        responses=responses,
+    )
+
+
+async def compile_answer_key(session: AsyncSession, quiz_id: int) -> AnswerKey:
+    """Build a quiz's answer key with two queries."""
+    quiz = (await session.execute(
+        select(
+            Quiz.id,
+            Quiz.updated_at,
+            Quiz.lesson_id,
+            Quiz.max_attempts,
+            Quiz.passing_score,
+            Quiz.show_correct_answers,
+            Quiz.show_explanations,
+            Quiz.randomize_questions,
+        ).where(Quiz.id == quiz_id)
+    )).one_or_none()
+    if quiz is None:
+        raise QuizNotFoundException("Quiz not found", error_code="QUIZ_NOT_FOUND")
+
+    rows = (await session.execute(
+        select(
+            QuizQuestion.id,
+            QuizQuestion.question_type,
+            QuizQuestion.points,
+            QuizQuestion.concept_tags,
+            QuizQuestion.explanation,
+            QuizAnswer.id.label("answer_id"),
+            QuizAnswer.is_correct,
+            QuizAnswer.answer_text,
+        )
+        .outerjoin(QuizAnswer, QuizAnswer.question_id == QuizQuestion.id)
+        .where(QuizQuestion.quiz_id == quiz_id)
+        .order_by(QuizQuestion.order_index, QuizQuestion.id)
+    )).all()
+
+    questions: Dict[int, dict] = {}
+    for row in rows:
+        question = questions.setdefault(row.id, {
+            "question_id": row.id,
+            "question_type": row.question_type,
+            "points": row.points,
+            "correct_ids": set(),
+            "accepted_texts": set(),
+            "concept_tags": tuple(row.concept_tags or ()),
+            "explanation": row.explanation,
+        })
+        if row.is_correct:
+            question["correct_ids"].add(row.answer_id)
+            question["accepted_texts"].add(_normalize(row.answer_text))
+
+    return AnswerKey(
+        quiz_id=quiz.id,
+        version=quiz.updated_at,
+        lesson_id=quiz.lesson_id,
+        max_attempts=quiz.max_attempts,
+        passing_score=quiz.passing_score,
+        show_correct_answers=quiz.show_correct_answers,
+        show_explanations=quiz.show_explanations,
+        randomize_questions=quiz.randomize_questions,
+        questions=tuple(
+            CompiledQuestion(**{
+                **question,
+                "correct_ids": frozenset(question["correct_ids"]),
+                "accepted_texts": frozenset(question["accepted_texts"]),
+            })
+            for question in questions.values()
+        ),
+    )
+
+
+# Keyed by Quiz.updated_at: anything that changes a quiz's questions or
+# answers must touch it
+answer_key_cache: VersionedCache[int, AnswerKey] = VersionedCache("answer_key", compile_answer_key)
+
+
+@dataclass
+class RegradeResult:
+    """Per-attempt outcome of ``regrade``, aligned with the input order."""
+    earned: np.ndarray
+    correct: np.ndarray
+    skipped: np.ndarray
+    flipped: np.ndarray  # Any question's correctness changed
+    answers: List[Dict[str, Dict]]  # Rebuilt only where flipped
+
+
+def regrade(key: AnswerKey, stored_answers: List[Dict[str, Dict]]) -> RegradeResult:
+    """Regrade stored attempts against a key in one pass.
+
+    Stored answers are unpacked once into an attempts x questions grid of
+    option bitmasks; correctness of every cell is then a single array
+    comparison against the key's masks.
+    """
+    n_attempts, n_questions = len(stored_answers), len(key.questions)
+    answered = np.zeros((n_attempts, n_questions), dtype=bool)
+    was_correct = np.zeros((n_attempts, n_questions), dtype=bool)
+    selected = np.zeros((n_attempts, n_questions), dtype=np.int64)
+
+    # One bit per correct option, numbered within its question; any other
+    # option sets a bit no key mask contains
+    bits = [
+        {answer_id: 1 << i for i, answer_id in enumerate(sorted(question.correct_ids))}
+        for question in key.questions
+    ]
+    key_masks = np.array([sum(b.values()) for b in bits], dtype=np.int64)
+    columns = {str(question.question_id): j for j, question in enumerate(key.questions)}
+
+    # Unpack into flat cell lists, then scatter into the grid in one go
+    cell_rows, cell_columns, cell_masks, cell_correct = [], [], [], []
+    for i, answers in enumerate(stored_answers):
+        for question_id, answer in answers.items():
+            j = columns.get(question_id)
+            if j is None:
+                continue
+            question_bits = bits[j]
+            wrong_bit = 1 << len(question_bits)
+            mask = 0
+            for answer_id in answer.get("answer_ids") or ():
+                mask |= question_bits.get(answer_id, wrong_bit)
+            cell_rows.append(i)
+            cell_columns.append(j)
+            cell_masks.append(mask)
+            cell_correct.append(bool(answer.get("correct")))
+    answered[cell_rows, cell_columns] = True
+    selected[cell_rows, cell_columns] = cell_masks
+    was_correct[cell_rows, cell_columns] = cell_correct
+
+    correct = answered & (selected == key_masks)
+    for j, question in enumerate(key.questions):
+        if question.question_type != "short_answer":
+            continue
+        question_id = str(question.question_id)
+        for i in np.flatnonzero(answered[:, j]):
+            correct[i, j] = _normalize(stored_answers[i][question_id].get("text")) in question.accepted_texts
+
+    points = np.array([question.points for question in key.questions], dtype=np.int64)
+    earned = correct * points
+    flipped = (correct != was_correct).any(axis=1)
+
+    answers = list(stored_answers)
+    for i in np.flatnonzero(flipped):
+        rebuilt = {}
+        for question_id, answer in stored_answers[i].items():
+            j = columns.get(question_id)
+            rebuilt[question_id] = answer if j is None else {
+                **answer, "correct": bool(correct[i, j]), "points": int(earned[i, j]),
+            }
+        answers[i] = rebuilt
+
+    return RegradeResult(
+        earned=earned.sum(axis=1),
+        correct=correct.sum(axis=1),
+        skipped=n_questions - answered.sum(axis=1),
+        flipped=flipped,
+        answers=answers,
+    )
+
+
+def _regrade_statement(rows: List[tuple]):
+    data = values(
+        column("id", Integer),
+        column("score", Float),
+        column("points_earned", Integer),
+        column("total_points", Integer),
+        column("is_passed", Boolean),
+        column("questions_correct", Integer),
+        column("questions_incorrect", Integer),
+        column("answers", JSON),
+        name="v",
+    ).data(rows)
+    table = QuizAttempt.__table__
+    return (
+        update(table)
+        .where(table.c.id == data.c.id)
+        .values(
+            score=data.c.score,
+            points_earned=data.c.points_earned,
+            total_points=data.c.total_points,
+            is_passed=data.c.is_passed,
+            questions_correct=data.c.questions_correct,
+            questions_incorrect=data.c.questions_incorrect,
+            answers=data.c.answers,
+        )
+    )
+
+
+def _violated_constraint(error: IntegrityError) -> Optional[str]:
+    """Name of the constraint behind an integrity error, from the driver's error."""
+    orig = error.orig
+    # asyncpg errors are chained behind SQLAlchemy's DBAPI adapter; psycopg has diag
+    for candidate in (getattr(orig, "__cause__", None), orig):
+        name = getattr(candidate, "constraint_name", None)
+        if name:
+            return name
+    diag = getattr(orig, "diag", None)
+    return getattr(diag, "constraint_name", None)
+
+
+class QuizGradingService:
+    """Service class for grading quiz attempts."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def submit_attempt(self, user_id: int, quiz_id: int, submission: QuizAttemptCreate) -> QuizAttemptResponse:
+        """Grade and record an attempt, enforcing the quiz's attempt limit."""
+        try:
+            version = await self.db.scalar(select(Quiz.updated_at).where(Quiz.id == quiz_id))
+            if version is None:
+                raise QuizNotFoundException("Quiz not found", error_code="QUIZ_NOT_FOUND")
+            key = await answer_key_cache.get(self.db, quiz_id, version)
+            graded = grade(key, submission.answers)
+            completed_at = datetime.now(timezone.utc)
+            started_at = submission.started_at or completed_at
+            if started_at.tzinfo is None:
+                started_at = started_at.replace(tzinfo=timezone.utc)
+            started_at = min(started_at, completed_at)
+
+            attempt = await self._insert_attempt(user_id, key, dict(
+                user_id=user_id,
+                quiz_id=quiz_id,
+                score=graded.score,
+                points_earned=graded.points_earned,
+                total_points=graded.total_points,
+                time_taken_minutes=int((completed_at - started_at).total_seconds() // 60),
+                started_at=started_at,
+                completed_at=completed_at,
+                is_passed=graded.is_passed,
+                answers=graded.answers,
+                questions_correct=graded.questions_correct,
+                questions_incorrect=graded.questions_incorrect,
+                questions_skipped=graded.questions_skipped,
+            ))
+
+            add_outbox_event(self.db, QUIZ_ATTEMPTED, "quiz", quiz_id, {
+                "user_id": user_id,
+                "quiz_id": quiz_id,
+                "lesson_id": key.lesson_id,
+                "attempt_id": attempt.id,
+                "score": graded.score,
+                "observations": graded.observations,
+                "responses": graded.responses,
+                "occurred_at": completed_at.isoformat(),
+            })
+            await self.db.commit()
+        except (QuizNotFoundException, ValidationException):
+            await self.db.rollback()
+            raise
+        except Exception as e:
+            await self.db.rollback()
+            if isinstance(e, IntegrityError):
+                # e.g. the quiz was deleted while its key was still cached
+                answer_key_cache.invalidate(quiz_id)
+            logger.error("Failed to submit quiz attempt", user_id=user_id, quiz_id=quiz_id, error=str(e))
+            raise DatabaseException("Failed to submit quiz attempt", error_code="QUIZ_ATTEMPT_ERROR")
+
+        logger.info(
+            "Quiz attempt graded",
+            user_id=user_id,
+            quiz_id=quiz_id,
+            attempt_number=attempt.attempt_number,
+            score=graded.score,
+        )
+        return QuizAttemptResponse(
+            id=attempt.id,
+            quiz_id=quiz_id,
+            attempt_number=attempt.attempt_number,
+            attempts_remaining=max(0, key.max_attempts - attempt.attempt_number),
+            score=graded.score,
+            points_earned=graded.points_earned,
+            total_points=graded.total_points,
+            is_passed=graded.is_passed,
+            questions_correct=graded.questions_correct,
+            questions_incorrect=graded.questions_incorrect,
+            questions_skipped=graded.questions_skipped,
+            completed_at=completed_at,
+            results=graded.results,
+        )
+
+    async def _insert_attempt(self, user_id: int, key: AnswerKey, fields: Dict) -> QuizAttempt:
+        """Insert with the next free attempt number.
+
+        A concurrent submission taking the same number violates the unique
+        constraint; the savepoint is rolled back and the next number tried,
+        until the limit is reached. Any other integrity error is raised.
+        """
+        while True:
+            used = await self.db.scalar(
+                select(func.coalesce(func.max(QuizAttempt.attempt_number), 0))
+                .where(QuizAttempt.user_id == user_id, QuizAttempt.quiz_id == key.quiz_id)
+            )
+            if used >= key.max_attempts:
+                raise ValidationException("Maximum attempts reached", error_code="MAX_ATTEMPTS_REACHED")
+
+            attempt = QuizAttempt(**fields, attempt_number=used + 1)
+            if key.randomize_questions:
+                # The order the learner was served for this attempt number
+                attempt.question_order = question_order(
+                    key.quiz_id, user_id, attempt.attempt_number, [q.question_id for q in key.questions]
+                )
+            try:
+                async with self.db.begin_nested():
+                    self.db.add(attempt)
+                    await self.db.flush()
+                return attempt
+            except IntegrityError as e:
+                if _violated_constraint(e) != ATTEMPT_NUMBER_CONSTRAINT:
+                    raise
+
+    async def set_correct_answers(self, quiz_id: int, question_id: int, correct_answer_ids: List[int]) -> RegradeResponse:
+        """Change a question's correct options and regrade the quiz's attempts."""
+        try:
+            answer_ids = set((await self.db.execute(
+                select(QuizAnswer.id)
+                .join(QuizQuestion, QuizQuestion.id == QuizAnswer.question_id)
+                .where(QuizAnswer.question_id == question_id, QuizQuestion.quiz_id == quiz_id)
+            )).scalars())
+            if not answer_ids:
+                raise QuizNotFoundException("Question not found", error_code="QUESTION_NOT_FOUND")
+            if not set(correct_answer_ids) <= answer_ids:
+                raise ValidationException("Unknown answer option", error_code="INVALID_ANSWER_OPTION")
+
+            await self.db.execute(
+                update(QuizAnswer)
+                .where(QuizAnswer.question_id == question_id)
+                .values(is_correct=case((QuizAnswer.id.in_(correct_answer_ids), True), else_=False))
+            )
+            await self.db.execute(update(Quiz).where(Quiz.id == quiz_id).values(updated_at=func.now()))
+            answer_key_cache.invalidate(quiz_id)
+
+            regraded, changed = await self.regrade_quiz(quiz_id)
+            await self.db.commit()
+        except (QuizNotFoundException, ValidationException):
+            await self.db.rollback()
+            raise
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to update answer key", quiz_id=quiz_id, question_id=question_id, error=str(e))
+            raise DatabaseException("Failed to update answer key", error_code="ANSWER_KEY_UPDATE_ERROR")
+        finally:
+            # Also drop any key compiled from the rolled-back state
+            answer_key_cache.invalidate(quiz_id)
+
+        logger.info("Quiz regraded", quiz_id=quiz_id, attempts=regraded, changed=changed)
+        return RegradeResponse(quiz_id=quiz_id, attempts_regraded=regraded, attempts_changed=changed)
+
+    async def regrade_quiz(self, quiz_id: int) -> Tuple[int, int]:
+        """Regrade every stored attempt in the caller's transaction.
+
+        Returns (attempts regraded, attempts whose result changed); only rows
+        that differ are written. Concept estimates of learners with any answer
+        whose correctness flipped are rebuilt from their history, as are the
+        quiz's item statistics.
+        """
+        key = await compile_answer_key(self.db, quiz_id)
+        attempts = (await self.db.execute(
+            select(
+                QuizAttempt.id,
+                QuizAttempt.user_id,
+                QuizAttempt.answers,
+                QuizAttempt.points_earned,
+                QuizAttempt.total_points,
+                QuizAttempt.is_passed,
+            )
+            .where(QuizAttempt.quiz_id == quiz_id)
+            .order_by(QuizAttempt.id)
+            .with_for_update()
+        )).all()
+        if not attempts:
+            return 0, 0
+
+        result = regrade(key, [attempt.answers or {} for attempt in attempts])
+        total = key.total_points
+        scores = result.earned / total if total else np.zeros(len(attempts))
+        passed = scores >= key.passing_score
+        before = np.array([attempt.points_earned for attempt in attempts])
+        was_passed = np.array([attempt.is_passed for attempt in attempts])
+        was_total = np.array([attempt.total_points for attempt in attempts])
+        changed = np.flatnonzero((result.earned != before) | (passed != was_passed))
+        stale = np.flatnonzero(result.flipped | (result.earned != before) | (passed != was_passed) | (was_total != total))
+
+        rows = [
+            (
+                attempts[i].id,
+                float(scores[i]),
+                int(result.earned[i]),
+                total,
+                bool(passed[i]),
+                int(result.correct[i]),
+                len(key.questions) - int(result.correct[i]) - int(result.skipped[i]),
+                result.answers[i],
+            )
+            for i in stale
+        ]
+        for start in range(0, len(rows), REGRADE_CHUNK_SIZE):
+            await self.db.execute(_regrade_statement(rows[start:start + REGRADE_CHUNK_SIZE]))
+
+        # Zero-point questions can flip correctness without moving the score
+        affected_users = sorted({attempts[i].user_id for i in np.flatnonzero(result.flipped)})
+        if affected_users:
+            await rebuild_concept_states(self.db, affected_users)
+        if len(stale):
+            await rebuild_question_stats(self.db, quiz_id)
+        return len(attempts), len(changed)
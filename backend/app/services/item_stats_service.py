@@ -0,0 +1,309 @@
+"""
+Item statistics and adaptive question selection
+
+An outbox consumer adds each graded attempt's responses to running sums in
+``question_stats``; item difficulty (p-value), discrimination (point-biserial
+correlation with the attempt score) and average answer time are derived from
+those sums. For selection, a quiz's items are held in a per-process index of
+NumPy arrays, so assembling an adaptive question set is a couple of array
+operations over the quiz's questions.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.exceptions import DatabaseException, QuizNotFoundException
+from app.models.outbox import ConsumedEvent, OutboxEvent
+from app.models.progress import QuizAttempt
+from app.models.quiz import Quiz, QuizQuestion
+from app.models.stats import QuestionStatsRollup
+from app.schemas.quiz import QuestionStats
+from app.services.outbox import QUIZ_ATTEMPTED, outbox_relay
+from app.services.quiz_delivery import quiz_payload_cache
+
+logger = structlog.get_logger()
+
+CONSUMER = "item_stats"
+
+# Expected share of correct answers implied by the author's difficulty label
+DIFFICULTY_PRIORS = {"easy": 0.8, "medium": 0.6, "hard": 0.4}
+# Pseudo-responses behind the prior; real responses outweigh it quickly
+PRIOR_WEIGHT = 10
+# How much discrimination can offset distance from the target difficulty
+DISCRIMINATION_WEIGHT = 0.1
+
+_SUM_COLUMNS = (
+    "responses",
+    "correct",
+    "score_sum",
+    "score_sq_sum",
+    "correct_score_sum",
+    "time_sum_seconds",
+    "timed_responses",
+)
+
+
+def item_metrics(
+    responses: np.ndarray,
+    correct: np.ndarray,
+    score_sum: np.ndarray,
+    score_sq_sum: np.ndarray,
+    correct_score_sum: np.ndarray,
+    time_sum: np.ndarray,
+    timed: np.ndarray,
+    prior: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized (p-value, discrimination, average seconds) from running sums.
+
+    The p-value is shrunk toward ``prior`` so new items start at their
+    declared difficulty. Discrimination is the Pearson correlation between
+    correctness and attempt score, 0 where it is undefined.
+    """
+    p_value = (correct + prior * PRIOR_WEIGHT) / (responses + PRIOR_WEIGHT)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = responses * correct_score_sum - correct * score_sum
+        spread = np.sqrt((responses * correct - correct ** 2) * (responses * score_sq_sum - score_sum ** 2))
+        discrimination = np.where(spread > 0, covariance / spread, 0.0)
+        avg_time = np.where(timed > 0, time_sum / timed, np.nan)
+    return p_value, np.clip(discrimination, -1.0, 1.0), avg_time
+
+
+@dataclass(frozen=True)
+class ItemIndex:
+    """A quiz's questions with their derived statistics, as arrays."""
+    question_ids: np.ndarray
+    p_values: np.ndarray
+    discrimination: np.ndarray
+    responses: np.ndarray
+    avg_time_seconds: np.ndarray
+
+
+def select_items(index: ItemIndex, count: int, target: float) -> List[int]:
+    """Question ids closest to ``target`` p-value, best match first.
+
+    Among similarly difficult items the more discriminating ones win.
+    """
+    n = len(index.question_ids)
+    if n == 0 or count <= 0:
+        return []
+    cost = np.abs(index.p_values - target) - DISCRIMINATION_WEIGHT * np.clip(index.discrimination, 0.0, 1.0)
+    k = min(count, n)
+    chosen = np.argpartition(cost, k - 1)[:k] if k < n else np.arange(n)
+    chosen = chosen[np.argsort(cost[chosen], kind="stable")]
+    return index.question_ids[chosen].tolist()
+
+
+async def build_item_index(session: AsyncSession, quiz_id: int) -> ItemIndex:
+    result = await session.execute(
+        select(QuizQuestion.id, QuizQuestion.difficulty_level, QuestionStatsRollup)
+        .outerjoin(QuestionStatsRollup, QuestionStatsRollup.question_id == QuizQuestion.id)
+        .where(QuizQuestion.quiz_id == quiz_id)
+        .order_by(QuizQuestion.order_index, QuizQuestion.id)
+    )
+    rows = result.all()
+    sums = np.array(
+        [[getattr(stats, name) if stats is not None else 0 for name in _SUM_COLUMNS] for _, _, stats in rows],
+        dtype=np.float64,
+    ).reshape(len(rows), len(_SUM_COLUMNS))
+    prior = np.array([DIFFICULTY_PRIORS.get(level, DIFFICULTY_PRIORS["medium"]) for _, level, _ in rows])
+    p_values, discrimination, avg_time = item_metrics(*sums.T, prior)
+    return ItemIndex(
+        question_ids=np.array([question_id for question_id, _, _ in rows], dtype=np.int64),
+        p_values=p_values,
+        discrimination=discrimination,
+        responses=sums[:, 0].astype(np.int64),
+        avg_time_seconds=avg_time,
+    )
+
+
+# Statistics drift slowly, so the TTL alone bounds staleness
+item_index_cache: TTLCache[int, ItemIndex] = TTLCache(
+    "item_index", settings.ITEM_STATS_CACHE_SECONDS, build_item_index
+)
+
+
+def _upsert_statement(rows: List[dict], accumulate: bool):
+    stmt = pg_insert(QuestionStatsRollup).values(rows)
+    set_ = {
+        name: (getattr(QuestionStatsRollup, name) + stmt.excluded[name]) if accumulate else stmt.excluded[name]
+        for name in _SUM_COLUMNS
+    }
+    set_["updated_at"] = stmt.excluded.updated_at
+    return stmt.on_conflict_do_update(index_elements=[QuestionStatsRollup.question_id], set_=set_)
+
+
+@outbox_relay.register(QUIZ_ATTEMPTED, CONSUMER)
+async def _on_quiz_attempted(session: AsyncSession, event: OutboxEvent) -> None:
+    payload = event.payload
+    score = payload["score"]
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "question_id": question_id,
+            "quiz_id": payload["quiz_id"],
+            "responses": 1,
+            "correct": int(correct),
+            "score_sum": score,
+            "score_sq_sum": score * score,
+            "correct_score_sum": score if correct else 0.0,
+            "time_sum_seconds": seconds or 0.0,
+            "timed_responses": int(seconds is not None),
+            "updated_at": now,
+        }
+        # Sorted so concurrent attempts lock rows in the same order
+        for question_id, correct, seconds in sorted(payload.get("responses", ()))
+    ]
+    if rows:
+        await session.execute(_upsert_statement(rows, accumulate=True))
+
+
+async def rebuild_question_stats(session: AsyncSession, quiz_id: int) -> int:
+    """Recompute a quiz's item statistics from stored attempts.
+
+    Runs in the caller's transaction; returns responses counted. Pending
+    attempt events for the quiz are marked consumed, as the recomputed sums
+    already include them.
+    """
+    question_ids = (await session.execute(
+        select(QuizQuestion.id).where(QuizQuestion.quiz_id == quiz_id).order_by(QuizQuestion.id)
+    )).scalars().all()
+    attempts = (await session.execute(
+        select(QuizAttempt.score, QuizAttempt.answers).where(QuizAttempt.quiz_id == quiz_id)
+    )).all()
+
+    columns = {str(question_id): j for j, question_id in enumerate(question_ids)}
+    cells, correct, scores, seconds = [], [], [], []
+    for score, answers in attempts:
+        for question_id, answer in (answers or {}).items():
+            j = columns.get(question_id)
+            if j is None:
+                continue
+            cells.append(j)
+            correct.append(bool(answer.get("correct")))
+            scores.append(score)
+            seconds.append(answer.get("time_seconds"))
+
+    n = len(question_ids)
+    cells = np.asarray(cells, dtype=np.int64)
+    x = np.asarray(correct, dtype=np.float64)
+    y = np.asarray(scores, dtype=np.float64)
+    t = np.array([np.nan if s is None else s for s in seconds], dtype=np.float64)
+    timed = ~np.isnan(t)
+    sums = {
+        "responses": np.bincount(cells, minlength=n),
+        "correct": np.bincount(cells[x > 0], minlength=n),
+        "score_sum": np.bincount(cells, weights=y, minlength=n),
+        "score_sq_sum": np.bincount(cells, weights=y * y, minlength=n),
+        "correct_score_sum": np.bincount(cells, weights=x * y, minlength=n),
+        "time_sum_seconds": np.bincount(cells[timed], weights=t[timed], minlength=n),
+        "timed_responses": np.bincount(cells[timed], minlength=n),
+    }
+
+    now = datetime.now(timezone.utc)
+    if question_ids:
+        await session.execute(_upsert_statement([
+            {
+                "question_id": question_id,
+                "quiz_id": quiz_id,
+                **{name: values[j].item() for name, values in sums.items()},
+                "updated_at": now,
+            }
+            for j, question_id in enumerate(question_ids)
+        ], accumulate=False))
+    await session.execute(
+        delete(QuestionStatsRollup).where(
+            QuestionStatsRollup.quiz_id == quiz_id,
+            QuestionStatsRollup.question_id.not_in(question_ids),
+        )
+    )
+    await session.execute(
+        insert(ConsumedEvent).from_select(
+            ["event_id", "consumer"],
+            select(OutboxEvent.id, literal(CONSUMER))
+            .where(
+                OutboxEvent.processed_at.is_(None),
+                OutboxEvent.failed_at.is_(None),
+                OutboxEvent.event_type == QUIZ_ATTEMPTED,
+                OutboxEvent.aggregate_id == quiz_id,
+                OutboxEvent.id.not_in(
+                    select(ConsumedEvent.event_id).where(ConsumedEvent.consumer == CONSUMER)
+                ),
+            ),
+        )
+    )
+    item_index_cache.invalidate(quiz_id)
+    return len(cells)
+
+
+class ItemStatsService:
+    """Service class for item statistics and adaptive selection."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_question_stats(self, quiz_id: int) -> List[QuestionStats]:
+        """Derived statistics for every question of a quiz."""
+        try:
+            if await self.db.scalar(select(Quiz.id).where(Quiz.id == quiz_id)) is None:
+                raise QuizNotFoundException("Quiz not found", error_code="QUIZ_NOT_FOUND")
+            index = await build_item_index(self.db, quiz_id)
+        except QuizNotFoundException:
+            raise
+        except Exception as e:
+            logger.error("Failed to get question stats", quiz_id=quiz_id, error=str(e))
+            raise DatabaseException("Failed to retrieve question stats", error_code="QUESTION_STATS_ERROR")
+
+        return [
+            QuestionStats(
+                question_id=question_id,
+                responses=responses,
+                p_value=p_value,
+                discrimination=discrimination,
+                avg_time_seconds=None if np.isnan(avg_time) else avg_time,
+            )
+            for question_id, responses, p_value, discrimination, avg_time in zip(
+                index.question_ids.tolist(),
+                index.responses.tolist(),
+                index.p_values.tolist(),
+                index.discrimination.tolist(),
+                index.avg_time_seconds.tolist(),
+            )
+        ]
+
+    async def get_adaptive_set(self, quiz_id: int, count: int, target: float) -> bytes:
+        """Serialized set of ``count`` questions pitched at ``target`` p-value.
+
+        Question bodies come from the cached quiz payload, so nothing is
+        serialized per request. Clients adapt by moving ``target`` between
+        sets: up after correct answers, down after misses.
+        """
+        try:
+            version = await self.db.scalar(select(Quiz.updated_at).where(Quiz.id == quiz_id))
+            if version is None:
+                raise QuizNotFoundException("Quiz not found", error_code="QUIZ_NOT_FOUND")
+            payload = await quiz_payload_cache.get(self.db, quiz_id, version)
+            index = await item_index_cache.get(self.db, quiz_id)
+        except QuizNotFoundException:
+            raise
+        except Exception as e:
+            logger.error("Failed to assemble adaptive quiz", quiz_id=quiz_id, error=str(e))
+            raise DatabaseException("Failed to assemble adaptive quiz", error_code="ADAPTIVE_QUIZ_ERROR")
+
+        # Questions added since the index was built are not offered until it refreshes
+        available = set(payload.question_ids)
+        selected = [question_id for question_id in select_items(index, count, target) if question_id in available]
+        return b"".join((
+            b'{"quiz_id":', str(quiz_id).encode(),
+            b',"target":', repr(float(target)).encode(),
+            b',"questions":[', b",".join(payload.fragments(selected)), b"]}",
+        ))
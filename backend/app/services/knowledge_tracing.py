@@ -0,0 +1,244 @@
+"""
+Per-concept mastery from quiz answers (Bayesian Knowledge Tracing)
+
+Every answered question is an observation of each of its ``concept_tags``.
+A learner's estimates live in one ``user_concept_states`` row, so applying an
+attempt costs one update per observation regardless of history length.
+Historical attempts can be replayed in bulk with NumPy: observations of
+different (learner, concept) pairs are independent, so step ``k`` of every
+pair is applied in one vectorized operation.
+
+Attempt answers are read from ``QuizAttempt.answers``, which maps question id
+to ``{"answer_ids": [...], "correct": bool}``.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.exceptions import DatabaseException
+from app.models.outbox import ConsumedEvent, OutboxEvent
+from app.models.progress import QuizAttempt, UserConceptState
+from app.models.quiz import QuizQuestion
+from app.schemas.progress import ConceptMastery, LearningAnalytics
+from app.services.outbox import QUIZ_ATTEMPTED, outbox_relay
+
+logger = structlog.get_logger()
+
+CONSUMER = "concept_mastery"
+
+# Replayed attempt ids per statement marking their events consumed
+MARK_CHUNK_SIZE = 10000
+
+# BKT parameters shared by all concepts
+P_INIT = 0.2  # Known before the first observation
+P_TRANSIT = 0.15  # Learned between observations
+P_SLIP = 0.1  # Wrong despite knowing
+P_GUESS = 0.2  # Right without knowing
+
+MASTERY_THRESHOLD = 0.95
+
+Observation = Tuple[str, bool]
+
+
+def bkt_update(p_known, correct):
+    """Posterior after one observation, then the learning transition.
+
+    Works element-wise on NumPy arrays as well as on scalars; ``correct`` is
+    1/0 (or a bool).
+    """
+    if_known = P_SLIP + correct * (1 - 2 * P_SLIP)
+    if_unknown = (1 - P_GUESS) + correct * (2 * P_GUESS - 1)
+    posterior = p_known * if_known / (p_known * if_known + (1 - p_known) * if_unknown)
+    return posterior + (1 - posterior) * P_TRANSIT
+
+
+def apply_observations(concepts: Dict[str, List[float]], observations: Iterable[Observation]) -> Dict[str, List[float]]:
+    """Fold observations into a concept state; returns a new mapping."""
+    state = {tag: list(value) for tag, value in concepts.items()}
+    for tag, correct in observations:
+        p_known, seen = state.get(tag, (P_INIT, 0))
+        state[tag] = [float(bkt_update(p_known, int(correct))), int(seen) + 1]
+    return state
+
+
+def replay(pair_index: np.ndarray, correct: np.ndarray, n_pairs: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Trace many (learner, concept) pairs at once from P_INIT.
+
+    ``pair_index`` and ``correct`` list observations in chronological order.
+    Returns (probability mastered, observation count) per pair.
+    """
+    counts = np.bincount(pair_index, minlength=n_pairs)
+    p_known = np.full(n_pairs, P_INIT)
+    if not len(pair_index):
+        return p_known, counts
+
+    # Position of each observation within its pair's history
+    by_pair = np.argsort(pair_index, kind="stable")
+    first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    step = np.empty_like(pair_index)
+    step[by_pair] = np.arange(len(pair_index)) - first[pair_index[by_pair]]
+
+    # Group observations by step; within a step every pair appears at most once
+    by_step = np.argsort(step, kind="stable")
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(step))))
+    pairs = pair_index[by_step]
+    outcomes = correct[by_step].astype(np.float64)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        idx = pairs[start:end]
+        p_known[idx] = bkt_update(p_known[idx], outcomes[start:end])
+    return p_known, counts
+
+
+def attempt_observations(answers: Dict, concept_tags: Dict[int, Sequence[str]]) -> List[Observation]:
+    """Observations for one attempt, one per tag of each answered question."""
+    observations = []
+    for question_id, answer in (answers or {}).items():
+        for tag in concept_tags.get(int(question_id)) or ():
+            observations.append((tag, bool(answer.get("correct"))))
+    return observations
+
+
+def split_by_mastery(concepts: Dict[str, List[float]], tags: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """Partition tags into (mastered, to review) by current estimate."""
+    mastered, to_review = [], []
+    for tag in sorted(set(tags)):
+        p_known = concepts.get(tag, (P_INIT, 0))[0]
+        (mastered if p_known >= MASTERY_THRESHOLD else to_review).append(tag)
+    return mastered, to_review
+
+
+async def _locked_state(session: AsyncSession, user_id: int) -> UserConceptState:
+    """Get or create the learner's concept state, locked for this transaction."""
+    await session.execute(
+        pg_insert(UserConceptState).values(user_id=user_id, concepts={}).on_conflict_do_nothing()
+    )
+    result = await session.execute(
+        select(UserConceptState)
+        .where(UserConceptState.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+@outbox_relay.register(QUIZ_ATTEMPTED, CONSUMER)
+async def _on_quiz_attempted(session: AsyncSession, event: OutboxEvent) -> None:
+    payload = event.payload
+    state = await _locked_state(session, payload["user_id"])
+    observations = [(tag, bool(correct)) for tag, correct in payload["observations"]]
+    state.concepts = apply_observations(state.concepts or {}, observations)
+
+    mastered, to_review = split_by_mastery(state.concepts, (tag for tag, _ in observations))
+    await session.execute(
+        update(QuizAttempt)
+        .where(QuizAttempt.id == payload["attempt_id"])
+        .values(concepts_mastered=mastered, concepts_to_review=to_review)
+    )
+
+
+async def rebuild_concept_states(session: AsyncSession, user_ids: Sequence[int]) -> int:
+    """Recompute the learners' concept states from their full attempt history.
+
+    Runs in the caller's transaction; returns observations replayed.
+    Pending attempt events for the replayed attempts are marked consumed,
+    as the rebuilt states already include them.
+    """
+    if not user_ids:
+        return 0
+    attempts = (await session.execute(
+        select(QuizAttempt.id, QuizAttempt.user_id, QuizAttempt.quiz_id, QuizAttempt.answers)
+        .where(QuizAttempt.user_id.in_(list(user_ids)))
+        .order_by(QuizAttempt.completed_at, QuizAttempt.id)
+    )).all()
+
+    quiz_ids = {attempt.quiz_id for attempt in attempts}
+    concept_tags = {}
+    if quiz_ids:
+        result = await session.execute(
+            select(QuizQuestion.id, QuizQuestion.concept_tags).where(QuizQuestion.quiz_id.in_(quiz_ids))
+        )
+        concept_tags = {question_id: tags for question_id, tags in result.all() if tags}
+
+    pairs: Dict[Tuple[int, str], int] = {}
+    pair_index, correct = [], []
+    for attempt in attempts:
+        for tag, is_correct in attempt_observations(attempt.answers, concept_tags):
+            pair_index.append(pairs.setdefault((attempt.user_id, tag), len(pairs)))
+            correct.append(is_correct)
+
+    p_known, counts = replay(
+        np.asarray(pair_index, dtype=np.int64), np.asarray(correct, dtype=bool), len(pairs)
+    )
+    states: Dict[int, Dict[str, List[float]]] = {user_id: {} for user_id in user_ids}
+    for (user_id, tag), i in pairs.items():
+        states[user_id][tag] = [float(p_known[i]), int(counts[i])]
+
+    # Marked before the states are written: an event the relay is delivering
+    # right now is waited for here, never while holding the state rows it locks
+    attempt_ids = [attempt.id for attempt in attempts]
+    for start in range(0, len(attempt_ids), MARK_CHUNK_SIZE):
+        await session.execute(_mark_consumed_statement(attempt_ids[start:start + MARK_CHUNK_SIZE]))
+
+    now = datetime.now(timezone.utc)
+    stmt = pg_insert(UserConceptState).values([
+        {"user_id": user_id, "concepts": concepts, "updated_at": now}
+        for user_id, concepts in states.items()
+    ])
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=[UserConceptState.user_id],
+        set_={name: stmt.excluded[name] for name in ("concepts", "updated_at")},
+    ))
+    logger.info("Concept states rebuilt", users=len(states), observations=len(pair_index))
+    return len(pair_index)
+
+
+def _mark_consumed_statement(attempt_ids: List[int]):
+    """Mark pending attempt events of the given attempts consumed by this consumer."""
+    stmt = pg_insert(ConsumedEvent).from_select(
+        ["event_id", "consumer"],
+        select(OutboxEvent.id, literal(CONSUMER)).where(
+            OutboxEvent.processed_at.is_(None),
+            OutboxEvent.failed_at.is_(None),
+            OutboxEvent.event_type == QUIZ_ATTEMPTED,
+            OutboxEvent.payload["attempt_id"].as_integer().in_(attempt_ids),
+        ),
+    )
+    # Events the relay has already claimed keep their marker
+    return stmt.on_conflict_do_nothing()
+
+
+class KnowledgeTracingService:
+    """Service class for per-concept mastery reads."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_learning_analytics(self, user_id: int) -> LearningAnalytics:
+        """Read a learner's concept estimates with a single-row lookup."""
+        try:
+            result = await self.db.execute(
+                select(UserConceptState).where(UserConceptState.user_id == user_id)
+            )
+            state = result.scalar_one_or_none()
+        except Exception as e:
+            logger.error("Failed to get concept mastery", user_id=user_id, error=str(e))
+            raise DatabaseException("Failed to retrieve learning analytics", error_code="ANALYTICS_FETCH_ERROR")
+
+        concepts = (state.concepts or {}) if state else {}
+        mastered, to_review = split_by_mastery(concepts, concepts)
+        return LearningAnalytics(
+            user_id=user_id,
+            concepts=[
+                ConceptMastery(concept=tag, mastery=p_known, observations=seen)
+                for tag, (p_known, seen) in sorted(concepts.items())
+            ],
+            concepts_mastered=mastered,
+            concepts_to_review=to_review,
+            updated_at=state.updated_at if state else None,
+        )
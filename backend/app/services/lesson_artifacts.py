@@ -0,0 +1,336 @@
+"""
+Publish-time lesson rendering and precompressed delivery
+
+Publishing a lesson renders its markdown to HTML once, strips it down to an
+allow-list of safe markup, links ``[@key]`` citation markers to a numbered
+reference list built from the lesson's sources, and stores the HTML with gzip
+and brotli variants in ``lesson_artifacts``. Artifacts are keyed by a hash of
+everything that feeds the renderer, so republishing unchanged content renders
+nothing and lessons with identical content share a row.
+
+Serving picks the variant the client accepts and sends it as is. Each variant
+has its own strong ETag derived from the content hash, so revalidation is a
+single lookup of ``Lesson.content_hash`` answered with ``304 Not Modified``.
+Bulk publishes render in a process pool.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import html
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import brotli
+import markdown
+import nh3
+from sqlalchemy import Integer, String, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.cache import SizedLRU
+from app.core.config import settings
+from app.core.exceptions import DatabaseException, LessonNotFoundException
+from app.models.lesson import Lesson, LessonArtifact
+from app.schemas.lesson import LessonPublishResponse
+from app.services.batch_service import lesson_cache
+from app.services.progress_engine import lesson_order_cache
+
+logger = structlog.get_logger()
+
+# Bump when rendering output changes so every lesson re-renders on next publish
+RENDERER_VERSION = 2
+
+# Artifacts per INSERT; rows carry three copies of the lesson body
+INSERT_CHUNK_SIZE = 100
+
+ENCODINGS = ("br", "gzip")  # Server preference when the client accepts both
+
+_CITATION = re.compile(r"\[@([\w:.-]+)\]")
+_VERBATIM = re.compile(r"(<pre\b.*?</pre>|<code\b.*?</code>)", re.S)
+
+# Markup lesson bodies may keep after rendering; raw HTML in the markdown
+# passes through the renderer, so anything else (scripts, event handlers,
+# javascript: URLs) is stripped before the HTML is stored and served
+_ALLOWED_ATTRIBUTES = {
+    **{tag: set(attrs) for tag, attrs in nh3.ALLOWED_ATTRIBUTES.items()},
+    "a": {"href", "title", "class"},
+    "abbr": {"title"},
+    "code": {"class"},
+    "div": {"class"},
+    "img": {"src", "alt", "title", "width", "height"},
+    "li": {"id"},
+    "sup": {"id"},
+}
+_URL_SCHEMES = {"http", "https", "mailto"}
+
+RenderJob = Tuple[str, str, Optional[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]]
+
+
+def artifact_hash(content: str, sources: Optional[list], citations: Optional[list]) -> str:
+    """Hash of the renderer inputs; identical inputs always render identically."""
+    canonical = json.dumps(
+        [RENDERER_VERSION, content, sources or [], citations or []],
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _references(sources: Optional[list], citations: Optional[list]) -> Dict[str, dict]:
+    """Citable entries by ``citation_key``; sources win over citations."""
+    references: Dict[str, dict] = {}
+    for entry in (sources or []) + (citations or []):
+        if isinstance(entry, dict) and entry.get("citation_key"):
+            references.setdefault(str(entry["citation_key"]), entry)
+    return references
+
+
+def _reference_item(key: str, entry: dict) -> str:
+    text = entry.get("full_citation") or entry.get("title") or key
+    item = html.escape(str(text))
+    if entry.get("doi"):
+        doi = html.escape(str(entry["doi"]), quote=True)
+        item += f' <a href="https://doi.org/{doi}">doi:{doi}</a>'
+    return f'<li id="ref-{html.escape(key, quote=True)}">{item}</li>'
+
+
+def sanitize_html(body: str) -> str:
+    """Reduce rendered lesson HTML to the allow-listed tags, attributes and URL schemes."""
+    return nh3.clean(body, attributes=_ALLOWED_ATTRIBUTES, url_schemes=_URL_SCHEMES)
+
+
+def link_citations(body: str, references: Dict[str, dict]) -> str:
+    """Replace known ``[@key]`` markers with numbered links and append the reference list.
+
+    Markers inside code are left alone, as are unknown keys. References are
+    numbered by first citation; uncited sources follow.
+    """
+    numbers: Dict[str, int] = {}
+
+    def replace(match: "re.Match") -> str:
+        key = match.group(1)
+        if key not in references:
+            return match.group(0)
+        number = numbers.setdefault(key, len(numbers) + 1)
+        return f'<a class="citation" href="#ref-{html.escape(key, quote=True)}">[{number}]</a>'
+
+    parts = _VERBATIM.split(body)
+    parts[::2] = [_CITATION.sub(replace, part) for part in parts[::2]]
+    if not references:
+        return "".join(parts)
+
+    ordered = list(numbers) + [key for key in references if key not in numbers]
+    items = "".join(_reference_item(key, references[key]) for key in ordered)
+    return "".join(parts) + f'\n<ol class="references">{items}</ol>'
+
+
+@dataclass(frozen=True)
+class RenderedArtifact:
+    """A lesson's HTML and its precompressed variants."""
+    content_hash: str
+    html: bytes
+    gzip: bytes
+    brotli: bytes
+
+    @property
+    def size(self) -> int:
+        return len(self.html) + len(self.gzip) + len(self.brotli)
+
+    def body(self, encoding: Optional[str]) -> bytes:
+        if encoding == "br":
+            return self.brotli
+        if encoding == "gzip":
+            return self.gzip
+        return self.html
+
+
+def render_artifact(content_hash: str, content: str, sources: Optional[list], citations: Optional[list]) -> RenderedArtifact:
+    """Render and compress one lesson.
+
+    Module-level and free of shared state so it can run in a worker process.
+    Compression uses maximum levels because it happens once per publish.
+    """
+    body = sanitize_html(markdown.markdown(content, extensions=["extra", "sane_lists"], output_format="html"))
+    data = link_citations(body, _references(sources, citations)).encode()
+    return RenderedArtifact(
+        content_hash=content_hash,
+        html=data,
+        gzip=gzip.compress(data, compresslevel=9, mtime=0),
+        brotli=brotli.compress(data, mode=brotli.MODE_TEXT, quality=11),
+    )
+
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    # Created on first bulk publish so workers that never publish don't fork
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(max_workers=settings.ARTIFACT_RENDER_WORKERS)
+    return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+async def render_artifacts(jobs: Sequence[RenderJob]) -> List[RenderedArtifact]:
+    """Render jobs off the event loop: in a thread for a few, in the process pool for many."""
+    if len(jobs) < settings.ARTIFACT_POOL_MIN_LESSONS:
+        return await asyncio.to_thread(lambda: [render_artifact(*job) for job in jobs])
+    loop = asyncio.get_running_loop()
+    pool = _get_render_pool()
+    return list(await asyncio.gather(*(loop.run_in_executor(pool, render_artifact, *job) for job in jobs)))
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best stored encoding the client accepts, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for token in accept_encoding.split(","):
+        coding, _, params = token.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[coding.strip().lower()] = quality
+    default = weights.get("*", 0.0)
+    best = max(ENCODINGS, key=lambda coding: weights.get(coding, default))
+    return best if weights.get(best, default) > 0 else None
+
+
+def artifact_etag(content_hash: str, encoding: Optional[str]) -> str:
+    """Strong ETag; each encoding is a distinct representation with its own tag."""
+    suffix = {"br": "-br", "gzip": "-gz"}.get(encoding, "")
+    return f'"{content_hash}{suffix}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match evaluation (weak comparison, as RFC 9110 specifies for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+async def load_artifact(session: AsyncSession, content_hash: str) -> Optional[RenderedArtifact]:
+    row = (await session.execute(
+        select(LessonArtifact.html, LessonArtifact.gzip, LessonArtifact.brotli)
+        .where(LessonArtifact.content_hash == content_hash)
+    )).one_or_none()
+    if row is None:
+        return None
+    return RenderedArtifact(content_hash, row.html, row.gzip, row.brotli)
+
+
+# Artifacts are immutable under their hash, so entries never go stale
+artifact_cache: SizedLRU[str, RenderedArtifact] = SizedLRU(
+    "lesson_artifact", settings.ARTIFACT_CACHE_MAX_BYTES, load_artifact
+)
+
+
+class LessonArtifactService:
+    """Service class for publishing and serving rendered lessons."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def publish_lessons(self, lesson_ids: Sequence[int]) -> LessonPublishResponse:
+        """Render lessons whose content has no artifact yet and mark them published."""
+        wanted = set(lesson_ids)
+        try:
+            rows = (await self.db.execute(
+                select(Lesson.id, Lesson.course_id, Lesson.content, Lesson.sources, Lesson.citations)
+                .where(Lesson.id.in_(wanted))
+            )).all()
+            if len(rows) != len(wanted):
+                raise LessonNotFoundException("Lesson not found", error_code="LESSON_NOT_FOUND")
+
+            hashes = {row.id: artifact_hash(row.content, row.sources, row.citations) for row in rows}
+            existing = set((await self.db.execute(
+                select(LessonArtifact.content_hash).where(LessonArtifact.content_hash.in_(set(hashes.values())))
+            )).scalars())
+            jobs: Dict[str, RenderJob] = {}
+            for row in rows:
+                content_hash = hashes[row.id]
+                if content_hash not in existing and content_hash not in jobs:
+                    jobs[content_hash] = (content_hash, row.content, row.sources, row.citations)
+
+            artifacts = await render_artifacts(list(jobs.values()))
+            for start in range(0, len(artifacts), INSERT_CHUNK_SIZE):
+                chunk = artifacts[start:start + INSERT_CHUNK_SIZE]
+                await self.db.execute(
+                    pg_insert(LessonArtifact)
+                    .values([
+                        {"content_hash": a.content_hash, "html": a.html, "gzip": a.gzip, "brotli": a.brotli}
+                        for a in chunk
+                    ])
+                    .on_conflict_do_nothing(index_elements=[LessonArtifact.content_hash])
+                )
+
+            now = datetime.now(timezone.utc)
+            data = values(column("id", Integer), column("content_hash", String), name="v").data(list(hashes.items()))
+            await self.db.execute(
+                update(Lesson)
+                .where(Lesson.id == data.c.id)
+                .values(
+                    content_hash=data.c.content_hash,
+                    is_published=True,
+                    published_at=func.coalesce(Lesson.published_at, now),
+                )
+            )
+            await self.db.commit()
+        except LessonNotFoundException:
+            await self.db.rollback()
+            raise
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to publish lessons", lesson_count=len(wanted), error=str(e))
+            raise DatabaseException("Failed to publish lessons", error_code="LESSON_PUBLISH_ERROR")
+
+        for artifact in artifacts:
+            artifact_cache.put(artifact.content_hash, artifact)
+        lesson_cache.invalidate(hashes)
+        # Newly published lessons join their courses' progress order
+        for course_id in {row.course_id for row in rows}:
+            lesson_order_cache.invalidate(course_id)
+        logger.info("Lessons published", published=len(rows), rendered=len(artifacts))
+        return LessonPublishResponse(published=len(rows), rendered=len(artifacts), reused=len(rows) - len(artifacts))
+
+    async def get_content_hash(self, lesson_id: int) -> str:
+        """Hash of a published lesson's artifact; one primary-key lookup."""
+        try:
+            content_hash = await self.db.scalar(
+                select(Lesson.content_hash).where(Lesson.id == lesson_id, Lesson.is_published.is_(True))
+            )
+        except Exception as e:
+            logger.error("Failed to get lesson content hash", lesson_id=lesson_id, error=str(e))
+            raise DatabaseException("Failed to retrieve lesson content", error_code="LESSON_CONTENT_ERROR")
+        if content_hash is None:
+            raise LessonNotFoundException("Lesson not found", error_code="LESSON_NOT_FOUND")
+        return content_hash
+
+    async def get_artifact(self, content_hash: str) -> RenderedArtifact:
+        try:
+            artifact = await artifact_cache.load(self.db, content_hash)
+        except Exception as e:
+            logger.error("Failed to get lesson artifact", content_hash=content_hash, error=str(e))
+            raise DatabaseException("Failed to retrieve lesson content", error_code="LESSON_CONTENT_ERROR")
+        if artifact is None:
+            raise LessonNotFoundException("Lesson content not found", error_code="LESSON_CONTENT_NOT_FOUND")
+        return artifact
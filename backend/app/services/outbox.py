@@ -0,0 +1,224 @@
+"""
+Transactional outbox relay
+
+Domain writes add an ``OutboxEvent`` to their own session, so the event is
+committed atomically with the change. The relay drains committed events in
+batches with ``FOR UPDATE SKIP LOCKED`` (safe to run in every worker) and
+hands them to registered consumers. Delivery is at-least-once; each consumer
+records a ``ConsumedEvent`` marker in the same savepoint as its own writes,
+so a redelivered event is skipped by consumers that already handled it.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import structlog
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import OUTBOX_DELIVERIES
+from app.models.outbox import ConsumedEvent, OutboxEvent
+
+logger = structlog.get_logger()
+
+# Event types
+LESSON_COMPLETED = "lesson.completed"
+LESSON_UNCOMPLETED = "lesson.uncompleted"
+COURSE_ENROLLED = "course.enrolled"
+COURSE_UNENROLLED = "course.unenrolled"
+COURSE_COMPLETED = "course.completed"
+COURSE_UNCOMPLETED = "course.uncompleted"
+COURSE_RATED = "course.rated"
+LEARNING_TIME_RECORDED = "learning.time_recorded"
+QUIZ_ATTEMPTED = "quiz.attempted"
+
+Handler = Callable[[AsyncSession, OutboxEvent], Awaitable[None]]
+
+_PENDING_KEY = "outbox_pending"
+
+# Retry backoff doubles per attempt, capped
+MAX_BACKOFF_SECONDS = 300
+PURGE_INTERVAL_SECONDS = 3600
+
+
+def add_outbox_event(
+    session: AsyncSession,
+    event_type: str,
+    aggregate_type: str,
+    aggregate_id: int,
+    payload: Dict[str, Any],
+) -> None:
+    """Stage an event in ``session``; it is written by the caller's commit."""
+    session.add(OutboxEvent(
+        event_type=event_type,
+        aggregate_type=aggregate_type,
+        aggregate_id=aggregate_id,
+        payload=payload,
+    ))
+    session.info[_PENDING_KEY] = True
+
+
+class OutboxRelay:
+    """Background worker delivering committed outbox events to consumers."""
+
+    def __init__(self, poll_interval: float, batch_size: int, max_attempts: int, retention_hours: int):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retention = timedelta(hours=retention_hours)
+        self.handlers: Dict[str, List[Tuple[str, Handler]]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._last_purge = 0.0
+
+    def register(self, event_type: str, consumer: str) -> Callable[[Handler], Handler]:
+        """Decorator subscribing a handler to an event type under a consumer name.
+
+        The consumer name is the idempotency key; keep it stable across deploys.
+        """
+        def decorator(handler: Handler) -> Handler:
+            self.handlers.setdefault(event_type, []).append((consumer, handler))
+            return handler
+        return decorator
+
+    def notify(self) -> None:
+        """Wake the relay early, e.g. right after events were committed."""
+        self._wakeup.set()
+
+    async def relay_once(self) -> int:
+        """Deliver one batch of due events; returns the number handled."""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(OutboxEvent)
+                .where(
+                    OutboxEvent.processed_at.is_(None),
+                    OutboxEvent.failed_at.is_(None),
+                    OutboxEvent.available_at <= datetime.now(timezone.utc),
+                )
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            events = result.scalars().all()
+            for outbox_event in events:
+                await self._deliver(session, outbox_event)
+            await session.commit()
+        return len(events)
+
+    async def _deliver(self, session: AsyncSession, outbox_event: OutboxEvent) -> None:
+        failures = []
+        for consumer, handler in self.handlers.get(outbox_event.event_type, ()):
+            try:
+                async with session.begin_nested():
+                    claimed = await session.execute(
+                        pg_insert(ConsumedEvent)
+                        .values(event_id=outbox_event.id, consumer=consumer)
+                        .on_conflict_do_nothing()
+                        .returning(ConsumedEvent.event_id)
+                    )
+                    if claimed.scalar_one_or_none() is None:
+                        # Handled on an earlier delivery
+                        continue
+                    await handler(session, outbox_event)
+            except Exception as e:
+                failures.append(f"{consumer}: {e}")
+
+        now = datetime.now(timezone.utc)
+        if not failures:
+            outbox_event.processed_at = now
+            OUTBOX_DELIVERIES.labels(outbox_event.event_type, "delivered").inc()
+            return
+
+        outbox_event.attempts += 1
+        outbox_event.last_error = "; ".join(failures)[:2000]
+        if outbox_event.attempts >= self.max_attempts:
+            outbox_event.failed_at = now
+            OUTBOX_DELIVERIES.labels(outbox_event.event_type, "failed").inc()
+            logger.error(
+                "Outbox event failed permanently",
+                event_id=outbox_event.id,
+                event_type=outbox_event.event_type,
+                error=outbox_event.last_error,
+            )
+        else:
+            backoff = min(MAX_BACKOFF_SECONDS, 2 ** outbox_event.attempts)
+            outbox_event.available_at = now + timedelta(seconds=backoff)
+            OUTBOX_DELIVERIES.labels(outbox_event.event_type, "retried").inc()
+            logger.warning(
+                "Outbox event delivery failed, will retry",
+                event_id=outbox_event.id,
+                event_type=outbox_event.event_type,
+                attempts=outbox_event.attempts,
+                error=outbox_event.last_error,
+            )
+
+    async def purge(self) -> None:
+        """Delete delivered events past the retention window."""
+        cutoff = datetime.now(timezone.utc) - self.retention
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                delete(OutboxEvent).where(OutboxEvent.processed_at < cutoff)
+            )
+            await session.commit()
+        if result.rowcount:
+            logger.info("Outbox events purged", count=result.rowcount)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                delivered = await self.relay_once()
+                if time.monotonic() - self._last_purge >= PURGE_INTERVAL_SECONDS:
+                    self._last_purge = time.monotonic()
+                    await self.purge()
+            except Exception as e:
+                logger.error("Outbox relay iteration failed", error=str(e))
+                delivered = 0
+
+            if delivered >= self.batch_size:
+                # Backlog; keep draining without waiting
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """Start the relay task on the running loop."""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop after the in-flight batch; undelivered events stay in the table."""
+        self._stopping = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+
+outbox_relay = OutboxRelay(
+    poll_interval=settings.OUTBOX_POLL_SECONDS,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    retention_hours=settings.OUTBOX_RETENTION_HOURS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_relay(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        outbox_relay.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,256 @@
+"""
+Course progress engine
+
+Keeps ``UserProgress`` counters and current/next lesson pointers up to date
+as lessons are completed, without rescanning the course. Lesson ordering per
+course is cached in process; completion counters are adjusted with atomic
+SQL increments and the learner's course row is locked for the duration, so
+concurrent completions for the same course apply one after the other.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, false, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.exceptions import DatabaseException, LessonNotFoundException
+from app.models.lesson import Lesson
+from app.models.progress import LessonProgress, UserProgress
+from app.schemas.progress import LessonCompletionResponse
+from app.services.outbox import (
+    COURSE_COMPLETED,
+    COURSE_ENROLLED,
+    COURSE_UNCOMPLETED,
+    LESSON_COMPLETED,
+    add_outbox_event,
+)
+
+logger = structlog.get_logger()
+
+# Lessons checked per query when looking for the next uncompleted one
+NEXT_LESSON_WINDOW = 16
+
+
+@dataclass(frozen=True)
+class LessonOrder:
+    """A course's published lessons by ``order_index``, with each lesson's position."""
+    lesson_ids: Tuple[int, ...]
+    positions: Dict[int, int]
+
+
+async def load_lesson_order(session: AsyncSession, course_id: int) -> LessonOrder:
+    result = await session.execute(
+        select(Lesson.id)
+        .where(Lesson.course_id == course_id, Lesson.is_published.is_(True))
+        .order_by(Lesson.order_index, Lesson.id)
+    )
+    lesson_ids = tuple(result.scalars())
+    return LessonOrder(lesson_ids, {lesson_id: i for i, lesson_id in enumerate(lesson_ids)})
+
+
+# Invalidate after lessons are added, removed, reordered or published
+lesson_order_cache: TTLCache[int, LessonOrder] = TTLCache(
+    "lesson_order", settings.LESSON_ORDER_CACHE_SECONDS, load_lesson_order
+)
+
+
+class ProgressEngine:
+    """Applies lesson completions to course progress."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def complete_lesson(self, user_id: int, lesson_id: int) -> LessonCompletionResponse:
+        """Mark a lesson completed and advance the course; idempotent."""
+        try:
+            course_id = await self.db.scalar(
+                select(Lesson.course_id).where(Lesson.id == lesson_id, Lesson.is_published.is_(True))
+            )
+            if course_id is None:
+                raise LessonNotFoundException("Lesson not found", error_code="LESSON_NOT_FOUND")
+
+            now = datetime.now(timezone.utc)
+            # Lock the course row first so completions in this course serialize
+            await self._lock_course_progress(user_id, course_id, now)
+
+            stmt = pg_insert(LessonProgress).values(
+                user_id=user_id,
+                lesson_id=lesson_id,
+                is_completed=True,
+                completion_percentage=100.0,
+                completion_time=now,
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[LessonProgress.user_id, LessonProgress.lesson_id],
+                set_={
+                    "is_completed": True,
+                    "completion_percentage": 100.0,
+                    "completion_time": now,
+                    "last_accessed": now,
+                },
+                # Only the false -> true transition counts
+                where=LessonProgress.is_completed.is_(False),
+            ).returning(LessonProgress.id)
+            newly_completed = (await self.db.execute(stmt)).scalar_one_or_none() is not None
+
+            if newly_completed:
+                add_outbox_event(self.db, LESSON_COMPLETED, "lesson", lesson_id, {
+                    "user_id": user_id,
+                    "lesson_id": lesson_id,
+                    "course_id": course_id,
+                    "occurred_at": now.isoformat(),
+                })
+                progress = await self.apply_lesson_transitions(user_id, course_id, lesson_id, 1, now)
+            else:
+                progress = await self._course_progress(user_id, course_id)
+
+            await self.db.commit()
+        except LessonNotFoundException:
+            raise
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to complete lesson", user_id=user_id, lesson_id=lesson_id, error=str(e))
+            raise DatabaseException("Failed to complete lesson", error_code="LESSON_COMPLETION_ERROR")
+
+        logger.info(
+            "Lesson completed",
+            user_id=user_id,
+            lesson_id=lesson_id,
+            newly_completed=newly_completed,
+        )
+        return LessonCompletionResponse(
+            lesson_id=lesson_id,
+            course_id=course_id,
+            newly_completed=newly_completed,
+            lessons_completed=progress.lessons_completed,
+            completion_percentage=progress.completion_percentage,
+            current_lesson_id=progress.current_lesson_id,
+            next_lesson_id=progress.next_lesson_id,
+            course_completed=progress.is_completed,
+        )
+
+    async def apply_lesson_transitions(
+        self,
+        user_id: int,
+        course_id: int,
+        anchor_lesson_id: Optional[int],
+        completed_delta: int,
+        now: Optional[datetime] = None,
+    ):
+        """Adjust course progress for lessons that flipped completion state.
+
+        ``completed_delta`` is completions minus un-completions. With a
+        positive delta the pointers move past ``anchor_lesson_id``; otherwise
+        they restart from the first uncompleted lesson. Runs in the caller's
+        transaction.
+        """
+        now = now or datetime.now(timezone.utc)
+        was_completed = await self._lock_course_progress(user_id, course_id, now)
+
+        order = await lesson_order_cache.get(self.db, course_id)
+        start = order.positions.get(anchor_lesson_id, -1) if completed_delta > 0 else -1
+        current_lesson_id, next_lesson_id = await self._next_uncompleted(user_id, order, start)
+
+        total = len(order.lesson_ids)
+        completed = func.greatest(0, UserProgress.lessons_completed + completed_delta)
+        is_completed = (completed >= total) if total else false()
+        result = await self.db.execute(
+            update(UserProgress)
+            .where(UserProgress.user_id == user_id, UserProgress.course_id == course_id)
+            .values(
+                lessons_completed=completed,
+                completion_percentage=func.least(100.0, completed * 100.0 / total) if total else 0.0,
+                current_lesson_id=current_lesson_id,
+                next_lesson_id=next_lesson_id,
+                last_activity_date=now,
+                is_completed=is_completed,
+                completed_at=case(
+                    (is_completed, func.coalesce(UserProgress.completed_at, now)),
+                    else_=None,
+                ),
+            )
+            .returning(
+                UserProgress.lessons_completed,
+                UserProgress.completion_percentage,
+                UserProgress.current_lesson_id,
+                UserProgress.next_lesson_id,
+                UserProgress.is_completed,
+            )
+        )
+        progress = result.one()
+
+        if progress.is_completed != was_completed:
+            event_type = COURSE_COMPLETED if progress.is_completed else COURSE_UNCOMPLETED
+            add_outbox_event(self.db, event_type, "course", course_id, {
+                "user_id": user_id,
+                "course_id": course_id,
+                "occurred_at": now.isoformat(),
+            })
+        return progress
+
+    async def _lock_course_progress(self, user_id: int, course_id: int, now: datetime) -> bool:
+        """Lock the learner's course row, enrolling them if needed; returns is_completed."""
+        inserted = await self.db.execute(
+            pg_insert(UserProgress)
+            .values(user_id=user_id, course_id=course_id, last_activity_date=now)
+            .on_conflict_do_nothing(index_elements=[UserProgress.user_id, UserProgress.course_id])
+            .returning(UserProgress.id)
+        )
+        if inserted.scalar_one_or_none() is not None:
+            add_outbox_event(self.db, COURSE_ENROLLED, "course", course_id, {
+                "user_id": user_id,
+                "course_id": course_id,
+                "occurred_at": now.isoformat(),
+            })
+
+        return await self.db.scalar(
+            select(UserProgress.is_completed)
+            .where(UserProgress.user_id == user_id, UserProgress.course_id == course_id)
+            .with_for_update()
+        )
+
+    async def _course_progress(self, user_id: int, course_id: int):
+        result = await self.db.execute(
+            select(
+                UserProgress.lessons_completed,
+                UserProgress.completion_percentage,
+                UserProgress.current_lesson_id,
+                UserProgress.next_lesson_id,
+                UserProgress.is_completed,
+            ).where(UserProgress.user_id == user_id, UserProgress.course_id == course_id)
+        )
+        return result.one()
+
+    async def _next_uncompleted(
+        self, user_id: int, order: LessonOrder, start: int
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """First two uncompleted lessons after position ``start``, wrapping around.
+
+        Lessons are checked a small window at a time, so a learner moving
+        through the course in order costs one indexed lookup.
+        """
+        lesson_ids = order.lesson_ids
+        candidates = lesson_ids[start + 1:] + lesson_ids[:start + 1]
+        found: List[int] = []
+        for offset in range(0, len(candidates), NEXT_LESSON_WINDOW):
+            window = candidates[offset:offset + NEXT_LESSON_WINDOW]
+            result = await self.db.execute(
+                select(LessonProgress.lesson_id).where(
+                    LessonProgress.user_id == user_id,
+                    LessonProgress.lesson_id.in_(window),
+                    LessonProgress.is_completed.is_(True),
+                )
+            )
+            completed = set(result.scalars())
+            found.extend(lesson_id for lesson_id in window if lesson_id not in completed)
+            if len(found) >= 2:
+                break
+
+        found.extend([None, None])
+        return found[0], found[1]
@@ -0,0 +1,138 @@
+"""
+Progress service for learner-facing progress reads
+"""
+
+import base64
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+import structlog
+
+from app.core.exceptions import DatabaseException, ValidationException
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.progress import LessonProgress, UserProgress
+from app.schemas.progress import DashboardCourse, DashboardResponse
+
+logger = structlog.get_logger()
+
+
+def encode_cursor(sort_key: datetime, progress_id: int) -> str:
+    """Opaque keyset cursor pointing just after the given row."""
+    raw = f"{sort_key.isoformat()}|{progress_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        sort_key, progress_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(sort_key), int(progress_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationException("Invalid cursor", error_code="INVALID_CURSOR")
+
+
+def dashboard_query(user_id: int, limit: int, after: Optional[Tuple[datetime, int]] = None):
+    """Build the dashboard page as one statement.
+
+    Current and next lesson titles come from two aliased joins on ``lessons``
+    and due-review counts from a single grouped pass over the learner's
+    ``lesson_progress``, so the cost does not grow with a query per course.
+    """
+    current_lesson = aliased(Lesson)
+    next_lesson = aliased(Lesson)
+    due = (
+        select(Lesson.course_id, func.count().label("due_reviews"))
+        .join(LessonProgress, LessonProgress.lesson_id == Lesson.id)
+        .where(
+            LessonProgress.user_id == user_id,
+            LessonProgress.next_review_date <= func.now(),
+        )
+        .group_by(Lesson.course_id)
+        .subquery()
+    )
+    # Never-active enrollments sort by enrollment time
+    sort_key = func.coalesce(UserProgress.last_activity_date, UserProgress.enrolled_at).label("sort_key")
+
+    stmt = (
+        select(
+            UserProgress.id,
+            UserProgress.course_id,
+            Course.title,
+            Course.thumbnail_url,
+            Course.total_lessons,
+            UserProgress.completion_percentage,
+            UserProgress.lessons_completed,
+            UserProgress.current_lesson_id,
+            current_lesson.title.label("current_lesson_title"),
+            UserProgress.next_lesson_id,
+            next_lesson.title.label("next_lesson_title"),
+            func.coalesce(due.c.due_reviews, 0).label("due_reviews"),
+            UserProgress.is_completed,
+            UserProgress.is_favorited,
+            UserProgress.last_activity_date,
+            sort_key,
+        )
+        .join(Course, Course.id == UserProgress.course_id)
+        .outerjoin(current_lesson, current_lesson.id == UserProgress.current_lesson_id)
+        .outerjoin(next_lesson, next_lesson.id == UserProgress.next_lesson_id)
+        .outerjoin(due, due.c.course_id == UserProgress.course_id)
+        .where(UserProgress.user_id == user_id, UserProgress.is_enrolled.is_(True))
+        .order_by(sort_key.desc(), UserProgress.id.desc())
+        .limit(limit + 1)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(sort_key, UserProgress.id) < tuple_(*after))
+    return stmt
+
+
+class ProgressService:
+    """Service class for progress reads."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_dashboard(self, user_id: int, limit: int = 20, cursor: Optional[str] = None) -> DashboardResponse:
+        """Get one keyset-paginated page of the learner's enrolled courses."""
+        after = decode_cursor(cursor) if cursor else None
+        try:
+            result = await self.db.execute(dashboard_query(user_id, limit, after))
+            rows = result.all()
+        except Exception as e:
+            logger.error("Failed to get dashboard", user_id=user_id, error=str(e))
+            raise DatabaseException("Failed to retrieve dashboard", error_code="DASHBOARD_FETCH_ERROR")
+
+        # One extra row tells whether another page exists
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            sort_key = last.sort_key if last.sort_key.tzinfo else last.sort_key.replace(tzinfo=timezone.utc)
+            next_cursor = encode_cursor(sort_key, last.id)
+
+        return DashboardResponse(
+            courses=[
+                DashboardCourse(
+                    course_id=row.course_id,
+                    title=row.title,
+                    thumbnail_url=row.thumbnail_url,
+                    completion_percentage=row.completion_percentage,
+                    lessons_completed=row.lessons_completed,
+                    total_lessons=row.total_lessons,
+                    current_lesson_id=row.current_lesson_id,
+                    current_lesson_title=row.current_lesson_title,
+                    next_lesson_id=row.next_lesson_id,
+                    next_lesson_title=row.next_lesson_title,
+                    due_reviews=row.due_reviews,
+                    is_completed=row.is_completed,
+                    is_favorited=row.is_favorited,
+                    last_activity_date=row.last_activity_date,
+                )
+                for row in rows
+            ],
+            next_cursor=next_cursor,
+        )
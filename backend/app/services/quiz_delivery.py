@@ -0,0 +1,141 @@
+"""
+Pre-serialized quiz delivery
+
+A quiz is serialized once per version (``Quiz.updated_at``) into JSON
+fragments: the quiz fields and one fragment per question, answers included
+but correctness and explanations left out. Short-answer questions are served
+without options, since their options are the accepted texts. Serving a quiz splices the
+fragments together in presentation order. When ``randomize_questions`` is
+set the order is a permutation seeded by (quiz, user, attempt number), so
+grading can reproduce exactly what the learner saw.
+"""
+
+import hashlib
+import random
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+import structlog
+
+from app.core.cache import VersionedCache
+from app.core.exceptions import DatabaseException, QuizNotFoundException
+from app.models.progress import QuizAttempt
+from app.models.quiz import Quiz, QuizQuestion
+from app.schemas.quiz import QuestionResponse, QuizResponse
+
+logger = structlog.get_logger()
+
+
+def question_order(quiz_id: int, user_id: int, attempt_number: int, question_ids: Sequence[int]) -> List[int]:
+    """Presentation order of ``question_ids`` for one learner's attempt.
+
+    The seed comes from a stable hash, not ``hash()``, so every process
+    derives the same order.
+    """
+    digest = hashlib.blake2b(f"{quiz_id}:{user_id}:{attempt_number}".encode(), digest_size=8).digest()
+    order = list(question_ids)
+    random.Random(int.from_bytes(digest, "big")).shuffle(order)
+    return order
+
+
+@dataclass(frozen=True)
+class QuizPayload:
+    """A quiz version serialized into spliceable JSON fragments."""
+    version: datetime
+    randomize_questions: bool
+    head: bytes  # Quiz fields as a JSON object without its closing brace
+    question_ids: Tuple[int, ...]
+    questions: Tuple[bytes, ...]
+
+    def fragments(self, question_ids: Sequence[int]) -> List[bytes]:
+        """Serialized questions in the given order."""
+        position = {question_id: i for i, question_id in enumerate(self.question_ids)}
+        return [self.questions[position[question_id]] for question_id in question_ids]
+
+    def document(self) -> bytes:
+        """The quiz in authored order, outside any attempt (e.g. for offline bundles)."""
+        return b"".join((self.head, b',"questions":[', b",".join(self.questions), b"]}"))
+
+    def render(self, attempt_number: int, order: Optional[Sequence[int]] = None) -> bytes:
+        fragments = self.questions if order is None else self.fragments(order)
+        return b"".join((
+            self.head,
+            b',"attempt_number":', str(attempt_number).encode(),
+            b',"questions":[', b",".join(fragments), b"]}",
+        ))
+
+
+def _question_fragment(question: QuizQuestion) -> bytes:
+    served = QuestionResponse.model_validate(question)
+    if question.question_type == "short_answer":
+        served = served.model_copy(update={"answers": []})
+    return served.model_dump_json().encode()
+
+
+def serialize_quiz(quiz: Quiz) -> QuizPayload:
+    """Serialize a quiz loaded with its questions and answers."""
+    questions = sorted(quiz.questions, key=lambda question: (question.order_index, question.id))
+    head = QuizResponse.model_validate(quiz).model_dump_json(exclude={"questions"}).encode()
+    return QuizPayload(
+        version=quiz.updated_at,
+        randomize_questions=quiz.randomize_questions,
+        head=head[:-1],
+        question_ids=tuple(question.id for question in questions),
+        questions=tuple(_question_fragment(question) for question in questions),
+    )
+
+
+async def load_quiz_payload(session: AsyncSession, quiz_id: int) -> QuizPayload:
+    """Load a quiz with its questions and answers and serialize it."""
+    result = await session.execute(
+        select(Quiz)
+        .where(Quiz.id == quiz_id)
+        .options(selectinload(Quiz.questions).selectinload(QuizQuestion.answers))
+    )
+    quiz = result.scalar_one_or_none()
+    if quiz is None:
+        raise QuizNotFoundException("Quiz not found", error_code="QUIZ_NOT_FOUND")
+    return serialize_quiz(quiz)
+
+
+# Keyed by Quiz.updated_at: anything that changes a quiz's questions or
+# answers must touch it
+quiz_payload_cache: VersionedCache[int, QuizPayload] = VersionedCache("quiz_payload", load_quiz_payload)
+
+
+class QuizDeliveryService:
+    """Service class for serving quizzes to learners."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_quiz_payload(self, user_id: int, quiz_id: int) -> bytes:
+        """Serialized quiz for the learner's next attempt.
+
+        Costs one row lookup for the version and one for the attempt count;
+        the question tree is read only when the cached version is stale.
+        """
+        try:
+            version = await self.db.scalar(select(Quiz.updated_at).where(Quiz.id == quiz_id))
+            if version is None:
+                raise QuizNotFoundException("Quiz not found", error_code="QUIZ_NOT_FOUND")
+            payload = await quiz_payload_cache.get(self.db, quiz_id, version)
+            used = await self.db.scalar(
+                select(func.coalesce(func.max(QuizAttempt.attempt_number), 0))
+                .where(QuizAttempt.user_id == user_id, QuizAttempt.quiz_id == quiz_id)
+            )
+        except QuizNotFoundException:
+            raise
+        except Exception as e:
+            logger.error("Failed to get quiz", user_id=user_id, quiz_id=quiz_id, error=str(e))
+            raise DatabaseException("Failed to retrieve quiz", error_code="QUIZ_FETCH_ERROR")
+
+        attempt_number = used + 1
+        order = None
+        if payload.randomize_questions:
+            order = question_order(quiz_id, user_id, attempt_number, payload.question_ids)
+        return payload.render(attempt_number, order)
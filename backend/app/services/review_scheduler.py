@@ -0,0 +1,371 @@
+"""
+Spaced-repetition scheduling over lesson progress
+
+Reviews are scheduled with SM-2: each graded review (quality 0-5) updates a
+lesson's ease factor, interval and repetition count, and ``mastery_level``
+tracks an exponential average of recent grades. A nightly pass schedules
+newly completed lessons and decays mastery of overdue ones. All updates run
+on NumPy arrays over batches of rows and are written back with one
+``UPDATE ... FROM (VALUES ...)`` per batch.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import DateTime, Float, Integer, column, func, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import DatabaseException
+from app.models.lesson import Lesson
+from app.models.outbox import OutboxEvent
+from app.models.progress import LessonProgress, UserProgress
+from app.schemas.progress import SpacedRepetitionSchedule
+from app.services.outbox import QUIZ_ATTEMPTED, outbox_relay
+
+logger = structlog.get_logger()
+
+MIN_EASE = 1.3
+DAY_SECONDS = 86400.0
+# Weight of the newest grade in the mastery average
+MASTERY_WEIGHT = 0.3
+
+# Rows per write statement; 7 binds per row stays under asyncpg's 32767 limit
+WRITE_CHUNK_SIZE = 4000
+
+# Arbitrary key for pg_try_advisory_xact_lock; one nightly pass at a time
+SCHEDULER_LOCK_ID = 704_000_001
+
+
+@dataclass
+class ReviewState:
+    """Scheduling columns for a batch of lesson progress rows, as arrays."""
+    ids: np.ndarray
+    ease: np.ndarray
+    interval: np.ndarray
+    repetitions: np.ndarray
+    review_count: np.ndarray
+    mastery: np.ndarray
+    next_review: np.ndarray  # Epoch seconds; NaN when unscheduled
+
+
+def sm2_update(
+    ease: np.ndarray, interval: np.ndarray, repetitions: np.ndarray, quality: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized SM-2 step; returns new (ease, interval in days, repetitions)."""
+    quality = quality.astype(np.float64)
+    passed = quality >= 3
+
+    new_repetitions = np.where(passed, repetitions + 1, 0)
+    new_interval = np.select(
+        [~passed, new_repetitions == 1, new_repetitions == 2],
+        [1.0, 1.0, 6.0],
+        default=np.round(interval * ease),
+    )
+    lapse = 5.0 - quality
+    new_ease = np.maximum(MIN_EASE, ease + 0.1 - lapse * (0.08 + lapse * 0.02))
+    return new_ease, new_interval, new_repetitions
+
+
+def update_mastery(mastery: np.ndarray, quality: np.ndarray) -> np.ndarray:
+    """Blend the latest grade into mastery (0.0-1.0)."""
+    return (1 - MASTERY_WEIGHT) * mastery + MASTERY_WEIGHT * (quality / 5.0)
+
+
+def decay_mastery(mastery: np.ndarray, interval: np.ndarray, days: float = 1.0) -> np.ndarray:
+    """Forgetting for items left overdue: mastery halves once per interval."""
+    return mastery * np.power(0.5, days / np.maximum(interval, 1.0))
+
+
+def apply_grades(state: ReviewState, quality: np.ndarray, now: float) -> ReviewState:
+    """Return the state after one graded review per row."""
+    ease, interval, repetitions = sm2_update(state.ease, state.interval, state.repetitions, quality)
+    return ReviewState(
+        ids=state.ids,
+        ease=ease,
+        interval=interval,
+        repetitions=repetitions,
+        review_count=state.review_count + 1,
+        mastery=update_mastery(state.mastery, quality),
+        next_review=now + interval * DAY_SECONDS,
+    )
+
+
+def score_to_quality(score: float) -> int:
+    """Map a quiz score (0.0-1.0) to an SM-2 grade."""
+    return int(min(5, max(0, round(score * 5))))
+
+
+_STATE_COLUMNS = (
+    LessonProgress.id,
+    LessonProgress.ease_factor,
+    LessonProgress.interval_days,
+    LessonProgress.repetitions,
+    LessonProgress.review_count,
+    LessonProgress.mastery_level,
+    func.extract("epoch", LessonProgress.next_review_date),
+)
+
+
+def _to_state(rows) -> ReviewState:
+    if not rows:
+        empty = np.empty(0)
+        return ReviewState(empty.astype(np.int64), empty, empty, empty.astype(np.int64),
+                           empty.astype(np.int64), empty, empty)
+    ids, ease, interval, repetitions, review_count, mastery, next_review = zip(*rows)
+    return ReviewState(
+        ids=np.fromiter(ids, dtype=np.int64, count=len(rows)),
+        ease=np.fromiter(ease, dtype=np.float64, count=len(rows)),
+        interval=np.fromiter(interval, dtype=np.float64, count=len(rows)),
+        repetitions=np.fromiter(repetitions, dtype=np.int64, count=len(rows)),
+        review_count=np.fromiter(review_count, dtype=np.int64, count=len(rows)),
+        mastery=np.fromiter(mastery, dtype=np.float64, count=len(rows)),
+        next_review=np.array([np.nan if t is None else float(t) for t in next_review], dtype=np.float64),
+    )
+
+
+def _state_rows(state: ReviewState) -> List[tuple]:
+    next_review = [
+        None if np.isnan(ts) else datetime.fromtimestamp(ts, tz=timezone.utc)
+        for ts in state.next_review.tolist()
+    ]
+    return list(zip(
+        state.ids.tolist(),
+        state.ease.tolist(),
+        state.interval.tolist(),
+        state.repetitions.tolist(),
+        state.review_count.tolist(),
+        np.clip(state.mastery, 0.0, 1.0).tolist(),
+        next_review,
+    ))
+
+
+def _write_statement(rows: List[tuple]):
+    """Build one ``UPDATE ... FROM (VALUES ...)`` writing rows back by id."""
+    data = values(
+        column("id", Integer),
+        column("ease", Float),
+        column("interval", Float),
+        column("repetitions", Integer),
+        column("review_count", Integer),
+        column("mastery", Float),
+        column("next_review", DateTime(timezone=True)),
+        name="v",
+    ).data(rows)
+    table = LessonProgress.__table__
+    return (
+        update(table)
+        .where(table.c.id == data.c.id)
+        .values(
+            ease_factor=data.c.ease,
+            interval_days=data.c.interval,
+            repetitions=data.c.repetitions,
+            review_count=data.c.review_count,
+            mastery_level=data.c.mastery,
+            next_review_date=data.c.next_review,
+            # Scheduling is not reading activity
+            last_accessed=table.c.last_accessed,
+        )
+    )
+
+
+def _schedule_query():
+    return select(
+        LessonProgress.lesson_id,
+        Lesson.title.label("lesson_title"),
+        Lesson.course_id,
+        LessonProgress.next_review_date,
+        LessonProgress.interval_days,
+        LessonProgress.ease_factor,
+        LessonProgress.mastery_level,
+        LessonProgress.review_count,
+    ).join(Lesson, Lesson.id == LessonProgress.lesson_id)
+
+
+async def _write(session: AsyncSession, state: ReviewState) -> None:
+    rows = _state_rows(state)
+    for start in range(0, len(rows), WRITE_CHUNK_SIZE):
+        await session.execute(_write_statement(rows[start:start + WRITE_CHUNK_SIZE]))
+
+
+class ReviewScheduler:
+    """Service class for review queues and graded reviews."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_due_reviews(self, user_id: int, limit: int = 20) -> List[SpacedRepetitionSchedule]:
+        """Lessons due for review now, most overdue first."""
+        try:
+            result = await self.db.execute(
+                _schedule_query()
+                .where(
+                    LessonProgress.user_id == user_id,
+                    LessonProgress.next_review_date <= func.now(),
+                )
+                .order_by(LessonProgress.next_review_date)
+                .limit(limit)
+            )
+            rows = result.all()
+        except Exception as e:
+            logger.error("Failed to get due reviews", user_id=user_id, error=str(e))
+            raise DatabaseException("Failed to retrieve due reviews", error_code="REVIEW_QUEUE_ERROR")
+
+        return [SpacedRepetitionSchedule(**row._mapping) for row in rows]
+
+    async def submit_reviews(self, user_id: int, grades: Dict[int, int]) -> List[SpacedRepetitionSchedule]:
+        """Apply graded reviews (lesson id -> quality 0-5) and return the new schedule."""
+        try:
+            await self.apply_reviews(user_id, grades)
+            await self.db.commit()
+            result = await self.db.execute(
+                _schedule_query()
+                .where(LessonProgress.user_id == user_id, LessonProgress.lesson_id.in_(list(grades)))
+                .order_by(LessonProgress.next_review_date)
+            )
+            rows = result.all()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to submit reviews", user_id=user_id, error=str(e))
+            raise DatabaseException("Failed to submit reviews", error_code="REVIEW_SUBMIT_ERROR")
+
+        logger.info("Reviews submitted", user_id=user_id, reviews=len(grades))
+        return [SpacedRepetitionSchedule(**row._mapping) for row in rows]
+
+    async def apply_reviews(self, user_id: int, grades: Dict[int, int]) -> int:
+        """Apply grades in the caller's transaction; returns rows updated.
+
+        Lessons the learner has no progress row for are ignored.
+        """
+        if not grades:
+            return 0
+        result = await self.db.execute(
+            select(*_STATE_COLUMNS, LessonProgress.lesson_id)
+            .where(LessonProgress.user_id == user_id, LessonProgress.lesson_id.in_(list(grades)))
+            .order_by(LessonProgress.id)
+            .with_for_update()
+        )
+        rows = result.all()
+        if not rows:
+            return 0
+
+        state = _to_state([row[:-1] for row in rows])
+        quality = np.array([grades[row[-1]] for row in rows], dtype=np.float64)
+        now = datetime.now(timezone.utc).timestamp()
+        await _write(self.db, apply_grades(state, quality, now))
+        return len(rows)
+
+
+@outbox_relay.register(QUIZ_ATTEMPTED, "review_scheduler")
+async def _on_quiz_attempted(session: AsyncSession, event: OutboxEvent) -> None:
+    payload = event.payload
+    await ReviewScheduler(session).apply_reviews(
+        payload["user_id"], {payload["lesson_id"]: score_to_quality(payload["score"])}
+    )
+
+
+async def run_nightly_schedule(batch_size: int) -> Tuple[int, int]:
+    """Schedule newly completed lessons and decay overdue mastery.
+
+    Returns (rows scheduled, rows decayed). Rows are processed in keyset
+    batches by id, each computed with NumPy and committed on its own, while a
+    separate transaction holds the advisory lock for the whole pass.
+    """
+    async with AsyncSessionLocal() as lock_session, AsyncSessionLocal() as session:
+        if not await lock_session.scalar(select(func.pg_try_advisory_xact_lock(SCHEDULER_LOCK_ID))):
+            return 0, 0
+
+        now = datetime.now(timezone.utc).timestamp()
+        scheduled = await _process_batches(
+            session,
+            batch_size,
+            (LessonProgress.is_completed.is_(True), LessonProgress.next_review_date.is_(None)),
+            lambda state: _schedule_first_review(state, now),
+        )
+        decayed = await _process_batches(
+            session,
+            batch_size,
+            # Only rows that missed their review by more than a day
+            (LessonProgress.next_review_date < func.now() - timedelta(days=1),
+             LessonProgress.mastery_level > 0),
+            _decay_overdue,
+        )
+        # Earliest review per course, for course-level reminders
+        await session.execute(_course_next_review_statement())
+        await session.commit()
+        await lock_session.commit()
+
+    logger.info("Nightly review scheduling finished", scheduled=scheduled, decayed=decayed)
+    return scheduled, decayed
+
+
+def _schedule_first_review(state: ReviewState, now: float) -> ReviewState:
+    state.interval = np.ones_like(state.interval)
+    state.next_review = np.full_like(state.next_review, now + DAY_SECONDS)
+    return state
+
+
+def _decay_overdue(state: ReviewState) -> ReviewState:
+    state.mastery = decay_mastery(state.mastery, state.interval)
+    return state
+
+
+async def _process_batches(session: AsyncSession, batch_size: int, conditions, transform) -> int:
+    processed = 0
+    last_id = 0
+    while True:
+        result = await session.execute(
+            select(*_STATE_COLUMNS)
+            .where(LessonProgress.id > last_id, *conditions)
+            .order_by(LessonProgress.id)
+            .limit(batch_size)
+            # Locked until the batch commits, so a review applied meanwhile
+            # isn't overwritten; rows being reviewed now wait for the next run
+            .with_for_update(skip_locked=True)
+        )
+        rows = result.all()
+        if not rows:
+            return processed
+        state = transform(_to_state(rows))
+        await _write(session, state)
+        await session.commit()
+        processed += len(rows)
+        last_id = rows[-1][0]
+
+
+def _course_next_review_statement():
+    earliest = (
+        select(
+            LessonProgress.user_id,
+            Lesson.course_id,
+            func.min(LessonProgress.next_review_date).label("next_review_date"),
+        )
+        .join(Lesson, Lesson.id == LessonProgress.lesson_id)
+        .where(LessonProgress.next_review_date.is_not(None))
+        .group_by(LessonProgress.user_id, Lesson.course_id)
+        .subquery()
+    )
+    return (
+        update(UserProgress)
+        .where(
+            UserProgress.user_id == earliest.c.user_id,
+            UserProgress.course_id == earliest.c.course_id,
+            UserProgress.next_review_date.is_distinct_from(earliest.c.next_review_date),
+        )
+        .values(next_review_date=earliest.c.next_review_date, updated_at=UserProgress.updated_at)
+    )
+
+
+async def run_review_scheduler(interval_hours: float) -> None:
+    """Run the nightly pass every ``interval_hours`` until cancelled."""
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            await run_nightly_schedule(settings.REVIEW_BATCH_SIZE)
+        except Exception as e:
+            logger.error("Nightly review scheduling failed", error=str(e))
@@ -0,0 +1,306 @@
+"""
+Bulk application of offline progress changes
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.exceptions import DatabaseException
+from app.models.course import Course
+from app.models.lesson import Lesson
+from app.models.progress import LessonProgress, UserProgress
+from app.schemas.progress import ProgressSyncMutation, ProgressSyncResult
+from app.services.outbox import (
+    COURSE_ENROLLED,
+    COURSE_UNENROLLED,
+    LESSON_COMPLETED,
+    LESSON_UNCOMPLETED,
+    add_outbox_event,
+)
+from app.services.progress_engine import ProgressEngine
+
+logger = structlog.get_logger()
+
+APPLIED = "applied"
+DUPLICATE = "duplicate"
+STALE = "stale"
+REJECTED = "rejected"
+
+# Clients may run slightly ahead of the server; anything further is refused so a
+# bad clock cannot win every future conflict
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+LESSON = "lesson"
+COURSE = "course"
+
+
+def _normalize(ts: datetime) -> datetime:
+    """Treat naive client timestamps as UTC."""
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+class ProgressSyncService:
+    """Apply a batch of offline mutations with last-writer-wins semantics.
+
+    Mutations are grouped by the progress row they target. Changes older than
+    the stored ``client_updated_at`` are stale; newer ones are folded in
+    timestamp order into one row per target, and all rows are written with
+    ``INSERT ... ON CONFLICT DO UPDATE`` guarded by the same timestamp
+    comparison, in a single transaction. Completion and enrollment
+    transitions are recorded as outbox events in that same transaction.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply(self, user_id: int, mutations: List[ProgressSyncMutation]) -> List[ProgressSyncResult]:
+        """Apply mutations for one user; results are returned in request order."""
+        results: List[Optional[ProgressSyncResult]] = [None] * len(mutations)
+        horizon = datetime.now(timezone.utc) + MAX_CLOCK_SKEW
+
+        targets: Dict[Tuple[str, int], List[Tuple[datetime, int]]] = {}
+        for index, mutation in enumerate(mutations):
+            ts = _normalize(mutation.client_timestamp)
+            if ts > horizon:
+                results[index] = self._result(mutation, REJECTED, "Client timestamp is in the future")
+                continue
+            key = (
+                (LESSON, mutation.lesson_progress.lesson_id)
+                if mutation.lesson_progress is not None
+                else (COURSE, mutation.user_progress.course_id)
+            )
+            targets.setdefault(key, []).append((ts, index))
+
+        try:
+            missing, lesson_courses = await self._missing_targets(mutations, targets)
+            for key in missing:
+                detail = "Lesson not found" if key[0] == LESSON else "Course or current lesson not found in course"
+                for _, index in targets.pop(key):
+                    results[index] = self._result(mutations[index], REJECTED, detail)
+
+            stored = await self._lock_stored_state(user_id, targets)
+
+            rows: Dict[Tuple[str, int], Dict[str, Any]] = {}
+            for key, entries in targets.items():
+                # Ties keep request order, so the later mutation in the batch wins
+                entries.sort()
+                current, _ = stored.get(key, (None, None))
+                row = None
+                for ts, index in entries:
+                    if current is not None and ts < current:
+                        results[index] = self._result(mutations[index], STALE)
+                        continue
+                    if current is not None and ts == current:
+                        # Same change replayed after a lost response
+                        results[index] = self._result(mutations[index], DUPLICATE)
+                        continue
+                    row = self._fold(row, user_id, key, mutations[index], ts)
+                    results[index] = self._result(mutations[index], APPLIED)
+                if row is not None:
+                    rows[key] = row
+
+            written = await self._upsert(rows)
+
+            # A concurrent sync may have inserted a newer row after our read
+            for key in set(rows) - written:
+                for _, index in targets[key]:
+                    if results[index].status == APPLIED:
+                        results[index] = self._result(mutations[index], STALE)
+
+            course_transitions = self._emit_transitions(user_id, rows, written, stored, lesson_courses)
+            # Keep course counters and next-lesson pointers in step with the lesson rows
+            progress_engine = ProgressEngine(self.db)
+            for course_id, (delta, anchor_lesson_id) in sorted(course_transitions.items()):
+                await progress_engine.apply_lesson_transitions(user_id, course_id, anchor_lesson_id, delta)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Progress sync failed", user_id=user_id, mutations=len(mutations), error=str(e))
+            raise DatabaseException("Failed to sync progress", error_code="PROGRESS_SYNC_ERROR")
+
+        logger.info(
+            "Progress synced",
+            user_id=user_id,
+            mutations=len(mutations),
+            rows_written=len(written),
+        )
+        return results
+
+    @staticmethod
+    def _result(mutation: ProgressSyncMutation, status: str, detail: Optional[str] = None) -> ProgressSyncResult:
+        return ProgressSyncResult(client_mutation_id=mutation.client_mutation_id, status=status, detail=detail)
+
+    async def _missing_targets(
+        self, mutations: List[ProgressSyncMutation], targets: Dict[Tuple[str, int], List[Tuple[datetime, int]]]
+    ) -> Tuple[List[Tuple[str, int]], Dict[int, int]]:
+        """Return targets whose lesson or course does not exist, and each lesson's course.
+
+        Only published lessons count, and a course mutation's current lesson
+        must belong to that course.
+        """
+        lesson_ids = {key[1] for key in targets if key[0] == LESSON}
+        course_ids = {key[1] for key in targets if key[0] == COURSE}
+        # Course mutations may also point at a current lesson
+        referenced = {
+            mutations[index].user_progress.current_lesson_id
+            for key, entries in targets.items() if key[0] == COURSE
+            for _, index in entries
+        }
+        referenced.discard(None)
+
+        lesson_courses: Dict[int, int] = {}
+        if lesson_ids or referenced:
+            result = await self.db.execute(
+                select(Lesson.id, Lesson.course_id)
+                .where(Lesson.id.in_(lesson_ids | referenced), Lesson.is_published.is_(True))
+            )
+            lesson_courses = dict(result.all())
+        existing_courses = set()
+        if course_ids:
+            result = await self.db.execute(select(Course.id).where(Course.id.in_(course_ids)))
+            existing_courses = set(result.scalars())
+
+        missing = []
+        for key, entries in targets.items():
+            if key[0] == LESSON:
+                if key[1] not in lesson_courses:
+                    missing.append(key)
+            else:
+                current_ids = {mutations[index].user_progress.current_lesson_id for _, index in entries} - {None}
+                if key[1] not in existing_courses or any(
+                    lesson_courses.get(lesson_id) != key[1] for lesson_id in current_ids
+                ):
+                    missing.append(key)
+        return missing, lesson_courses
+
+    async def _lock_stored_state(
+        self, user_id: int, targets: Dict[Tuple[str, int], Any]
+    ) -> Dict[Tuple[str, int], Tuple[Optional[datetime], bool]]:
+        """Row-lock existing targets; returns their sync timestamp and completion/enrollment flag."""
+        stored: Dict[Tuple[str, int], Tuple[Optional[datetime], bool]] = {}
+        lesson_ids = sorted(key[1] for key in targets if key[0] == LESSON)
+        course_ids = sorted(key[1] for key in targets if key[0] == COURSE)
+
+        if lesson_ids:
+            result = await self.db.execute(
+                select(LessonProgress.lesson_id, LessonProgress.client_updated_at, LessonProgress.is_completed)
+                .where(LessonProgress.user_id == user_id, LessonProgress.lesson_id.in_(lesson_ids))
+                .order_by(LessonProgress.lesson_id)
+                .with_for_update()
+            )
+            stored.update({(LESSON, lesson_id): (ts, flag) for lesson_id, ts, flag in result})
+        if course_ids:
+            result = await self.db.execute(
+                select(UserProgress.course_id, UserProgress.client_updated_at, UserProgress.is_enrolled)
+                .where(UserProgress.user_id == user_id, UserProgress.course_id.in_(course_ids))
+                .order_by(UserProgress.course_id)
+                .with_for_update()
+            )
+            stored.update({(COURSE, course_id): (ts, flag) for course_id, ts, flag in result})
+        return stored
+
+    @staticmethod
+    def _fold(
+        row: Optional[Dict[str, Any]],
+        user_id: int,
+        key: Tuple[str, int],
+        mutation: ProgressSyncMutation,
+        ts: datetime,
+    ) -> Dict[str, Any]:
+        """Merge one mutation's set fields into the pending row for its target."""
+        if row is None:
+            kind, target_id = key
+            row = {"user_id": user_id, "lesson_id" if kind == LESSON else "course_id": target_id}
+
+        if mutation.lesson_progress is not None:
+            changes = mutation.lesson_progress.dict(exclude_none=True, exclude={"lesson_id"})
+            if "is_completed" in changes:
+                row["completion_time"] = ts if changes["is_completed"] else None
+        else:
+            changes = mutation.user_progress.dict(exclude_none=True, exclude={"course_id"})
+
+        row.update(changes)
+        row["client_updated_at"] = ts
+        return row
+
+    def _emit_transitions(
+        self,
+        user_id: int,
+        rows: Dict[Tuple[str, int], Dict[str, Any]],
+        written: set,
+        stored: Dict[Tuple[str, int], Tuple[Optional[datetime], bool]],
+        lesson_courses: Dict[int, int],
+    ) -> Dict[int, Tuple[int, Optional[int]]]:
+        """Stage outbox events for rows whose completion or enrollment flipped.
+
+        Returns, per course, the net change in completed lessons and the last
+        lesson completed.
+        """
+        course_transitions: Dict[int, Tuple[int, Optional[int]]] = {}
+        for key in sorted(written):
+            kind, target_id = key
+            row = rows[key]
+            # A missing row counts as neither completed nor enrolled
+            _, previous = stored.get(key, (None, False))
+            payload = {"user_id": user_id, "occurred_at": row["client_updated_at"].isoformat()}
+
+            if kind == LESSON:
+                if "is_completed" not in row or row["is_completed"] == previous:
+                    continue
+                payload.update(lesson_id=target_id, course_id=lesson_courses[target_id])
+                event_type = LESSON_COMPLETED if row["is_completed"] else LESSON_UNCOMPLETED
+                add_outbox_event(self.db, event_type, "lesson", target_id, payload)
+
+                delta, anchor = course_transitions.get(payload["course_id"], (0, None))
+                if row["is_completed"]:
+                    course_transitions[payload["course_id"]] = (delta + 1, target_id)
+                else:
+                    course_transitions[payload["course_id"]] = (delta - 1, anchor)
+            else:
+                # Inserted course rows default to enrolled
+                enrolled = row.get("is_enrolled", previous if key in stored else True)
+                if enrolled == previous:
+                    continue
+                payload.update(course_id=target_id)
+                event_type = COURSE_ENROLLED if enrolled else COURSE_UNENROLLED
+                add_outbox_event(self.db, event_type, "course", target_id, payload)
+        return course_transitions
+
+    async def _upsert(self, rows: Dict[Tuple[str, int], Dict[str, Any]]) -> set:
+        """Write folded rows; returns the keys that actually changed."""
+        # Rows touching the same columns share one multi-row statement
+        groups: Dict[Tuple[str, FrozenSet[str]], List[Dict[str, Any]]] = {}
+        for key in sorted(rows):
+            groups.setdefault((key[0], frozenset(rows[key])), []).append(rows[key])
+
+        written = set()
+        for (kind, columns), group in groups.items():
+            result = await self.db.execute(_upsert_statement(kind, columns, group))
+            written.update((kind, target_id) for target_id in result.scalars())
+        return written
+
+
+def _upsert_statement(kind: str, columns: FrozenSet[str], rows: List[Dict[str, Any]]):
+    """Build a last-writer-wins upsert for rows sharing the same column set."""
+    model = LessonProgress if kind == LESSON else UserProgress
+    target = model.lesson_id if kind == LESSON else model.course_id
+
+    stmt = pg_insert(model).values(rows)
+    excluded = stmt.excluded
+    set_ = {name: excluded[name] for name in columns if name not in ("user_id", target.key)}
+    if kind == COURSE:
+        set_["updated_at"] = func.now()
+
+    return stmt.on_conflict_do_update(
+        index_elements=[model.user_id, target],
+        set_=set_,
+        where=or_(
+            model.client_updated_at.is_(None),
+            model.client_updated_at < excluded.client_updated_at,
+        ),
+    ).returning(target)
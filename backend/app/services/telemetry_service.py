@@ -0,0 +1,206 @@
+"""
+Write-behind aggregation of high-frequency lesson telemetry
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Float, Integer, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+import structlog
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.lesson import Lesson
+from app.models.progress import LessonProgress
+from app.models.user import User
+from app.services.outbox import LEARNING_TIME_RECORDED, add_outbox_event
+from app.services.write_behind import WriteBehindBuffer
+
+logger = structlog.get_logger()
+
+# Keeps each statement well under PostgreSQL's bind parameter limit
+UPSERT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class TelemetryDelta:
+    """Coalesced telemetry for one (user, lesson) pair since the last flush."""
+    scroll_percentage: float = 0.0
+    interaction_count: int = 0
+    time_spent_seconds: float = 0.0
+    last_accessed: Optional[datetime] = None
+
+
+class LessonTelemetryBuffer(WriteBehindBuffer):
+    """Coalesce reading telemetry per (user, lesson) and bulk-upsert it.
+
+    Scroll depth and last access keep their maximum, interactions and time
+    spent are summed. Time is stored in whole minutes, so leftover seconds are
+    carried to the next flush; they are rounded once a flush finds no new
+    activity for the key, and on the final one. Telemetry for lessons or
+    users that don't exist is dropped at write time, carry included. Each flush
+    also emits one learning-time outbox event per user for the stats rollups.
+    """
+
+    name = "lesson_telemetry"
+
+    def _merge(self, key: Hashable, update: TelemetryDelta) -> None:
+        current = self.pending.get(key)
+        if current is None:
+            self.pending[key] = update
+            return
+
+        current.scroll_percentage = max(current.scroll_percentage, update.scroll_percentage)
+        current.interaction_count += update.interaction_count
+        current.time_spent_seconds += update.time_spent_seconds
+        if update.last_accessed and (
+            current.last_accessed is None or update.last_accessed > current.last_accessed
+        ):
+            current.last_accessed = update.last_accessed
+
+    def record(
+        self,
+        user_id: int,
+        lesson_id: int,
+        scroll_percentage: float = 0.0,
+        interactions: int = 0,
+        time_spent_seconds: float = 0.0,
+        accessed_at: Optional[datetime] = None,
+    ) -> None:
+        """Buffer one telemetry event."""
+        self.add(
+            (user_id, lesson_id),
+            TelemetryDelta(
+                scroll_percentage=scroll_percentage,
+                interaction_count=interactions,
+                time_spent_seconds=time_spent_seconds,
+                last_accessed=accessed_at or datetime.utcnow(),
+            ),
+        )
+
+    async def _write(
+        self, batch: Dict[Tuple[int, int], TelemetryDelta], final: bool
+    ) -> Dict[Tuple[int, int], TelemetryDelta]:
+        rows = []
+        carried = []
+        carry = {}
+        for (user_id, lesson_id), delta in sorted(batch.items()):
+            # A key holding only carried seconds has gone idle, so its
+            # remainder is settled now instead of being carried forever
+            if final or delta.last_accessed is None:
+                minutes = round(delta.time_spent_seconds / 60)
+            else:
+                minutes, remainder = divmod(delta.time_spent_seconds, 60)
+                minutes = int(minutes)
+                if remainder:
+                    carry[(user_id, lesson_id)] = TelemetryDelta(time_spent_seconds=remainder)
+
+            if delta.last_accessed is None:
+                # Only carried-over seconds. Their row was written by the flush
+                # that carried them, so the minutes are added to it in place.
+                if minutes:
+                    carried.append((user_id, lesson_id, minutes))
+                continue
+
+            rows.append((
+                user_id,
+                lesson_id,
+                delta.scroll_percentage,
+                delta.interaction_count,
+                minutes,
+                delta.last_accessed,
+            ))
+
+        if not rows and not carried:
+            return carry
+
+        user_time: Dict[int, Tuple[int, datetime]] = {}
+        dropped = set()
+        # Rows are sorted by key so concurrent workers lock them in the same order
+        async with AsyncSessionLocal() as session:
+            for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+                chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+                written = set((await session.execute(_upsert_statement(chunk))).all())
+                for user_id, lesson_id, _, _, minutes, last_accessed in chunk:
+                    if (user_id, lesson_id) not in written:
+                        dropped.add((user_id, lesson_id))
+                        continue
+                    if minutes:
+                        total, latest = user_time.get(user_id, (0, last_accessed))
+                        user_time[user_id] = (total + minutes, max(latest, last_accessed))
+                if len(written) < len(chunk):
+                    logger.warning("Dropped telemetry for unknown lessons or users", rows=len(chunk) - len(written))
+            for start in range(0, len(carried), UPSERT_CHUNK_SIZE):
+                await session.execute(_add_time_statement(carried[start:start + UPSERT_CHUNK_SIZE]))
+            for user_id, (minutes, last_accessed) in user_time.items():
+                add_outbox_event(session, LEARNING_TIME_RECORDED, "user", user_id, {
+                    "user_id": user_id,
+                    "minutes": minutes,
+                    "occurred_at": last_accessed.isoformat(),
+                })
+            await session.commit()
+
+        logger.debug("Lesson telemetry flushed", rows=len(rows), carried=len(carried))
+        return {key: delta for key, delta in carry.items() if key not in dropped}
+
+
+def _upsert_statement(rows: List[tuple]):
+    """Build the multi-row upsert merging deltas into existing progress rows.
+
+    Rows are joined to lessons and users so one stale or forged key is
+    dropped instead of failing the whole batch on a foreign key; the
+    statement returns the keys it wrote.
+    """
+    data = values(
+        column("user_id", Integer),
+        column("lesson_id", Integer),
+        column("scroll_percentage", Float),
+        column("interaction_count", Integer),
+        column("time_spent_minutes", Integer),
+        column("last_accessed", DateTime(timezone=True)),
+        name="v",
+    ).data(rows)
+    source = (
+        select(data)
+        .join(Lesson, Lesson.id == data.c.lesson_id)
+        .join(User, User.id == data.c.user_id)
+    )
+    stmt = pg_insert(LessonProgress).from_select(
+        ["user_id", "lesson_id", "scroll_percentage", "interaction_count", "time_spent_minutes", "last_accessed"],
+        source,
+    )
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[LessonProgress.user_id, LessonProgress.lesson_id],
+        set_={
+            "scroll_percentage": func.greatest(
+                LessonProgress.scroll_percentage, excluded.scroll_percentage
+            ),
+            "interaction_count": LessonProgress.interaction_count + excluded.interaction_count,
+            "time_spent_minutes": LessonProgress.time_spent_minutes + excluded.time_spent_minutes,
+            "last_accessed": func.greatest(LessonProgress.last_accessed, excluded.last_accessed),
+        },
+    ).returning(LessonProgress.user_id, LessonProgress.lesson_id)
+
+
+def _add_time_statement(rows: List[tuple]):
+    """Add carried-over minutes to existing progress rows, leaving last access alone."""
+    data = values(
+        column("user_id", Integer), column("lesson_id", Integer), column("minutes", Integer), name="v"
+    ).data(rows)
+    return (
+        update(LessonProgress)
+        .where(LessonProgress.user_id == data.c.user_id, LessonProgress.lesson_id == data.c.lesson_id)
+        .values(
+            time_spent_minutes=LessonProgress.time_spent_minutes + data.c.minutes,
+            last_accessed=LessonProgress.last_accessed,
+        )
+    )
+
+
+lesson_telemetry_buffer = LessonTelemetryBuffer(
+    flush_interval=settings.TELEMETRY_FLUSH_SECONDS,
+    max_pending=settings.TELEMETRY_MAX_PENDING,
+)
@@ -0,0 +1,407 @@
+"""
+Streaming uploads into a content-addressed file store
+
+Request bodies are read as a stream and written to disk in
+``UPLOAD_WRITE_BUFFER_BYTES`` blocks, hashing each block in the same worker
+thread, so neither the event loop nor memory ever holds the whole file. A
+finished file is stored once under its SHA-256 (``objects/ab/abcd...``);
+uploading content that is already stored writes nothing new.
+
+Large lesson media goes through resumable sessions: the client declares the
+size, then PATCHes byte ranges with an ``Upload-Offset`` header until the
+partial file is complete. The partial file's length is the offset, and an
+exclusive lock on it keeps two requests from appending at once.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import os
+import secrets
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Iterable, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import (
+    ConflictException,
+    DatabaseException,
+    PayloadTooLargeException,
+    UploadNotFoundException,
+    ValidationException,
+)
+from app.models.upload import StoredFile, UploadKind, UploadSession
+from app.schemas.upload import StoredFileResponse, UploadSessionCreate, UploadSessionResponse
+
+logger = structlog.get_logger()
+
+_HASH_BLOCK_BYTES = 1 << 20
+
+IMAGE_TYPES = frozenset({"image/png", "image/jpeg", "image/webp", "image/gif"})
+ALLOWED_CONTENT_TYPES = {
+    UploadKind.AVATAR: IMAGE_TYPES,
+    UploadKind.THUMBNAIL: IMAGE_TYPES,
+    UploadKind.LESSON_MEDIA: IMAGE_TYPES | {
+        "video/mp4", "video/webm", "audio/mpeg", "audio/mp4", "application/pdf",
+    },
+}
+
+
+def max_upload_size(kind: UploadKind, resumable: bool = False) -> int:
+    """Largest accepted file; only resumable lesson media may exceed MAX_FILE_SIZE."""
+    if kind == UploadKind.LESSON_MEDIA and resumable:
+        return settings.MAX_MEDIA_FILE_SIZE
+    return settings.MAX_FILE_SIZE
+
+
+def check_content_type(kind: UploadKind, content_type: Optional[str]) -> str:
+    """Normalized media type, if it's allowed for ``kind``."""
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    if media_type not in ALLOWED_CONTENT_TYPES[kind]:
+        raise ValidationException(
+            f"Content type {media_type or 'missing'} is not allowed for {kind.value} uploads",
+            error_code="UNSUPPORTED_CONTENT_TYPE",
+        )
+    return media_type
+
+
+def object_path(sha256: str) -> Path:
+    return Path(settings.UPLOAD_DIR) / "objects" / sha256[:2] / sha256
+
+
+def _partial_dir() -> Path:
+    return Path(settings.UPLOAD_DIR) / "partial"
+
+
+def partial_path(session_id: str) -> Path:
+    return _partial_dir() / session_id
+
+
+def _tmp_dir() -> Path:
+    return Path(settings.UPLOAD_DIR) / "tmp"
+
+
+def file_url(sha256: str) -> str:
+    return f"{settings.API_V1_STR}/uploads/files/{sha256}"
+
+
+class BlockWriter:
+    """Buffers received chunks and writes them to ``file`` in blocks.
+
+    Writes (and hashing, when a hasher is given) run in a worker thread.
+    Raises ``PayloadTooLargeException`` once more than ``limit`` bytes have
+    been received in total, counting from ``written``.
+    """
+
+    def __init__(self, file: BinaryIO, limit: int, hasher=None, written: int = 0):
+        self.file = file
+        self.limit = limit
+        self.hasher = hasher
+        self.size = written
+        self._buffer = bytearray()
+
+    async def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.limit:
+            raise PayloadTooLargeException(
+                f"Upload exceeds the {self.limit} byte limit", error_code="UPLOAD_TOO_LARGE"
+            )
+        self._buffer += chunk
+        if len(self._buffer) >= settings.UPLOAD_WRITE_BUFFER_BYTES:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        block = bytes(self._buffer)
+        self._buffer.clear()
+        await asyncio.to_thread(self._write_block, block)
+
+    def _write_block(self, block: bytes) -> None:
+        self.file.write(block)
+        if self.hasher is not None:
+            self.hasher.update(block)
+
+
+def _open_tmp() -> BinaryIO:
+    tmp_dir = _tmp_dir()
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    return open(tmp_dir / uuid.uuid4().hex, "wb")
+
+
+def _discard(file: BinaryIO) -> None:
+    file.close()
+    Path(file.name).unlink(missing_ok=True)
+
+
+def _hash_file(file: BinaryIO) -> str:
+    file.seek(0)
+    hasher = hashlib.sha256()
+    for block in iter(lambda: file.read(_HASH_BLOCK_BYTES), b""):
+        hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _move_into_store(path: Path, sha256: str) -> bool:
+    """Move a finished file to its content address; True if it was already there."""
+    destination = object_path(sha256)
+    if destination.exists():
+        path.unlink(missing_ok=True)
+        return True
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    # Atomic; a concurrent upload of the same content writes identical bytes
+    os.replace(path, destination)
+    return False
+
+
+def _open_partial(session_id: str, offset: int) -> BinaryIO:
+    """Partial file opened for appending, locked, and checked against ``offset``."""
+    path = partial_path(session_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    file = open(path, "a+b")
+    try:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        file.close()
+        raise ConflictException("Another request is appending to this upload", error_code="UPLOAD_BUSY")
+    current = os.fstat(file.fileno()).st_size
+    if current != offset:
+        file.close()
+        raise ConflictException(
+            f"Upload-Offset {offset} doesn't match the {current} bytes received",
+            error_code="UPLOAD_OFFSET_MISMATCH",
+            details={"offset": current},
+        )
+    return file
+
+
+def _partial_size(session_id: str) -> int:
+    try:
+        return partial_path(session_id).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+class UploadService:
+    """Service class for streaming uploads and resumable upload sessions."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def store_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        kind: UploadKind,
+        content_type: Optional[str],
+        content_length: Optional[int] = None,
+    ) -> StoredFileResponse:
+        """Store a whole file sent as the request body."""
+        content_type = check_content_type(kind, content_type)
+        limit = max_upload_size(kind)
+        if content_length is not None and content_length > limit:
+            raise PayloadTooLargeException(f"Upload exceeds the {limit} byte limit", error_code="UPLOAD_TOO_LARGE")
+
+        file = await asyncio.to_thread(_open_tmp)
+        writer = BlockWriter(file, limit, hasher=hashlib.sha256())
+        try:
+            async for chunk in chunks:
+                await writer.write(chunk)
+            await writer.flush()
+        except BaseException:
+            await asyncio.to_thread(_discard, file)
+            raise
+        await asyncio.to_thread(file.close)
+
+        if writer.size == 0:
+            await asyncio.to_thread(Path(file.name).unlink, True)
+            raise ValidationException("Upload is empty", error_code="EMPTY_UPLOAD")
+        return await self._save(Path(file.name), writer.hasher.hexdigest(), writer.size, content_type)
+
+    async def _save(self, path: Path, sha256: str, size: int, content_type: str) -> StoredFileResponse:
+        deduplicated = await asyncio.to_thread(_move_into_store, path, sha256)
+        try:
+            await self.db.execute(
+                pg_insert(StoredFile)
+                .values(sha256=sha256, size_bytes=size, content_type=content_type)
+                .on_conflict_do_nothing(index_elements=[StoredFile.sha256])
+            )
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to record stored file", sha256=sha256, error=str(e))
+            raise DatabaseException("Failed to store upload", error_code="UPLOAD_STORE_ERROR")
+
+        logger.info("Upload stored", sha256=sha256, size=size, deduplicated=deduplicated)
+        return StoredFileResponse(
+            sha256=sha256, size_bytes=size, content_type=content_type, url=file_url(sha256), deduplicated=deduplicated
+        )
+
+    async def get_stored_file(self, sha256: str) -> StoredFile:
+        result = await self.db.execute(select(StoredFile).where(StoredFile.sha256 == sha256))
+        stored = result.scalar_one_or_none()
+        if stored is None:
+            raise UploadNotFoundException("File not found")
+        return stored
+
+    async def create_session(self, user_id: int, data: UploadSessionCreate) -> UploadSessionResponse:
+        """Start a resumable upload of ``data.size_bytes`` bytes."""
+        content_type = check_content_type(data.kind, data.content_type)
+        limit = max_upload_size(data.kind, resumable=True)
+        if data.size_bytes > limit:
+            raise PayloadTooLargeException(f"Upload exceeds the {limit} byte limit", error_code="UPLOAD_TOO_LARGE")
+
+        session = UploadSession(
+            id=secrets.token_hex(16),
+            user_id=user_id,
+            kind=data.kind,
+            content_type=content_type,
+            size_bytes=data.size_bytes,
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS),
+        )
+        try:
+            self.db.add(session)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to create upload session", user_id=user_id, error=str(e))
+            raise DatabaseException("Failed to create upload session", error_code="UPLOAD_SESSION_ERROR")
+        return _session_response(session, 0)
+
+    async def _get_session(self, user_id: int, session_id: str) -> UploadSession:
+        result = await self.db.execute(
+            select(UploadSession).where(
+                UploadSession.id == session_id,
+                UploadSession.user_id == user_id,
+                UploadSession.expires_at > datetime.now(timezone.utc),
+            )
+        )
+        session = result.scalar_one_or_none()
+        if session is None:
+            raise UploadNotFoundException("Upload session not found")
+        return session
+
+    async def get_session(self, user_id: int, session_id: str) -> UploadSessionResponse:
+        session = await self._get_session(user_id, session_id)
+        return _session_response(session, await asyncio.to_thread(_partial_size, session_id))
+
+    async def append(
+        self,
+        user_id: int,
+        session_id: str,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        content_length: Optional[int] = None,
+    ) -> UploadSessionResponse:
+        """Append the request body at ``offset``; stores the file once it's complete."""
+        session = await self._get_session(user_id, session_id)
+        # Don't hold a pooled connection while the body streams in
+        await self.db.commit()
+        if content_length is not None and offset + content_length > session.size_bytes:
+            raise PayloadTooLargeException(
+                f"Upload exceeds its declared {session.size_bytes} bytes", error_code="UPLOAD_TOO_LARGE"
+            )
+
+        file = await asyncio.to_thread(_open_partial, session_id, offset)
+        try:
+            writer = BlockWriter(file, session.size_bytes, written=offset)
+            try:
+                async for chunk in chunks:
+                    await writer.write(chunk)
+            finally:
+                # Keep what arrived so the client can resume after a disconnect
+                await writer.flush()
+            if writer.size < session.size_bytes:
+                return _session_response(session, writer.size)
+            # Hash and move while still holding the lock
+            sha256 = await asyncio.to_thread(_hash_file, file)
+            path = partial_path(session_id)
+            stored = await self._save(path, sha256, writer.size, session.content_type)
+        finally:
+            await asyncio.to_thread(file.close)
+
+        try:
+            await self.db.execute(delete(UploadSession).where(UploadSession.id == session_id))
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to close upload session", session_id=session_id, error=str(e))
+        return _session_response(session, writer.size, stored)
+
+    async def cancel_session(self, user_id: int, session_id: str) -> None:
+        await self._get_session(user_id, session_id)
+        try:
+            await self.db.execute(delete(UploadSession).where(UploadSession.id == session_id))
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to cancel upload session", session_id=session_id, error=str(e))
+            raise DatabaseException("Failed to cancel upload session", error_code="UPLOAD_SESSION_ERROR")
+        await asyncio.to_thread(partial_path(session_id).unlink, True)
+
+
+def _session_response(
+    session: UploadSession, offset: int, stored: Optional[StoredFileResponse] = None
+) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        id=session.id,
+        kind=session.kind,
+        content_type=session.content_type,
+        size_bytes=session.size_bytes,
+        offset=offset,
+        expires_at=session.expires_at,
+        file=stored,
+    )
+
+
+def _remove_stale_files(session_ids: Iterable[str], cutoff: float) -> int:
+    removed = 0
+    for session_id in session_ids:
+        partial_path(session_id).unlink(missing_ok=True)
+    # Orphans: abandoned single-shot temp files, partials whose row is gone
+    for directory in (_tmp_dir(), _partial_dir()):
+        if not directory.is_dir():
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+    return removed
+
+
+async def purge_expired_uploads() -> int:
+    """Delete expired upload sessions and stale partial files; returns the session count."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            delete(UploadSession)
+            .where(UploadSession.expires_at <= datetime.now(timezone.utc))
+            .returning(UploadSession.id)
+        )
+        expired = result.scalars().all()
+        await session.commit()
+    cutoff = time.time() - settings.UPLOAD_SESSION_TTL_HOURS * 3600
+    orphans = await asyncio.to_thread(_remove_stale_files, expired, cutoff)
+    if expired or orphans:
+        logger.info("Purged stale uploads", sessions=len(expired), files=orphans)
+    return len(expired)
+
+
+async def run_upload_janitor(interval_hours: float) -> None:
+    """Purge expired uploads every ``interval_hours`` until cancelled."""
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            await purge_expired_uploads()
+        except Exception as e:
+            logger.error("Upload cleanup failed", error=str(e))
@@ -5,14 +5,16 @@ User service for business logic and database operations
 from typing import Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 import structlog
 
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash_async, verify_password_async
 from app.core.exceptions import UserNotFoundException, DatabaseException
+from app.services.batch_service import profile_cache
+from app.services.counter_service import counter_service
 
 logger = structlog.get_logger()
 
@@ -47,7 +49,7 @@ class UserService:
         """Create a new user."""
         try:
             # Hash the password
-            hashed_password = get_password_hash(user_data.password)
+            hashed_password = await get_password_hash_async(user_data.password)
             
             # Create user instance
             user = User(
@@ -92,6 +94,7 @@ class UserService:
             await self.db.commit()
             await self.db.refresh(user)
             
+            profile_cache.invalidate([user_id])
             logger.info("User updated successfully", user_id=user_id)
             return user
             
@@ -109,7 +112,7 @@ class UserService:
             if not user:
                 return None
             
-            if not verify_password(password, user.hashed_password):
+            if not await verify_password_async(password, user.hashed_password):
                 return None
             
             return user
@@ -119,19 +122,12 @@ class UserService:
             return None
     
     async def update_last_login(self, user_id: int) -> None:
-        """Update user's last login timestamp."""
-        try:
-            stmt = (
-                update(User)
-                .where(User.id == user_id)
-                .values(last_login=datetime.utcnow())
-            )
-            await self.db.execute(stmt)
-            await self.db.commit()
-            
-        except Exception as e:
-            logger.error("Failed to update last login", user_id=user_id, error=str(e))
-            # Don't raise exception for this non-critical operation
+        """Record user's last login timestamp.
+        
+        The write is batched by the counter service rather than issuing its
+        own UPDATE and COMMIT on the login path.
+        """
+        counter_service.touch_last_login(user_id)
     
     async def deactivate_user(self, user_id: int) -> Optional[User]:
         """Deactivate a user account."""
@@ -146,6 +142,7 @@ class UserService:
             await self.db.commit()
             await self.db.refresh(user)
             
+            profile_cache.invalidate([user_id])
             logger.info("User deactivated", user_id=user_id)
             return user
             
@@ -169,6 +166,7 @@ class UserService:
             await self.db.commit()
             await self.db.refresh(user)
             
+            profile_cache.invalidate([user_id])
             logger.info("User activated", user_id=user_id)
             return user
             
@@ -210,7 +208,7 @@ class UserService:
                 raise UserNotFoundException("User not found")
             
             # Hash new password
-            hashed_password = get_password_hash(new_password)
+            hashed_password = await get_password_hash_async(new_password)
             user.hashed_password = hashed_password
             user.updated_at = datetime.utcnow()
             
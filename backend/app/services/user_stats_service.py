@@ -0,0 +1,204 @@
+"""
+Incrementally maintained per-user learning stats
+
+An outbox consumer folds progress events into one ``user_stats`` row per
+learner. Active days are kept in a compact bitmap anchored at the latest
+active day, so streaks are computed from a few bytes instead of scanning
+activity timestamps.
+"""
+
+from datetime import date, datetime, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.exceptions import DatabaseException
+from app.models.outbox import OutboxEvent
+from app.models.stats import UserStatsRollup
+from app.schemas.user import UserStats
+from app.services.outbox import (
+    COURSE_COMPLETED,
+    COURSE_ENROLLED,
+    COURSE_UNCOMPLETED,
+    COURSE_UNENROLLED,
+    LEARNING_TIME_RECORDED,
+    LESSON_COMPLETED,
+    LESSON_UNCOMPLETED,
+    outbox_relay,
+)
+
+logger = structlog.get_logger()
+
+CONSUMER = "user_stats"
+
+# Days of history kept in the bitmap; streaks longer than this are reported as this
+ACTIVITY_WINDOW_DAYS = 512
+
+# Achievement thresholds, evaluated against the stored counters
+LESSON_MILESTONES = (1, 10, 50, 100, 500)
+COURSE_MILESTONES = (1, 5, 10)
+STREAK_MILESTONES = (3, 7, 30, 100, 365)
+
+
+def mark_active(bitmap: bytes, anchor: Optional[date], day: date) -> Tuple[bytes, date]:
+    """Set the bit for ``day``, re-anchoring when it is newer than the anchor."""
+    bits = int.from_bytes(bitmap, "little")
+    if anchor is None:
+        bits, anchor = 1, day
+    elif day > anchor:
+        bits = (bits << (day - anchor).days) | 1
+        anchor = day
+    elif (anchor - day).days < ACTIVITY_WINDOW_DAYS:
+        # Late event, e.g. replayed by an offline client
+        bits |= 1 << (anchor - day).days
+
+    bits &= (1 << ACTIVITY_WINDOW_DAYS) - 1
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little"), anchor
+
+
+def streak_ending_at_anchor(bitmap: bytes) -> int:
+    """Number of consecutive active days ending at the anchor day."""
+    bits = int.from_bytes(bitmap, "little")
+    # Trailing ones: the lowest clear bit marks the first inactive day
+    return ((bits + 1) & ~bits).bit_length() - 1
+
+
+def current_streak(bitmap: bytes, anchor: Optional[date], today: date) -> int:
+    """Streak still alive today: the learner was active today or yesterday."""
+    if anchor is None or (today - anchor).days > 1:
+        return 0
+    return streak_ending_at_anchor(bitmap)
+
+
+def achievements_earned(stats: UserStatsRollup) -> int:
+    """Count milestones reached; all are monotonic so none are ever revoked."""
+    return (
+        sum(stats.lessons_completed >= n for n in LESSON_MILESTONES)
+        + sum(stats.courses_completed >= n for n in COURSE_MILESTONES)
+        + sum(stats.longest_streak_days >= n for n in STREAK_MILESTONES)
+    )
+
+
+def _event_day(event: OutboxEvent) -> date:
+    occurred_at = event.payload.get("occurred_at")
+    moment = datetime.fromisoformat(occurred_at) if occurred_at else event.created_at
+    if moment.tzinfo is None:
+        return moment.date()
+    return moment.astimezone(timezone.utc).date()
+
+
+async def _locked_stats(session: AsyncSession, user_id: int) -> UserStatsRollup:
+    """Get or create the user's stats row, locked for this transaction."""
+    await session.execute(
+        pg_insert(UserStatsRollup).values(user_id=user_id).on_conflict_do_nothing()
+    )
+    result = await session.execute(
+        select(UserStatsRollup)
+        .where(UserStatsRollup.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+def _record_activity(stats: UserStatsRollup, day: date) -> None:
+    stats.activity_bitmap, stats.activity_anchor_date = mark_active(
+        stats.activity_bitmap, stats.activity_anchor_date, day
+    )
+    stats.longest_streak_days = max(
+        stats.longest_streak_days, streak_ending_at_anchor(stats.activity_bitmap)
+    )
+    stats.updated_at = datetime.now(timezone.utc)
+
+
+@outbox_relay.register(LESSON_COMPLETED, CONSUMER)
+async def _on_lesson_completed(session: AsyncSession, event: OutboxEvent) -> None:
+    stats = await _locked_stats(session, event.payload["user_id"])
+    stats.lessons_completed += 1
+    _record_activity(stats, _event_day(event))
+
+
+@outbox_relay.register(LESSON_UNCOMPLETED, CONSUMER)
+async def _on_lesson_uncompleted(session: AsyncSession, event: OutboxEvent) -> None:
+    stats = await _locked_stats(session, event.payload["user_id"])
+    stats.lessons_completed = max(0, stats.lessons_completed - 1)
+    stats.updated_at = datetime.now(timezone.utc)
+
+
+@outbox_relay.register(COURSE_ENROLLED, CONSUMER)
+async def _on_enrolled(session: AsyncSession, event: OutboxEvent) -> None:
+    stats = await _locked_stats(session, event.payload["user_id"])
+    stats.courses_enrolled += 1
+    _record_activity(stats, _event_day(event))
+
+
+@outbox_relay.register(COURSE_UNENROLLED, CONSUMER)
+async def _on_unenrolled(session: AsyncSession, event: OutboxEvent) -> None:
+    stats = await _locked_stats(session, event.payload["user_id"])
+    stats.courses_enrolled = max(0, stats.courses_enrolled - 1)
+    stats.updated_at = datetime.now(timezone.utc)
+
+
+@outbox_relay.register(COURSE_COMPLETED, CONSUMER)
+async def _on_course_completed(session: AsyncSession, event: OutboxEvent) -> None:
+    stats = await _locked_stats(session, event.payload["user_id"])
+    stats.courses_completed += 1
+    _record_activity(stats, _event_day(event))
+
+
+@outbox_relay.register(COURSE_UNCOMPLETED, CONSUMER)
+async def _on_course_uncompleted(session: AsyncSession, event: OutboxEvent) -> None:
+    stats = await _locked_stats(session, event.payload["user_id"])
+    stats.courses_completed = max(0, stats.courses_completed - 1)
+    stats.updated_at = datetime.now(timezone.utc)
+
+
+@outbox_relay.register(LEARNING_TIME_RECORDED, CONSUMER)
+async def _on_time_recorded(session: AsyncSession, event: OutboxEvent) -> None:
+    stats = await _locked_stats(session, event.payload["user_id"])
+    stats.time_spent_minutes += event.payload["minutes"]
+    _record_activity(stats, _event_day(event))
+
+
+class UserStatsService:
+    """Service class for per-user stats reads."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_user_stats(self, user_id: int) -> UserStats:
+        """Read a user's precomputed stats with a single-row lookup."""
+        try:
+            result = await self.db.execute(
+                select(UserStatsRollup).where(UserStatsRollup.user_id == user_id)
+            )
+            stats = result.scalar_one_or_none()
+        except Exception as e:
+            logger.error("Failed to get user stats", user_id=user_id, error=str(e))
+            raise DatabaseException("Failed to retrieve user stats", error_code="USER_STATS_FETCH_ERROR")
+
+        if stats is None:
+            return UserStats(
+                total_courses_enrolled=0,
+                total_courses_completed=0,
+                total_lessons_completed=0,
+                total_time_spent_minutes=0,
+                current_streak_days=0,
+                achievements_earned=0,
+            )
+
+        return UserStats(
+            total_courses_enrolled=stats.courses_enrolled,
+            total_courses_completed=stats.courses_completed,
+            total_lessons_completed=stats.lessons_completed,
+            total_time_spent_minutes=stats.time_spent_minutes,
+            current_streak_days=current_streak(
+                stats.activity_bitmap,
+                stats.activity_anchor_date,
+                datetime.now(timezone.utc).date(),
+            ),
+            achievements_earned=achievements_earned(stats),
+        )
@@ -0,0 +1,98 @@
+"""
+Base class for in-memory write-behind buffers flushed to the database
+"""
+
+import asyncio
+from typing import Any, Dict, Hashable, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class WriteBehindBuffer:
+    """Coalesce writes in memory and flush them in bulk.
+
+    Subclasses merge incoming updates into ``self.pending`` keyed by row and
+    implement ``_write`` to apply a whole batch in one statement. A flush runs
+    every ``flush_interval`` seconds, as soon as ``max_pending`` keys are
+    buffered, and once more on ``stop()``. At most one interval's worth of
+    updates (bounded by ``max_pending`` keys) can be lost on a hard crash.
+    """
+
+    name = "write_behind"
+
+    def __init__(self, flush_interval: float, max_pending: int, max_retained: Optional[int] = None):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retained = max_retained or max_pending * 10
+        self.pending: Dict[Hashable, Any] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def _merge(self, key: Hashable, update: Any) -> None:
+        """Fold ``update`` into the pending entry for ``key``."""
+        raise NotImplementedError
+
+    async def _write(self, batch: Dict[Hashable, Any], final: bool) -> Dict[Hashable, Any]:
+        """Persist a batch; return any entries to carry over to the next flush."""
+        raise NotImplementedError
+
+    def add(self, key: Hashable, update: Any) -> None:
+        """Buffer an update; never touches the database."""
+        self._merge(key, update)
+        if len(self.pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def flush(self, final: bool = False) -> int:
+        """Write everything buffered so far; returns the number of keys written."""
+        async with self._flush_lock:
+            if not self.pending:
+                return 0
+
+            batch, self.pending = self.pending, {}
+            try:
+                carry = await self._write(batch, final)
+            except Exception as e:
+                logger.error("Write-behind flush failed", buffer=self.name, keys=len(batch), error=str(e))
+                self._requeue(batch)
+                return 0
+
+            for key, value in carry.items():
+                self._merge(key, value)
+            return len(batch)
+
+    def _requeue(self, batch: Dict[Hashable, Any]) -> None:
+        """Merge a failed batch back in, dropping it if memory is over budget."""
+        if len(self.pending) + len(batch) > self.max_retained:
+            logger.error("Write-behind buffer over capacity, dropping batch", buffer=self.name, keys=len(batch))
+            return
+        for key, value in batch.items():
+            self._merge(key, value)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the periodic flush task on the running loop."""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush task and write out anything still buffered."""
+        self._stopping = True
+        if self._task is not None:
+            # Let an in-flight flush finish rather than cancelling mid-write
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush(final=True)
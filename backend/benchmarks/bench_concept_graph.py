@@ -0,0 +1,96 @@
+"""
+Benchmark concept graph queries against scanning every lesson
+
+Builds a graph over a synthetic catalog, checks unlock queries against a
+direct scan of the lesson rows, then times unlock lookups, single-lesson
+updates and course order analysis. Pure computation; no database is needed.
+
+Usage:
+    python -m benchmarks.bench_concept_graph [--lessons 20000] [--lessons-per-course 40]
+"""
+
+import argparse
+import dataclasses
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.concept_graph import ConceptGraph, LessonNode, _concept_set  # noqa: E402
+
+
+def _median_us(fn, runs: int) -> float:
+    timings = []
+    for run in range(runs):
+        start = time.perf_counter()
+        fn(run)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lessons", type=int, default=20000)
+    parser.add_argument("--lessons-per-course", type=int, default=40)
+    parser.add_argument("--prerequisites", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    per_course = args.lessons_per_course
+    nodes = []
+    for i in range(args.lessons):
+        # Mostly concepts from earlier lessons of the same course, some from anywhere
+        course_start = i - i % per_course
+        requires = [
+            f"concept {rng.randrange(course_start, i) if i > course_start and rng.random() < 0.8 else rng.randrange(args.lessons)}"
+            for _ in range(rng.randint(0, args.prerequisites))
+        ]
+        nodes.append(LessonNode(
+            id=i,
+            course_id=i // per_course,
+            order_index=i % per_course,
+            title=f"Lesson {i}",
+            is_published=True,
+            introduces=_concept_set([f"Concept {i}"]),
+            requires=_concept_set(requires),
+        ))
+
+    start = time.perf_counter()
+    graph = ConceptGraph()
+    for node in nodes:
+        graph.upsert(node)
+    build = time.perf_counter() - start
+
+    mastered = {f"concept {i}" for i in rng.sample(range(args.lessons), args.lessons // 2)}
+    concepts = [f"concept {rng.randrange(args.lessons)}" for _ in range(args.runs)]
+
+    def scan(concept):
+        known = mastered | {concept}
+        return sorted(n.id for n in nodes if concept in n.requires and n.requires <= known)
+
+    for concept in concepts[:200]:
+        assert [n.id for n in graph.unlocked_by(concept, mastered)] == scan(concept)
+
+    indexed = _median_us(lambda run: graph.unlocked_by(concepts[run], mastered), args.runs)
+    scanned = _median_us(lambda run: scan(concepts[run]), min(args.runs, 50))
+    update = _median_us(
+        lambda run: graph.upsert(dataclasses.replace(nodes[run % len(nodes)], title=f"Lesson {run}")), args.runs
+    )
+    courses = args.lessons // per_course
+    order = _median_us(lambda run: graph.course_order(run % courses), min(args.runs, courses))
+
+    print(f"catalog:                 {args.lessons:,} lessons in {courses:,} courses")
+    print(f"build graph:             {build * 1e3:9.1f} ms")
+    print(f"unlocks, scan (median):  {scanned:9.1f} us")
+    print(f"unlocks, graph (median): {indexed:9.1f} us")
+    print(f"lesson update (median):  {update:9.1f} us")
+    print(f"course order (median):   {order:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
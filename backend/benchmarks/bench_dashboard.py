@@ -0,0 +1,187 @@
+"""
+Benchmark the learner dashboard: per-course queries vs one composed query
+
+Seeds one learner enrolled in many courses (each with a handful of lessons,
+some due for review) in the configured database, then builds the dashboard
+both ways and reports latency and statements issued. Requires the app
+environment (DATABASE_URL etc.) and a PostgreSQL database; seeded rows are
+deleted afterwards.
+
+Usage:
+    python -m benchmarks.bench_dashboard [--enrollments 200] [--lessons 8] [--runs 20]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, event, func, select  # noqa: E402
+
+from app.core.database import AsyncSessionLocal, async_engine, init_db  # noqa: E402
+from app.models import Course, Lesson, LessonProgress, User, UserProgress  # noqa: E402
+from app.services.progress_service import ProgressService  # noqa: E402
+
+
+async def seed(enrollments: int, lessons: int):
+    tag = uuid.uuid4().hex[:8]
+    now = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as session:
+        user = User(email=f"bench-{tag}@example.com", hashed_password="x", full_name="Bench")
+        courses = [
+            Course(
+                title=f"Benchmark course {tag} {i}",
+                description="Dashboard benchmark",
+                topic="benchmark",
+                estimated_duration_minutes=60,
+                total_lessons=lessons,
+                slug=f"bench-{tag}-{i}",
+            )
+            for i in range(enrollments)
+        ]
+        session.add_all([user, *courses])
+        await session.flush()
+
+        lesson_rows = [
+            Lesson(course_id=course.id, title=f"Lesson {j}", content="...", order_index=j, slug=f"l-{j}")
+            for course in courses
+            for j in range(lessons)
+        ]
+        session.add_all(lesson_rows)
+        await session.flush()
+
+        by_course = {}
+        for lesson in lesson_rows:
+            by_course.setdefault(lesson.course_id, []).append(lesson)
+
+        for i, course in enumerate(courses):
+            course_lessons = by_course[course.id]
+            done = i % lessons
+            session.add(UserProgress(
+                user_id=user.id,
+                course_id=course.id,
+                lessons_completed=done,
+                completion_percentage=done * 100.0 / lessons,
+                current_lesson_id=course_lessons[done].id,
+                next_lesson_id=course_lessons[min(done + 1, lessons - 1)].id,
+                last_activity_date=now - timedelta(minutes=i),
+            ))
+            session.add_all([
+                LessonProgress(
+                    user_id=user.id,
+                    lesson_id=lesson.id,
+                    is_completed=True,
+                    next_review_date=now + timedelta(days=1 if k % 2 else -1),
+                )
+                for k, lesson in enumerate(course_lessons[:done])
+            ])
+        await session.commit()
+        return user.id, [course.id for course in courses]
+
+
+async def cleanup(user_id, course_ids):
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(LessonProgress).where(LessonProgress.user_id == user_id))
+        await session.execute(delete(UserProgress).where(UserProgress.user_id == user_id))
+        await session.execute(delete(Lesson).where(Lesson.course_id.in_(course_ids)))
+        await session.execute(delete(Course).where(Course.id.in_(course_ids)))
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.commit()
+
+
+async def naive_dashboard(user_id: int):
+    """What the models invite: one lookup per course, lesson and review count."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(UserProgress)
+            .where(UserProgress.user_id == user_id, UserProgress.is_enrolled.is_(True))
+            .order_by(UserProgress.last_activity_date.desc())
+        )
+        items = []
+        for progress in result.scalars():
+            course = await session.get(Course, progress.course_id)
+            current = await session.get(Lesson, progress.current_lesson_id) if progress.current_lesson_id else None
+            upcoming = await session.get(Lesson, progress.next_lesson_id) if progress.next_lesson_id else None
+            due = await session.scalar(
+                select(func.count())
+                .select_from(LessonProgress)
+                .join(Lesson, Lesson.id == LessonProgress.lesson_id)
+                .where(
+                    LessonProgress.user_id == user_id,
+                    Lesson.course_id == progress.course_id,
+                    LessonProgress.next_review_date <= func.now(),
+                )
+            )
+            items.append((course.title, current and current.title, upcoming and upcoming.title, due))
+        return items
+
+
+async def composed_dashboard(user_id: int, page_size: int):
+    async with AsyncSessionLocal() as session:
+        service = ProgressService(session)
+        items, cursor = [], None
+        while True:
+            page = await service.get_dashboard(user_id, limit=page_size, cursor=cursor)
+            items.extend(page.courses)
+            cursor = page.next_cursor
+            if cursor is None:
+                return items
+
+
+async def measure(fn, runs: int):
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    timings = []
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            await fn()
+            timings.append(time.perf_counter() - start)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    return statistics.median(timings) * 1000, statements // runs
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--enrollments", type=int, default=200)
+    parser.add_argument("--lessons", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    await init_db()
+    user_id, course_ids = await seed(args.enrollments, args.lessons)
+    try:
+        naive_ms, naive_statements = await measure(lambda: naive_dashboard(user_id), args.runs)
+        full_ms, full_statements = await measure(
+            lambda: composed_dashboard(user_id, args.enrollments), args.runs
+        )
+        paged_ms, paged_statements = await measure(
+            lambda: composed_dashboard(user_id, args.page_size), args.runs
+        )
+    finally:
+        await cleanup(user_id, course_ids)
+        await async_engine.dispose()
+
+    print(f"enrollments:              {args.enrollments} courses x {args.lessons} lessons")
+    print(f"per-course queries:       {naive_ms:8.1f} ms  ({naive_statements} statements)")
+    print(f"composed, single page:    {full_ms:8.1f} ms  ({full_statements} statements)")
+    paged_label = f"composed, pages of {args.page_size}:"
+    print(f"{paged_label:<26}{paged_ms:8.1f} ms  ({paged_statements} statements)")
+    print(f"speedup (single page):    {naive_ms / full_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
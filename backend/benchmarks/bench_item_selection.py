@@ -0,0 +1,69 @@
+"""
+Benchmark adaptive question selection from precomputed item statistics
+
+Derives item metrics for a synthetic question bank from running sums, checks
+them against a direct computation over raw responses, then times selecting a
+question set from the prebuilt index. Pure computation; no database is
+needed.
+
+Usage:
+    python -m benchmarks.bench_item_selection [--questions 2000] [--count 10]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from app.services.item_stats_service import ItemIndex, item_metrics, select_items  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--questions", type=int, default=2000)
+    parser.add_argument("--responses", type=int, default=200)
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    # Raw responses: x correct (0/1), y attempt score
+    y = rng.uniform(0.0, 1.0, (args.questions, args.responses))
+    x = (rng.uniform(0.0, 1.0, y.shape) < y).astype(np.float64)
+    t = rng.uniform(5.0, 120.0, y.shape)
+    n = np.full(args.questions, float(args.responses))
+
+    p_value, discrimination, avg_time = item_metrics(
+        n, x.sum(1), y.sum(1), (y * y).sum(1), (x * y).sum(1), t.sum(1), n, np.full(args.questions, 0.6)
+    )
+    direct = np.array([np.corrcoef(x[i], y[i])[0, 1] for i in range(args.questions)])
+    assert np.allclose(discrimination, direct)
+    assert np.allclose(avg_time, t.mean(1))
+
+    index = ItemIndex(
+        question_ids=np.arange(args.questions, dtype=np.int64),
+        p_values=p_value,
+        discrimination=discrimination,
+        responses=n.astype(np.int64),
+        avg_time_seconds=avg_time,
+    )
+    timings = []
+    for run in range(args.runs):
+        target = 0.3 + 0.5 * (run % 10) / 10
+        start = time.perf_counter()
+        select_items(index, args.count, target)
+        timings.append(time.perf_counter() - start)
+
+    print(f"question bank:           {args.questions:,} questions, {args.responses} responses each")
+    print(f"select {args.count:<3} (median):     {statistics.median(timings) * 1e6:9.1f} us")
+    print(f"select {args.count:<3} (p99):        {sorted(timings)[int(len(timings) * 0.99)] * 1e6:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark publish-time lesson rendering against rendering per view
+
+Times rendering and compressing a synthetic lesson on every view against
+serving the stored variant, then compares bulk publishing inline with the
+process pool. Pure computation; no database is needed.
+
+Usage:
+    python -m benchmarks.bench_lesson_artifacts [--lessons 200] [--paragraphs 30]
+"""
+
+import argparse
+import asyncio
+import gzip
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.services.lesson_artifacts import (  # noqa: E402
+    artifact_hash,
+    render_artifact,
+    render_artifacts,
+    shutdown_render_pool,
+)
+
+WORDS = "learning memory retrieval practice spacing interleaving feedback concept model evidence".split()
+
+
+def _lesson(rng: random.Random, paragraphs: int, sources: list) -> str:
+    blocks = ["# Lesson"]
+    for i in range(paragraphs):
+        words = " ".join(rng.choice(WORDS) for _ in range(60))
+        key = rng.choice(sources)["citation_key"]
+        blocks.append(f"{words} [@{key}].")
+        if i % 5 == 0:
+            blocks.append("- " + "\n- ".join(rng.choice(WORDS) for _ in range(4)))
+    return "\n\n".join(blocks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lessons", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sources = [{"citation_key": f"Author{i}", "full_citation": f"Author {i} (2001). Title {i}."} for i in range(8)]
+    contents = [_lesson(rng, args.paragraphs, sources) for _ in range(args.lessons)]
+    jobs = [(artifact_hash(content, sources, None), content, sources, None) for content in contents]
+
+    stored = render_artifact(*jobs[0])
+    per_view, served = [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        html = render_artifact(*jobs[0]).html
+        gzip.compress(html, compresslevel=6)
+        per_view.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        stored.body("br")
+        served.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    inline = [render_artifact(*job) for job in jobs]
+    inline_seconds = time.perf_counter() - start
+
+    async def pooled():
+        await render_artifacts(jobs[:settings.ARTIFACT_POOL_MIN_LESSONS])  # Start the workers
+        start = time.perf_counter()
+        artifacts = await render_artifacts(jobs)
+        return artifacts, time.perf_counter() - start
+
+    artifacts, pool_seconds = asyncio.run(pooled())
+    shutdown_render_pool()
+    assert [a.html for a in artifacts] == [a.html for a in inline]
+
+    print(f"lesson html:             {len(stored.html):,} bytes (gzip {len(stored.gzip):,}, br {len(stored.brotli):,})")
+    print(f"render per view:         {statistics.median(per_view) * 1e3:9.2f} ms")
+    print(f"serve stored variant:    {statistics.median(served) * 1e6:9.2f} us")
+    print(f"publish {args.lessons}, inline:    {inline_seconds:9.2f} s")
+    print(f"publish {args.lessons}, pool ({settings.ARTIFACT_RENDER_WORKERS}): {pool_seconds:9.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark per-request logging overhead
+
+Compares the original synchronous structlog setup (stdlib JSONRenderer on the
+calling thread) with the queue-backed pipeline in app.core.logging, measuring
+the time the request path spends emitting its start/completion log lines.
+
+Usage:
+    python -m benchmarks.bench_logging [--requests 20000] [--sample-rate 1.0]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import structlog
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.logging import configure_logging, should_sample, shutdown_logging  # noqa: E402
+
+
+def configure_baseline() -> None:
+    """Reproduce the logging setup main.py used before the queue pipeline."""
+    structlog.reset_defaults()
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.processors.JSONRenderer(),
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        cache_logger_on_first_use=True,
+    )
+    root = logging.getLogger()
+    root.handlers = [logging.StreamHandler()]
+    root.setLevel(logging.INFO)
+
+
+def run_baseline(requests: int) -> float:
+    configure_baseline()
+    logger = structlog.get_logger("bench")
+    url = "http://localhost:8000/api/v1/courses/42?include=lessons"
+
+    start = time.perf_counter()
+    for i in range(requests):
+        logger.info("Request started", method="GET", url=str(url), client_ip="127.0.0.1")
+        logger.info(
+            "Request completed", method="GET", url=str(url), status_code=200, process_time=0.0042
+        )
+    return time.perf_counter() - start
+
+
+def run_pipeline(requests: int, sample_rate: float) -> float:
+    structlog.reset_defaults()
+    configure_logging(
+        level="INFO",
+        sample_rate=sample_rate,
+        queue_size=requests * 2 + 1,
+        stream=open(os.devnull, "wb"),
+    )
+    logger = structlog.get_logger("bench")
+    path = "/api/v1/courses/42"
+
+    start = time.perf_counter()
+    for i in range(requests):
+        sampled = should_sample()
+        if sampled:
+            logger.info("Request started", method="GET", path=path, client_ip="127.0.0.1")
+        if sampled:
+            logger.info(
+                "Request completed", method="GET", path=path, status_code=200, process_time=0.0042
+            )
+    elapsed = time.perf_counter() - start
+    shutdown_logging()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--sample-rate", type=float, default=1.0)
+    args = parser.parse_args()
+
+    # Send rendered output to /dev/null so only logging overhead is measured
+    real_stderr = sys.stderr
+    sys.stderr = open(os.devnull, "w")
+    try:
+        baseline = run_baseline(args.requests)
+        pipeline = run_pipeline(args.requests, args.sample_rate)
+    finally:
+        sys.stderr.close()
+        sys.stderr = real_stderr
+
+    print(f"requests:            {args.requests}")
+    print(f"baseline (sync):     {baseline / args.requests * 1e6:8.2f} us/request")
+    print(
+        f"queued (rate={args.sample_rate:.2f}): "
+        f"{pipeline / args.requests * 1e6:8.2f} us/request"
+    )
+    print(f"speedup:             {baseline / pipeline:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark MessagePack against JSON for the largest API payloads
+
+Builds synthetic instances of the biggest response schemas (a course with
+syllabus and sources, a quiz tree, a dashboard page), converts them the way
+FastAPI does, then compares payload size (raw and gzipped) and encode/decode
+time for the JSON renderer ``JSONResponse`` uses, orjson, and MessagePack.
+Pure computation; no database is needed.
+
+Usage:
+    python -m benchmarks.bench_msgpack [--modules 12] [--questions 40] [--runs 200]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.core.content_negotiation import packb, unpackb  # noqa: E402
+from app.schemas.course import CourseResponse  # noqa: E402
+from app.schemas.progress import DashboardResponse  # noqa: E402
+from app.schemas.quiz import QuizResponse  # noqa: E402
+
+WORDS = "learning memory retrieval practice spacing interleaving feedback concept model evidence".split()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _course(rng: random.Random, modules: int) -> CourseResponse:
+    now = datetime.now(timezone.utc)
+    source = lambda i: {  # noqa: E731
+        "citation_key": f"Author{i}", "authors": [_text(rng, 2), _text(rng, 2)], "year": 1990 + i % 30,
+        "title": _text(rng, 10), "journal": _text(rng, 4), "volume": i, "issue": 2, "pages": "1-20",
+        "doi": f"10.1000/{i}", "full_citation": _text(rng, 30),
+    }
+    return CourseResponse(
+        id=1, title=_text(rng, 6), description=_text(rng, 80), topic="learning science",
+        difficulty_level="intermediate", estimated_duration_minutes=120, tags=WORDS[:5],
+        thumbnail_url="https://cdn.example.com/t.png", slug="course", total_lessons=modules * 4,
+        is_published=True, is_featured=False, view_count=1000, completion_rate=0.4, average_rating=4.5,
+        created_at=now, updated_at=now, published_at=now,
+        syllabus={"modules": [
+            {"title": _text(rng, 5), "summary": _text(rng, 40), "lessons": [
+                {"title": _text(rng, 6), "objectives": [_text(rng, 12) for _ in range(3)], "minutes": 3}
+                for _ in range(4)
+            ]}
+            for _ in range(modules)
+        ]},
+        learning_objectives=[_text(rng, 12) for _ in range(6)],
+        prerequisites=[_text(rng, 4) for _ in range(4)],
+        sources=[source(i) for i in range(modules * 2)],
+        citations=[{"citation_key": f"Author{i}", "page": i} for i in range(modules * 2)],
+    )
+
+
+def _quiz(rng: random.Random, questions: int) -> QuizResponse:
+    now = datetime.now(timezone.utc)
+    return QuizResponse(
+        id=1, lesson_id=1, title=_text(rng, 5), instructions=_text(rng, 30), created_at=now, updated_at=now,
+        questions=[
+            {
+                "id": q, "quiz_id": 1, "question_text": _text(rng, 25), "order_index": q, "hint": _text(rng, 10),
+                "concept_tags": WORDS[q % 5:q % 5 + 2],
+                "answers": [
+                    {"id": q * 4 + a, "question_id": q, "answer_text": _text(rng, 8), "order_index": a}
+                    for a in range(4)
+                ],
+            }
+            for q in range(questions)
+        ],
+    )
+
+
+def _dashboard(rng: random.Random, courses: int) -> DashboardResponse:
+    now = datetime.now(timezone.utc)
+    return DashboardResponse(courses=[
+        {
+            "course_id": i, "title": _text(rng, 6), "thumbnail_url": f"https://cdn.example.com/{i}.png",
+            "completion_percentage": rng.uniform(0, 100), "lessons_completed": i, "total_lessons": 40,
+            "current_lesson_id": i * 10, "current_lesson_title": _text(rng, 6), "next_lesson_id": i * 10 + 1,
+            "next_lesson_title": _text(rng, 6), "due_reviews": i % 7, "is_completed": False,
+            "is_favorited": i % 3 == 0, "last_activity_date": now - timedelta(hours=i),
+        }
+        for i in range(courses)
+    ], next_cursor="abc")
+
+
+def _json_dumps(content) -> bytes:
+    # Same settings as starlette's JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def _median_us(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modules", type=int, default=12)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--courses", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    payloads = {
+        "CourseResponse": _course(rng, args.modules),
+        "QuizResponse": _quiz(rng, args.questions),
+        "DashboardResponse": _dashboard(rng, args.courses),
+    }
+    formats = {
+        "json": (_json_dumps, json.loads),
+        "orjson": (orjson.dumps, orjson.loads),
+        "msgpack": (packb, unpackb),
+    }
+
+    print(f"{'schema':<18} {'format':<8} {'bytes':>8} {'gzipped':>8} {'encode us':>10} {'decode us':>10}")
+    for name, model in payloads.items():
+        content = jsonable_encoder(model)
+        for fmt, (encode, decode) in formats.items():
+            body = encode(content)
+            assert decode(body) == content
+            print(
+                f"{name:<18} {fmt:<8} {len(body):>8,} {len(gzip.compress(body)):>8,} "
+                f"{_median_us(lambda: encode(content), args.runs):>10.1f} "
+                f"{_median_us(lambda: decode(body), args.runs):>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark bulk regrading: per-attempt grading vs one NumPy pass
+
+Builds a synthetic quiz and many stored attempts, changes one question's
+correct option, then regrades every attempt both by re-running ``grade`` per
+attempt and with the vectorized ``regrade``. Checks the scores agree. Pure
+computation; no database is needed.
+
+Usage:
+    python -m benchmarks.bench_regrade [--attempts 100000] [--questions 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from app.schemas.quiz import SubmittedAnswer  # noqa: E402
+from app.services.grading_service import AnswerKey, CompiledQuestion, grade, regrade  # noqa: E402
+
+OPTIONS = 4
+
+
+def build_key(questions: int, correct_option: int = 0) -> AnswerKey:
+    return AnswerKey(
+        quiz_id=1,
+        version=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        lesson_id=1,
+        max_attempts=3,
+        passing_score=0.7,
+        show_correct_answers=False,
+        show_explanations=False,
+        randomize_questions=False,
+        questions=tuple(
+            CompiledQuestion(
+                question_id=q,
+                question_type="multiple_choice",
+                points=1 + q % 3,
+                correct_ids=frozenset({q * OPTIONS + correct_option}),
+                accepted_texts=frozenset(),
+                concept_tags=(f"concept-{q % 5}",),
+                explanation=None,
+            )
+            for q in range(questions)
+        ),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--attempts", type=int, default=100_000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    submissions = [
+        {
+            q: SubmittedAnswer(answer_ids=[q * OPTIONS + rng.randrange(OPTIONS)])
+            for q in range(args.questions)
+            if rng.random() < 0.95
+        }
+        for _ in range(args.attempts)
+    ]
+    original = build_key(args.questions)
+    stored = [grade(original, submission).answers for submission in submissions]
+
+    # Question 0's correct option changes
+    changed = build_key(args.questions)
+    changed = AnswerKey(**{
+        **changed.__dict__,
+        "questions": (
+            CompiledQuestion(**{**changed.questions[0].__dict__, "correct_ids": frozenset({1})}),
+        ) + changed.questions[1:],
+    })
+
+    start = time.perf_counter()
+    expected = [grade(changed, submission).points_earned for submission in submissions]
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    earned = regrade(changed, stored).earned
+    numpy_s = time.perf_counter() - start
+
+    assert np.array_equal(earned, expected)
+    print(f"attempts:                {args.attempts:,} x {args.questions} questions")
+    print(f"grade per attempt:       {loop_s * 1000:9.1f} ms")
+    print(f"vectorized regrade:      {numpy_s * 1000:9.1f} ms")
+    print(f"speedup:                 {loop_s / numpy_s:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark review rescheduling: per-row Python vs NumPy batches
+
+Generates random scheduling state for many lesson progress rows, grades every
+row once and reschedules it both ways, checks the results agree and reports
+throughput. Pure computation; no database is needed.
+
+Usage:
+    python -m benchmarks.bench_scheduler [--items 1000000] [--batch-size 5000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from app.services.review_scheduler import (  # noqa: E402
+    DAY_SECONDS,
+    MASTERY_WEIGHT,
+    MIN_EASE,
+    ReviewState,
+    apply_grades,
+)
+
+
+def random_state(items: int, rng: np.random.Generator) -> ReviewState:
+    return ReviewState(
+        ids=np.arange(1, items + 1, dtype=np.int64),
+        ease=rng.uniform(MIN_EASE, 3.0, items),
+        interval=rng.integers(0, 120, items).astype(np.float64),
+        repetitions=rng.integers(0, 8, items),
+        review_count=rng.integers(0, 20, items),
+        mastery=rng.uniform(0.0, 1.0, items),
+        next_review=np.full(items, np.nan),
+    )
+
+
+def per_row(state: ReviewState, quality: np.ndarray, now: float):
+    """The straightforward loop: one SM-2 step per row object."""
+    rows = [
+        dict(ease=e, interval=i, repetitions=r, review_count=c, mastery=m)
+        for e, i, r, c, m in zip(
+            state.ease.tolist(),
+            state.interval.tolist(),
+            state.repetitions.tolist(),
+            state.review_count.tolist(),
+            state.mastery.tolist(),
+        )
+    ]
+    for row, q in zip(rows, quality.tolist()):
+        if q < 3:
+            row["repetitions"] = 0
+            row["interval"] = 1.0
+        else:
+            row["repetitions"] += 1
+            if row["repetitions"] == 1:
+                row["interval"] = 1.0
+            elif row["repetitions"] == 2:
+                row["interval"] = 6.0
+            else:
+                row["interval"] = float(round(row["interval"] * row["ease"]))
+        lapse = 5.0 - q
+        row["ease"] = max(MIN_EASE, row["ease"] + 0.1 - lapse * (0.08 + lapse * 0.02))
+        row["review_count"] += 1
+        row["mastery"] = (1 - MASTERY_WEIGHT) * row["mastery"] + MASTERY_WEIGHT * q / 5.0
+        row["next_review"] = now + row["interval"] * DAY_SECONDS
+    return rows
+
+
+def vectorized(state: ReviewState, quality: np.ndarray, now: float, batch_size: int):
+    """Batches the size the nightly job loads from the database."""
+    results = []
+    for start in range(0, len(state.ids), batch_size):
+        window = slice(start, start + batch_size)
+        batch = ReviewState(
+            ids=state.ids[window],
+            ease=state.ease[window],
+            interval=state.interval[window],
+            repetitions=state.repetitions[window],
+            review_count=state.review_count[window],
+            mastery=state.mastery[window],
+            next_review=state.next_review[window],
+        )
+        results.append(apply_grades(batch, quality[window], now))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    state = random_state(args.items, rng)
+    quality = rng.integers(0, 6, args.items).astype(np.float64)
+    now = time.time()
+
+    start = time.perf_counter()
+    expected = per_row(state, quality, now)
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batches = vectorized(state, quality, now, args.batch_size)
+    numpy_s = time.perf_counter() - start
+
+    intervals = np.concatenate([batch.interval for batch in batches])
+    eases = np.concatenate([batch.ease for batch in batches])
+    assert np.allclose(intervals, [row["interval"] for row in expected])
+    assert np.allclose(eases, [row["ease"] for row in expected])
+
+    print(f"items:                 {args.items:,}")
+    print(f"per-row Python:        {loop_s * 1000:9.1f} ms  ({args.items / loop_s:,.0f} items/s)")
+    print(f"NumPy, batches of {args.batch_size:<5}{numpy_s * 1000:8.1f} ms  ({args.items / numpy_s:,.0f} items/s)")
+    print(f"speedup:               {loop_s / numpy_s:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark lesson telemetry writes: per-event transactions vs write-behind
+
+Seeds a throwaway course with lessons and users in the configured database,
+replays the same telemetry stream both ways and reports events/second and
+statements issued. Requires the app environment (DATABASE_URL etc.) and a
+PostgreSQL database; seeded rows are deleted afterwards.
+
+Usage:
+    python -m benchmarks.bench_telemetry [--events 20000] [--users 200] [--lessons 20]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete  # noqa: E402
+
+from app.core.database import AsyncSessionLocal, async_engine, init_db  # noqa: E402
+from app.models import Course, Lesson, LessonProgress, User  # noqa: E402
+from app.services.telemetry_service import (  # noqa: E402
+    LessonTelemetryBuffer,
+    _upsert_statement,
+)
+
+
+async def seed(users: int, lessons: int):
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as session:
+        course = Course(
+            title=f"Benchmark course {tag}",
+            description="Telemetry benchmark",
+            topic="benchmark",
+            estimated_duration_minutes=60,
+            slug=f"bench-{tag}",
+        )
+        session.add(course)
+        await session.flush()
+
+        lesson_rows = [
+            Lesson(course_id=course.id, title=f"Lesson {i}", content="...", order_index=i, slug=f"l-{i}")
+            for i in range(lessons)
+        ]
+        user_rows = [
+            User(email=f"bench-{tag}-{i}@example.com", hashed_password="x", full_name="Bench")
+            for i in range(users)
+        ]
+        session.add_all(lesson_rows + user_rows)
+        await session.commit()
+        return course.id, [u.id for u in user_rows], [lesson.id for lesson in lesson_rows]
+
+
+async def cleanup(course_id, user_ids, lesson_ids):
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(LessonProgress).where(LessonProgress.user_id.in_(user_ids)))
+        await session.execute(delete(Lesson).where(Lesson.id.in_(lesson_ids)))
+        await session.execute(delete(User).where(User.id.in_(user_ids)))
+        await session.execute(delete(Course).where(Course.id == course_id))
+        await session.commit()
+
+
+def make_events(count, user_ids, lesson_ids):
+    rng = random.Random(42)
+    return [
+        (rng.choice(user_ids), rng.choice(lesson_ids), rng.uniform(0, 100), rng.randint(0, 3), 5.0)
+        for _ in range(count)
+    ]
+
+
+async def run_per_event(events) -> float:
+    start = time.perf_counter()
+    for user_id, lesson_id, scroll, interactions, seconds in events:
+        row = (user_id, lesson_id, scroll, interactions, 0, datetime.utcnow())
+        async with AsyncSessionLocal() as session:
+            await session.execute(_upsert_statement([row]))
+            await session.commit()
+    return time.perf_counter() - start
+
+
+async def run_buffered(events, max_pending: int):
+    buffer = LessonTelemetryBuffer(flush_interval=3600, max_pending=max_pending)
+    flushes = 0
+    start = time.perf_counter()
+    for user_id, lesson_id, scroll, interactions, seconds in events:
+        buffer.record(user_id, lesson_id, scroll, interactions, seconds)
+        if len(buffer.pending) >= buffer.max_pending:
+            await buffer.flush()
+            flushes += 1
+    await buffer.flush(final=True)
+    return time.perf_counter() - start, flushes + 1
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--lessons", type=int, default=20)
+    parser.add_argument("--max-pending", type=int, default=1000)
+    args = parser.parse_args()
+
+    await init_db()
+    course_id, user_ids, lesson_ids = await seed(args.users, args.lessons)
+    events = make_events(args.events, user_ids, lesson_ids)
+    try:
+        per_event = await run_per_event(events)
+        buffered, flushes = await run_buffered(events, args.max_pending)
+    finally:
+        await cleanup(course_id, user_ids, lesson_ids)
+        await async_engine.dispose()
+
+    print(f"events:              {args.events} over {args.users * args.lessons} (user, lesson) pairs")
+    print(f"per-event upserts:   {args.events / per_event:10.0f} events/s  ({args.events} transactions)")
+    print(f"write-behind:        {args.events / buffered:10.0f} events/s  ({flushes} flushes)")
+    print(f"speedup:             {per_event / buffered:10.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
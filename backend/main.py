@@ -7,30 +7,33 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
+import asyncio
 import time
 import structlog
 
 from app.core.config import settings
-from app.core.database import engine
+from app.core.content_negotiation import ContentNegotiationMiddleware, NegotiatedJSONResponse
+from app.core.database import engine, async_engine
 from app.core.exceptions import setup_exception_handlers
+from app.core.load_shedding import LoadSheddingMiddleware
+from app.core.logging import configure_logging, should_sample, shutdown_logging
+from app.core.metrics import MetricsMiddleware, metrics_response, run_db_pool_sampler
+from app.core.profiling import ProfilingMiddleware
+from app.core.tracing import TracingMiddleware, instrument_sqlalchemy, start_tracing, tracer
 from app.api.v1.api import api_router
+from app.services.counter_service import counter_service
+from app.services.course_stats_service import run_rollup_reconciler
+from app.services.lesson_artifacts import shutdown_render_pool
+from app.services.review_scheduler import run_review_scheduler
+from app.services.upload_service import run_upload_janitor
+from app.services.outbox import outbox_relay
+from app.services.telemetry_service import lesson_telemetry_buffer
 
 # Configure structured logging
-structlog.configure(
-    processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
-    ],
-    context_class=dict,
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    cache_logger_on_first_use=True,
+configure_logging(
+    level=settings.LOG_LEVEL,
+    sample_rate=settings.LOG_SAMPLE_RATE,
+    queue_size=settings.LOG_QUEUE_SIZE,
 )
 
 logger = structlog.get_logger()
@@ -43,50 +46,78 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json" if settings.DEBUG else None,
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
+    default_response_class=NegotiatedJSONResponse,
 )
 
 # Add middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 app.add_middleware(
     TrustedHostMiddleware,
     allowed_hosts=["*"] if settings.DEBUG else ["cognitioflux.com", "*.cognitioflux.com"]
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Profiling is opt-in; when disabled the middleware is not installed at all
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Request logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start_time = time.time()
+    start_time = time.perf_counter()
+    
+    # Sample once per request so start/completion lines stay paired
+    sampled = should_sample()
+    path = request.scope["path"]
     
     # Log request
-    logger.info(
-        "Request started",
-        method=request.method,
-        url=str(request.url),
-        client_ip=request.client.host if request.client else None,
-    )
+    if sampled:
+        logger.info(
+            "Request started",
+            method=request.method,
+            path=path,
+            client_ip=request.client.host if request.client else None,
+        )
     
     response = await call_next(request)
     
-    # Log response
-    process_time = time.time() - start_time
-    logger.info(
-        "Request completed",
-        method=request.method,
-        url=str(request.url),
-        status_code=response.status_code,
-        process_time=round(process_time, 4),
-    )
+    # Log response (errors are always kept)
+    process_time = time.perf_counter() - start_time
+    if sampled or response.status_code >= 400:
+        logger.info(
+            "Request completed",
+            method=request.method,
+            path=path,
+            status_code=response.status_code,
+            process_time=round(process_time, 4),
+        )
     
     response.headers["X-Process-Time"] = str(process_time)
     return response
 
+# Admission control runs before any routing, dependency or DB work
+if settings.LOAD_SHEDDING_ENABLED:
+    app.add_middleware(LoadSheddingMiddleware)
+
+# JSON or MessagePack, per the Accept and Content-Type headers
+app.add_middleware(ContentNegotiationMiddleware)
+
+# Tracing wraps every other middleware but CORS so the request ID reaches all log lines
+app.add_middleware(TracingMiddleware)
+if settings.TRACING_ENABLED:
+    instrument_sqlalchemy(async_engine)
+
+# Added last so it is outermost: shed 503s and rate-limit 429s need CORS
+# headers too, or browsers report them as network errors
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=settings.ALLOWED_ORIGINS,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
 # Setup exception handlers
 setup_exception_handlers(app)
 
@@ -104,6 +135,13 @@ async def health_check():
         "environment": settings.ENVIRONMENT,
     }
 
+# Metrics endpoint
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics endpoint."""
+        return metrics_response()
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -125,12 +163,47 @@ async def startup_event():
         version=settings.APP_VERSION,
         environment=settings.ENVIRONMENT,
     )
+    
+    start_tracing()
+    
+    if settings.METRICS_ENABLED:
+        app.state.db_pool_sampler = asyncio.create_task(
+            run_db_pool_sampler(settings.METRICS_POOL_SAMPLE_SECONDS)
+        )
+    
+    app.state.rollup_reconciler = asyncio.create_task(
+        run_rollup_reconciler(settings.ROLLUP_RECONCILE_INTERVAL_HOURS)
+    )
+    app.state.review_scheduler = asyncio.create_task(
+        run_review_scheduler(settings.REVIEW_SCHEDULER_INTERVAL_HOURS)
+    )
+    app.state.upload_janitor = asyncio.create_task(
+        run_upload_janitor(settings.UPLOAD_JANITOR_INTERVAL_HOURS)
+    )
+    
+    lesson_telemetry_buffer.start()
+    counter_service.start()
+    outbox_relay.start()
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown event."""
     logger.info("Application shutting down")
+    
+    for task_name in ("db_pool_sampler", "rollup_reconciler", "review_scheduler", "upload_janitor"):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+    
+    # Flush write-behind buffers before the DB and log pipelines go away
+    await lesson_telemetry_buffer.stop()
+    await counter_service.stop()
+    await outbox_relay.stop()
+    
+    shutdown_render_pool()
+    tracer.shutdown()
+    shutdown_logging()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,90 @@
+"""
+Tests for the shared per-process caches
+"""
+
+import asyncio
+from dataclasses import dataclass
+
+from app.core.cache import SizedLRU, TTLCache, VersionedCache
+
+
+@dataclass(frozen=True)
+class Blob:
+    size: int
+    version: int = 0
+
+
+def counting_loader(value):
+    calls = []
+
+    async def load(session, key):
+        calls.append(key)
+        return value(key)
+
+    return load, calls
+
+
+def test_ttl_cache_loads_once_until_invalidated():
+    load, calls = counting_loader(lambda key: key * 2)
+    cache = TTLCache("test_ttl", 60, load)
+
+    async def scenario():
+        values = [await cache.get(None, 1), await cache.get(None, 1)]
+        cache.invalidate(1)
+        values.append(await cache.get(None, 1))
+        return values
+
+    assert asyncio.run(scenario()) == [2, 2, 2]
+    assert calls == [1, 1]
+
+
+def test_ttl_cache_reloads_after_expiry():
+    load, calls = counting_loader(lambda key: key)
+    cache = TTLCache("test_ttl", 0, load)
+
+    async def scenario():
+        await cache.get(None, 1)
+        await cache.get(None, 1)
+
+    asyncio.run(scenario())
+    assert calls == [1, 1]
+
+
+def test_versioned_cache_reloads_when_version_moves_on():
+    version = {"current": 1}
+    load, calls = counting_loader(lambda key: Blob(1, version["current"]))
+    cache = VersionedCache("test_versioned", load)
+
+    async def scenario():
+        await cache.get(None, "quiz", 1)
+        await cache.get(None, "quiz", 1)
+        version["current"] = 2
+        return await cache.get(None, "quiz", 2)
+
+    assert asyncio.run(scenario()).version == 2
+    assert calls == ["quiz", "quiz"]
+
+
+def test_sized_lru_evicts_least_recently_used_within_budget():
+    cache = SizedLRU("test_lru", max_bytes=10)
+    cache.put("a", Blob(4))
+    cache.put("b", Blob(4))
+    assert cache.get("a") is not None  # "b" is now least recently used
+    cache.put("c", Blob(4))
+    cache.put("huge", Blob(11))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.get("huge") is None
+
+
+def test_sized_lru_loads_misses_and_skips_missing_rows():
+    load, calls = counting_loader(lambda key: None if key == "gone" else Blob(1))
+    cache = SizedLRU("test_lru", max_bytes=10, loader=load)
+
+    async def scenario():
+        return [await cache.load(None, key) for key in ("x", "x", "gone", "gone")]
+
+    assert asyncio.run(scenario()) == [Blob(1), Blob(1), None, None]
+    assert calls == ["x", "gone", "gone"]
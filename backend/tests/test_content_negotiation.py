@@ -0,0 +1,68 @@
+"""
+Tests for MessagePack request decoding limits
+"""
+
+import asyncio
+
+import orjson
+
+from app.core.config import settings
+from app.core.content_negotiation import ContentNegotiationMiddleware, packb
+
+
+async def echo_app(scope, receive, send):
+    message = await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": message.get("body", b"")})
+
+
+def call(path, chunks, content_length=None):
+    headers = [(b"content-type", b"application/msgpack")]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    scope = {"type": "http", "method": "POST", "path": path, "headers": headers}
+    incoming = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    received = []
+    sent = []
+
+    async def receive():
+        message = incoming.pop(0)
+        received.append(message)
+        return message
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(ContentNegotiationMiddleware(echo_app)(scope, receive, send))
+    return sent[0]["status"], b"".join(message.get("body", b"") for message in sent[1:]), received
+
+
+def test_small_body_is_decoded_to_json():
+    body = packb({"name": "x"})
+    status, echoed, _ = call("/api/v1/sync", [body], len(body))
+    assert status == 200
+    assert orjson.loads(echoed) == {"name": "x"}
+
+
+def test_declared_length_over_the_cap_is_refused_before_reading(monkeypatch):
+    monkeypatch.setattr(settings, "MSGPACK_MAX_BODY_BYTES", 16)
+    status, _, received = call("/api/v1/sync", [b"\x00" * 32], 32)
+    assert status == 413
+    assert received == []
+
+
+def test_streamed_body_over_the_cap_is_refused_once_past_it(monkeypatch):
+    monkeypatch.setattr(settings, "MSGPACK_MAX_BODY_BYTES", 16)
+    status, _, received = call("/api/v1/sync", [b"\x00" * 10, b"\x00" * 10, b"\x00" * 10])
+    assert status == 413
+    assert len(received) == 2
+
+
+def test_upload_bodies_pass_through_undecoded(monkeypatch):
+    monkeypatch.setattr(settings, "MSGPACK_MAX_BODY_BYTES", 16)
+    status, echoed, _ = call("/api/v1/uploads/media", [b"\x00" * 32], 32)
+    assert status == 200
+    assert echoed == b"\x00" * 32
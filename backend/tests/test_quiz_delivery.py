@@ -0,0 +1,58 @@
+"""
+Tests for pre-serialized quiz delivery
+"""
+
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.services.quiz_delivery import serialize_quiz
+
+
+def make_answer(answer_id, question_id, text, is_correct):
+    return SimpleNamespace(
+        id=answer_id, question_id=question_id, answer_text=text,
+        order_index=answer_id, is_correct=is_correct, explanation="Because",
+    )
+
+
+def make_question(question_id, question_type, answers):
+    return SimpleNamespace(
+        id=question_id, quiz_id=1, question_text=f"Question {question_id}",
+        question_type=question_type, order_index=question_id, points=1,
+        hint=None, concept_tags=None, difficulty_level="medium",
+        explanation="Because", answers=answers,
+    )
+
+
+def make_quiz():
+    now = datetime(2024, 1, 1, 12, 0)
+    return SimpleNamespace(
+        id=1, lesson_id=1, title="Capitals", instructions=None,
+        time_limit_minutes=None, max_attempts=3, passing_score=0.7,
+        randomize_questions=False, show_correct_answers=True,
+        show_explanations=True, created_at=now, updated_at=now,
+        questions=[
+            make_question(1, "multiple_choice", [
+                make_answer(1, 1, "Lyon", False),
+                make_answer(2, 1, "Marseille", True),
+            ]),
+            make_question(2, "short_answer", [
+                make_answer(3, 2, "Paris", True),
+                make_answer(4, 2, "paris, france", True),
+            ]),
+        ],
+    )
+
+
+def test_delivered_quiz_contains_no_accepted_short_answer_text():
+    payload = serialize_quiz(make_quiz())
+
+    for document in (payload.document(), payload.render(1), payload.render(2, [2, 1])):
+        assert b"Paris" not in document
+        assert b"paris, france" not in document
+        assert b"is_correct" not in document
+
+    questions = {question["id"]: question for question in json.loads(payload.document())["questions"]}
+    assert questions[2]["answers"] == []
+    assert [answer["answer_text"] for answer in questions[1]["answers"]] == ["Lyon", "Marseille"]
@@ -0,0 +1,138 @@
+"""
+Tests for token-bucket rate limiting
+"""
+
+import asyncio
+
+import fakeredis.aioredis
+import pytest
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.rate_limit import (
+    MemoryRateLimitBackend,
+    RateLimiter,
+    RateLimitRule,
+    RedisRateLimitBackend,
+    client_ip,
+)
+
+RULE = RateLimitRule("test", capacity=3, refill_per_second=0.01)
+
+
+def test_memory_bucket_allows_burst_then_rejects():
+    backend = MemoryRateLimitBackend()
+    results = [backend.consume_now("a", RULE) for _ in range(4)]
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert results[2].remaining == 0
+    assert results[3].retry_after == pytest.approx(100, rel=0.01)
+
+
+def test_memory_eviction_drops_least_recently_updated_keys():
+    backend = MemoryRateLimitBackend(max_keys=3)
+    for _ in range(RULE.capacity):
+        backend.consume_now("attacker", RULE)
+    backend.consume_now("b", RULE)
+    backend.consume_now("c", RULE)
+
+    # Rotating keys must not reset the exhausted bucket, which was just used
+    backend.consume_now("attacker", RULE)
+    for key in ("d", "e"):
+        backend.consume_now(key, RULE)
+
+    assert not backend.consume_now("attacker", RULE).allowed
+    assert len(backend._buckets) == 3
+    assert "b" not in backend._buckets and "c" not in backend._buckets
+
+
+@pytest.fixture
+def redis():
+    client = fakeredis.aioredis.FakeRedis()
+    yield client
+    asyncio.run(client.aclose())
+
+
+def test_redis_script_shares_bucket_and_expires_it(redis):
+    async def scenario():
+        backend = RedisRateLimitBackend(redis)
+        results = [await backend.consume("a", RULE) for _ in range(4)]
+        ttl_ms = await redis.pttl("ratelimit:test:a")
+        other = await backend.consume("b", RULE)
+        return results, ttl_ms, other
+
+    results, ttl_ms, other = asyncio.run(scenario())
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results[:3]] == [2, 1, 0]
+    assert results[3].retry_after > 0
+    # Kept only as long as a full refill takes
+    assert 0 < ttl_ms <= RULE.capacity / RULE.refill_per_second * 1000 + 1000
+    assert other.allowed
+
+
+def test_redis_script_refills_over_time(redis):
+    rule = RateLimitRule("fast", capacity=1, refill_per_second=50)
+
+    async def scenario():
+        backend = RedisRateLimitBackend(redis)
+        first = await backend.consume("a", rule)
+        second = await backend.consume("a", rule)
+        await asyncio.sleep(0.05)
+        third = await backend.consume("a", rule)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+
+    assert first.allowed and not second.allowed and third.allowed
+
+
+def test_limiter_rejects_locally_without_consulting_shared_bucket(redis):
+    limiter = RateLimiter(shared=RedisRateLimitBackend(redis), local=MemoryRateLimitBackend())
+
+    async def scenario():
+        results = [await limiter.hit("a", RULE) for _ in range(4)]
+        stored = await redis.hget("ratelimit:test:a", "tokens")
+        return results, stored
+
+    results, stored = asyncio.run(scenario())
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    # The rejected hit never reached Redis, which still shows the bucket empty
+    assert float(stored) == pytest.approx(0, abs=0.01)
+
+
+def test_limiter_fails_open_to_local_decision_when_shared_is_down():
+    class Unavailable:
+        async def consume(self, key, rule, cost=1):
+            raise ConnectionError("redis down")
+
+    limiter = RateLimiter(shared=Unavailable(), local=MemoryRateLimitBackend())
+    result = asyncio.run(limiter.hit("a", RULE))
+
+    assert result.allowed
+
+
+def make_request(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 12345)})
+
+
+def test_client_ip_ignores_forwarded_header_from_untrusted_peer(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", ["10.0.0.0/8"])
+    assert client_ip(make_request("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+
+
+def test_client_ip_takes_first_untrusted_hop_behind_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", ["10.0.0.0/8"])
+    # The leftmost entry is whatever the client sent and is not believed
+    request = make_request("10.0.0.2", "1.2.3.4, 198.51.100.1, 10.0.0.1")
+    assert client_ip(request) == "198.51.100.1"
+
+
+def test_clients_behind_one_proxy_get_separate_login_buckets(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", ["10.0.0.1"])
+    first = client_ip(make_request("10.0.0.1", "198.51.100.1"))
+    second = client_ip(make_request("10.0.0.1", "198.51.100.2"))
+    assert first != second
+    assert client_ip(make_request("10.0.0.1")) == "10.0.0.1"
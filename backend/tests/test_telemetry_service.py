@@ -0,0 +1,123 @@
+"""
+Tests for the lesson telemetry write-behind buffer
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services import telemetry_service
+from app.services.telemetry_service import LessonTelemetryBuffer
+
+
+class RecordingSession:
+    """Async session double recording the rows each statement would write.
+
+    ``known`` holds the (user, lesson) keys that exist; upserts only report
+    those as written, like the join against lessons and users does.
+    """
+
+    def __init__(self, log, known):
+        self.log = log
+        self.known = known
+        self.info = {}
+        self.events = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement):
+        kind, rows = statement
+        self.log.append((kind, rows))
+        written = [row[:2] for row in rows if row[:2] in self.known]
+        return type("Result", (), {"all": lambda _: written})()
+
+    def add(self, event):
+        self.events.append(event)
+
+    async def commit(self):
+        self.log.append(("commit", self.events))
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    log = []
+    known = {(1, 10), (2, 20)}
+    monkeypatch.setattr(telemetry_service, "AsyncSessionLocal", lambda: RecordingSession(log, known))
+    monkeypatch.setattr(telemetry_service, "_upsert_statement", lambda rows: ("upsert", rows))
+    monkeypatch.setattr(telemetry_service, "_add_time_statement", lambda rows: ("add_time", rows))
+    return log
+
+
+def test_final_flush_adds_carried_seconds_without_inserting_null_access_time(recorded):
+    buffer = LessonTelemetryBuffer(flush_interval=3600, max_pending=100)
+    accessed = datetime(2024, 1, 1, 12, 0)
+
+    async def scenario():
+        buffer.record(1, 10, time_spent_seconds=95, accessed_at=accessed)
+        await buffer.flush()
+        # 35s carried over; another user reads 10 minutes before shutdown
+        buffer.record(2, 20, time_spent_seconds=600, accessed_at=accessed)
+        await buffer.stop()
+
+    asyncio.run(scenario())
+
+    upserted = [row for kind, rows in recorded if kind == "upsert" for row in rows]
+    assert all(row[5] is not None for row in upserted)
+    assert (2, 20, 0.0, 0, 10, accessed) in upserted
+    # The carried 35s round to a minute, added to the existing row in place
+    assert ("add_time", [(1, 10, 1)]) in recorded
+    assert buffer.pending == {}
+
+
+def test_carried_seconds_under_half_a_minute_are_dropped_on_stop(recorded):
+    buffer = LessonTelemetryBuffer(flush_interval=3600, max_pending=100)
+
+    async def scenario():
+        buffer.record(1, 10, time_spent_seconds=80)
+        await buffer.flush()
+        await buffer.stop()
+
+    asyncio.run(scenario())
+
+    assert [kind for kind, _ in recorded] == ["upsert", "commit"]
+
+
+def test_unknown_lesson_does_not_block_other_keys(recorded):
+    buffer = LessonTelemetryBuffer(flush_interval=3600, max_pending=100)
+    accessed = datetime(2024, 1, 1, 12, 0)
+
+    async def scenario():
+        buffer.record(1, 10, time_spent_seconds=120, accessed_at=accessed)
+        buffer.record(1, 999, time_spent_seconds=300, accessed_at=accessed)
+        return await buffer.flush()
+
+    assert asyncio.run(scenario()) == 2
+    assert buffer.pending == {}
+
+    events = recorded[-1][1]
+    # Learning time only counts rows that were actually written
+    assert [event.payload["minutes"] for event in events] == [2]
+
+
+def test_idle_remainders_are_settled_so_pending_drains(recorded):
+    buffer = LessonTelemetryBuffer(flush_interval=3600, max_pending=10000)
+    accessed = datetime(2024, 1, 1, 12, 0)
+
+    async def scenario():
+        for lesson_id in range(100, 600):
+            buffer.record(1, lesson_id, time_spent_seconds=90, accessed_at=accessed)
+        buffer.record(1, 10, time_spent_seconds=95, accessed_at=accessed)
+        await buffer.flush()
+        carried = len(buffer.pending)
+        await buffer.flush()
+        return carried
+
+    # Only the known key carries its 35s; forged lesson ids carry nothing
+    assert asyncio.run(scenario()) == 1
+    assert buffer.pending == {}
+    assert ("add_time", [(1, 10, 1)]) in recorded